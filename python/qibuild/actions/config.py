@@ -6,6 +6,7 @@
 import subprocess
 
 import qisys
+import qibuild.config
 import qibuild.parsers
 import qibuild.wizard
 from qisys import ui
@@ -44,8 +45,8 @@ def do(args):
         editor = qibuild_cfg.defaults.env.editor
         if not editor:
             editor = qisys.interact.get_editor()
-            qibuild_cfg.defaults.env.editor = editor
-            qibuild_cfg.write()
+            with qibuild.config.edit_global_config() as global_cfg:
+                global_cfg.defaults.env.editor = editor
 
         full_path = qisys.command.find_program(editor)
         if is_local:
@@ -16,6 +16,9 @@ def configure_parser(parser):
     qibuild.parsers.cmake_configure_parser(parser)
     qibuild.parsers.cmake_build_parser(parser)
     qibuild.parsers.project_parser(parser)
+    parser.add_argument("--project-jobs", dest="project_jobs", type=int,
+                        default=1,
+                        help="Number of projects to configure at the same time")
     if not parser.epilog:
         parser.epilog = ""
     parser.epilog += """
@@ -39,4 +42,5 @@ def do(args):
                             debug_trycompile=args.debug_trycompile,
                             trace_cmake=args.trace_cmake,
                             profiling=args.profiling,
-                            summarize_options=args.summarize_options)
+                            summarize_options=args.summarize_options,
+                            project_jobs=args.project_jobs)
@@ -71,7 +71,7 @@ def get_deps(build_worktree, project, single, runtime, reverse):
 
     if reverse:
         collected_dependencies = collect_dependencies_reverse(
-            project, projects, single, runtime)
+            project, deps_solver, single, runtime)
     else:
         collected_dependencies = collect_dependencies(
             project, projects, packages, single, runtime)
@@ -182,27 +182,30 @@ def print_deps_graph(root_name, label, dependency_relationships):
                 qisys.ui.reset, line_type)
     qisys.ui.info(qisys.ui.reset, "}")
 
-def collect_dependencies_reverse(project, projects, single, runtime, depth=0):
+def collect_dependencies_reverse(project, deps_solver, single, runtime, depth=0):
     """ recursively collects projects that depends on the current project """
     collected_dependencies = list()
+    if runtime:
+        dep_types = ["runtime"]
+    else:
+        dep_types = ["build"]
+    reverse_deps = deps_solver.get_dep_projects([project], dep_types,
+                                                reverse=True)
+    # keep the order of the build projects
+    reverse_names = set(x.name for x in reverse_deps)
+    projects = [x for x in deps_solver.build_worktree.build_projects
+                if x.name in reverse_names]
     for proj in projects:
-        dependency = None
-        depends = list()
-        if runtime:
-            depends = proj.run_depends
-        else:
-            depends = proj.build_depends
-        if project.name in depends:
-            print "%s on %s" % (project.name, proj.name)
-            dependency = DependencyRelationship(project.name, proj.name)
-            dependency.is_known = True
-            dependency.path = proj.path
-            dependency.depth = depth
-            collected_dependencies.append(dependency)
-            if not single:
-                sub = collect_dependencies_reverse(
-                    proj, projects, False, runtime, depth+1)
-                collected_dependencies.extend(sub)
+        print "%s on %s" % (project.name, proj.name)
+        dependency = DependencyRelationship(project.name, proj.name)
+        dependency.is_known = True
+        dependency.path = proj.path
+        dependency.depth = depth
+        collected_dependencies.append(dependency)
+        if not single:
+            sub = collect_dependencies_reverse(
+                proj, deps_solver, False, runtime, depth+1)
+            collected_dependencies.extend(sub)
 
     return collected_dependencies
 
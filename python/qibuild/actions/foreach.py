@@ -20,6 +20,13 @@ def configure_parser(parser):
     parser.add_argument("command", metavar="COMMAND", nargs="+")
     parser.add_argument("--continue", "--ignore-errors", dest="ignore_errors",
                         action="store_true", help="continue on error")
+    parser.add_argument("-j", "--jobs", dest="num_jobs", type=int,
+                        help="Number of projects on which the command runs "
+                             "at the same time")
+    parser.add_argument("--interleave", action="store_true",
+                        help="When using -j, display the output as it comes, "
+                             "prefixed by the project name")
+    parser.set_defaults(num_jobs=1)
 
 def do(args):
     """Main entry point"""
@@ -27,4 +34,6 @@ def do(args):
     projects = qibuild.parsers.get_build_projects(build_worktree, args,
                                                  default_all=True)
     qisys.actions.foreach(projects, args.command,
-                          ignore_errors=args.ignore_errors)
+                          ignore_errors=args.ignore_errors,
+                          num_jobs=args.num_jobs,
+                          interleave=args.interleave)
@@ -23,7 +23,18 @@ def configure_parser(parser):
                        help="Split debug symbols")
     group.add_argument("--with-tests", action="store_true", dest="with_tests",
                         help="Also install tests")
-    parser.set_defaults(prefix="/", split_debug=False, dep_types="default")
+    group.add_argument("--install-mode", choices=["copy", "hardlink", "clone"],
+                       help="How to install the files of the packages: "
+                            "copy them (the default), use hard links, or "
+                            "copy-on-write clones when the file system "
+                            "supports it. Files already up to date are "
+                            "never installed again")
+    group.add_argument("--check-contents", action="store_true",
+                       help="To tell whether the files of the packages "
+                            "are up to date, compare their contents instead "
+                            "of their modification times")
+    parser.set_defaults(prefix="/", split_debug=False, dep_types="default",
+                        install_mode="copy", check_contents=False)
     if not parser.epilog:
         parser.epilog = ""
     parser.epilog += """
@@ -54,4 +65,6 @@ def do(args):
 
     cmake_builder.install(dest_dir, prefix=args.prefix,
                           split_debug=args.split_debug,
-                          components=components)
+                          components=components,
+                          install_mode=args.install_mode,
+                          check_contents=args.check_contents)
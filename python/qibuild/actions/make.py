@@ -19,6 +19,10 @@ def configure_parser(parser):
     group.add_argument("--coverity", action="store_true", default=False,
                        help="Build using cov-build. Ensure you have "
                        "cov-analysis installed on your machine.")
+    group.add_argument("--project-jobs", dest="project_jobs", type=int,
+                       default=1,
+                       help="Number of projects to build at the same time. "
+                       "The -j value is shared between them")
 
 @ui.timer("qibuild make")
 def do(args):
@@ -26,4 +30,5 @@ def do(args):
 
     cmake_builder = qibuild.parsers.get_cmake_builder(args)
     cmake_builder.build(num_jobs=args.num_jobs, rebuild=args.rebuild,
-                        coverity=args.coverity)
+                        coverity=args.coverity,
+                        project_jobs=args.project_jobs)
@@ -61,8 +61,9 @@ def num_jobs_to_args(num_jobs, cmake_generator):
         return ["-j", str(num_jobs)]
 
 class BuildFailed(Exception):
-    def __init__(self, project):
+    def __init__(self, project, output=None):
         self.project = project
+        self.output = output
     def __str__(self):
         return "Error occurred when building project %s" % self.project.name
 
@@ -1,5 +1,6 @@
 import os
 import qisys.qixml
+import qisys.envsetter
 
 
 import qibuild.config
@@ -27,6 +28,8 @@ class CMakeBuildConfig(object):
         self._cmake_generator = None
         self.read_local_settings()
         self.num_jobs = None
+        # cache for build_env: (key, environment)
+        self._build_env = None
 
     @property
     def profiles(self):
@@ -107,10 +110,20 @@ class CMakeBuildConfig(object):
         read from qibuild configuration files.
         ``os.environ`` will remain unchanged
 
+        The environment is computed once, and computed again only if the
+        settings of the active config or ``os.environ`` change.
+        Each call returns a new copy.
+
         """
+        key = (self.qibuild_cfg.env.path, self.qibuild_cfg.env.bat_file,
+               os.environ.copy())
+        if self._build_env and self._build_env[0] == key:
+            return self._build_env[1].copy()
         envsetter = qisys.envsetter.EnvSetter()
         envsetter.read_config(self.qibuild_cfg)
-        return envsetter.get_build_env()
+        build_env = envsetter.get_build_env()
+        self._build_env = (key, build_env)
+        return build_env.copy()
 
     def build_directory(self, prefix="build"):
         """ Return a suitable build directory, depending on the
@@ -76,12 +76,12 @@ def get_cached_var(build_dir, var, default=None):
     if not os.path.exists(cmakecache):
         mess  = "Could not find CMakeCache.txt in %s" % build_dir
         raise Exception(mess)
-    res = read_cmake_cache(cmakecache)
+    res = _get_parsed_cache(cmakecache)
     return res.get(var, default)
 
 def cmake(source_dir, build_dir, cmake_args, env=None,
           clean_first=True, profiling=False, debug_trycompile=False,
-          trace_cmake=False, summarize_options=False):
+          trace_cmake=False, summarize_options=False, capture=False):
     """Call cmake with from a build dir for a source dir.
     cmake_args are added on the command line.
 
@@ -89,6 +89,10 @@ def cmake(source_dir, build_dir, cmake_args, env=None,
                 ``os.environ`` will remain unchanged
     :param clean_first: Clean the cmake cache
     :param summarize_options: Whether to call :py:func:`display_options` at the end
+    :param capture: Do not display the output of ``cmake`` but return it
+                    as a string. On failure, it is available in the
+                    ``stdout`` attribute of the
+                    :py:class:`qisys.command.CommandFailedException`
 
     For qibuild/CMake hackers:
 
@@ -130,6 +134,8 @@ def cmake(source_dir, build_dir, cmake_args, env=None,
     # Add path to source to the list of args, and set buildir for
     # the current working dir.
     cmake_args += [source_dir]
+    if capture and not profiling and not trace_cmake:
+        return _call_captured(["cmake"] + cmake_args, build_dir, env)
     if not profiling and not trace_cmake:
         qisys.command.call(["cmake"] + cmake_args, cwd=build_dir, env=env)
         if summarize_options:
@@ -160,6 +166,22 @@ def cmake(source_dir, build_dir, cmake_args, env=None,
     qibuild.cmake.profiling.gen_annotations(profiling_res, outdir, qibuild_dir)
     ui.info(ui.green, "Annotations generated in", outdir)
 
+def _call_captured(cmd, build_dir, env):
+    """ Helper for cmake(capture=True) """
+    cmd[0] = qisys.command.find_program(cmd[0], env=env, raises=True)
+    process = qisys.command.Process(cmd, cwd=build_dir, env=env)
+    process.run()
+    if process.return_type == qisys.command.Process.NOT_RUN:
+        raise process.exception
+    if process.return_type != qisys.command.Process.OK:
+        returncode = process.returncode
+        if returncode is None:
+            returncode = -1
+        raise qisys.command.CommandFailedException(cmd, returncode,
+                                                   cwd=build_dir,
+                                                   stdout=process.out)
+    return process.out
+
 def display_options(build_dir):
     """ Display the options by looking in the CMake cache
 
@@ -176,27 +198,35 @@ def display_options(build_dir):
     for key in opt_keys:
         print "  %s : %s" % (key.ljust(padding), cache[key])
 
+# Matches the ``KEY:TYPE=VALUE`` lines of a CMakeCache.txt file
+CMAKE_CACHE_ENTRY_RE = re.compile(r"^([a-zA-Z0-9-_]+):(\w+)=(.*)$", re.MULTILINE)
+
+# Cache for _get_parsed_cache()
+_CMAKE_CACHES = dict()
+
 def read_cmake_cache(cache_path):
     """ Read a CMakeCache.txt file, returning a dict
     name -> value
 
     """
+    return dict(_get_parsed_cache(cache_path))
+
+def _get_parsed_cache(cache_path):
+    """ Parse a CMakeCache.txt file. The result is cached
+    as long as the file does not change, and must not be modified
+
+    """
+    stat = os.stat(cache_path)
+    signature = (stat.st_mtime, stat.st_size)
+    cached = _CMAKE_CACHES.get(cache_path)
+    if cached and cached[0] == signature:
+        return cached[1]
     with open(cache_path, "r") as fp:
-        lines = fp.readlines()
+        contents = fp.read()
     res = dict()
-    for line in lines:
-        if line.startswith("//"):
-            continue
-        if line.startswith("#"):
-            continue
-        if not line:
-            continue
-        match = re.match(r"([a-zA-Z0-9-_]+):(\w+)=(.*)", line)
-        if not match:
-            continue
-        else:
-            (key, _type, value) = match.groups()
-            res[key] = value
+    for (key, _type, value) in CMAKE_CACHE_ENTRY_RE.findall(contents):
+        res[key] = value
+    _CMAKE_CACHES[cache_path] = (signature, res)
     return res
 
 def get_cmake_qibuild_dir():
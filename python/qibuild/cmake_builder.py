@@ -1,10 +1,15 @@
 import os
 import functools
+import multiprocessing
 import operator
+import threading
 
 from qisys import ui
 import qisys.sh
+import qisys.parallel
 import qisys.remote
+import qibuild.build
+import qibuild.cmake
 import qibuild.deploy
 import qibuild.deps
 from qisys.abstractbuilder import AbstractBuilder
@@ -106,9 +111,18 @@ class CMakeBuilder(AbstractBuilder):
         project.fix_shared_libs(paths)
 
     def configure(self, *args, **kwargs):
-        """ Configure the projects in the correct order """
+        """ Configure the projects in the correct order
+
+        :param project_jobs: number of projects to configure at the same time.
+                             See :py:meth:`configure_parallel`
+
+        """
+        project_jobs = kwargs.pop("project_jobs", None)
         self.bootstrap_projects()
         projects = self.deps_solver.get_dep_projects(self.projects, self.dep_types)
+        if project_jobs > 1 and len(projects) > 1:
+            self.configure_parallel(projects, project_jobs, **kwargs)
+            return
 
         for i, project in enumerate(projects):
             ui.info_count(i, len(projects),
@@ -116,10 +130,75 @@ class CMakeBuilder(AbstractBuilder):
                           ui.blue, project.name)
             project.configure(**kwargs)
 
+    def configure_parallel(self, projects, project_jobs, **kwargs):
+        """ Configure several projects at the same time: each project is
+        configured as soon as all its dependencies are configured.
+
+        A failure does not stop the projects that do not depend on the
+        failing one. A summary of the failures is displayed at the end.
+
+        """
+        summarize_options = kwargs.pop("summarize_options", False)
+        job_queue = qisys.parallel.DagJobQueue([x.name for x in projects],
+                                               self._get_deps_graph(projects),
+                                               num_workers=project_jobs)
+        job_queue.stop_on_failure = False
+        by_name = dict((x.name, x) for x in projects)
+        lock = threading.Lock()
+        finished = list()
+
+        def configure_one(name):
+            project = by_name[name]
+            with lock:
+                ui.info(ui.green, "Configuring", ui.blue, project.name)
+            output = ""
+            ok = False
+            try:
+                output = project.configure(capture=True, **kwargs)
+                ok = True
+            except qibuild.build.ConfigureFailed as e:
+                if e.exception:
+                    output = e.exception.stdout
+                raise
+            finally:
+                with lock:
+                    if ok:
+                        ui.info_count(len(finished), len(projects),
+                                      ui.green, "Done configuring", ui.blue, project.name)
+                    else:
+                        ui.error("Failed to configure", project.name)
+                    finished.append(name)
+                    if output:
+                        ui.info(output, end="")
+                    if ok and summarize_options:
+                        qibuild.cmake.display_options(project.build_directory)
+
+        job_queue.run(configure_one)
+        if not job_queue.failed:
+            return
+        ui.error("Failed to configure %i project(s)" % len(job_queue.failed))
+        for (name, error) in job_queue.failed:
+            ui.info(ui.red, " *", ui.blue, name, ui.reset, str(error))
+        if job_queue.skipped:
+            ui.info(ui.red, "Not configured because of previous errors:")
+            for name in job_queue.skipped:
+                ui.info(ui.red, " *", ui.blue, name)
+        (_, error) = job_queue.failed[0]
+        raise error
+
     @need_configure
     def build(self, *args, **kwargs):
-        """ Build the projects in the correct order """
+        """ Build the projects in the correct order
+
+        :param project_jobs: number of projects to build at the same time.
+                             See :py:meth:`build_parallel`
+
+        """
+        project_jobs = kwargs.pop("project_jobs", None)
         projects = self.deps_solver.get_dep_projects(self.projects, self.dep_types)
+        if project_jobs > 1 and len(projects) > 1:
+            self.build_parallel(projects, project_jobs, **kwargs)
+            return
         for i, project in enumerate(projects):
             ui.info_count(i, len(projects),
                           ui.green, "Building",
@@ -127,6 +206,86 @@ class CMakeBuilder(AbstractBuilder):
             self.pre_build(project)
             project.build(**kwargs)
 
+    def build_parallel(self, projects, project_jobs, **kwargs):
+        """ Build several projects at the same time: each project is
+        started as soon as all its dependencies are built.
+
+        The number of jobs (``-j``, or the number of CPUs if not set) is a
+        global budget shared between the ``cmake --build`` commands running
+        concurrently. Output of each build is captured and displayed in one
+        block when the build is over.
+
+        """
+        num_jobs = kwargs.pop("num_jobs", None)
+        if not num_jobs:
+            num_jobs = self.build_config.num_jobs
+        if not num_jobs:
+            num_jobs = multiprocessing.cpu_count()
+        budget = qisys.parallel.JobBudget(num_jobs)
+        by_name = dict((x.name, x) for x in projects)
+        # projects are sorted, so independent projects are started
+        # in the same order as during a sequential build
+        job_queue = qisys.parallel.DagJobQueue([x.name for x in projects],
+                                               self._get_deps_graph(projects),
+                                               num_workers=project_jobs)
+        lock = threading.Lock()
+        finished = list()
+        ui.info(ui.green, "Building", ui.reset, len(projects), ui.green,
+                "projects,", ui.reset, project_jobs, ui.green,
+                "at a time, using", ui.reset, num_jobs, ui.green, "jobs")
+
+        def build_one(name):
+            project = by_name[name]
+            share = num_jobs / max(1, job_queue.num_running)
+            jobs = budget.acquire(share)
+            with lock:
+                ui.info(ui.green, "Building", ui.blue, project.name,
+                        ui.reset, "(-j%i)" % jobs)
+            output = ""
+            ok = False
+            try:
+                self.pre_build(project)
+                output = project.build(num_jobs=jobs, capture=True, **kwargs)
+                ok = True
+            except qibuild.build.BuildFailed as e:
+                output = e.output
+                raise
+            finally:
+                budget.release(jobs)
+                with lock:
+                    if ok:
+                        ui.info_count(len(finished), len(projects),
+                                      ui.green, "Done building", ui.blue, project.name,
+                                      update_title=True)
+                    else:
+                        ui.error("Failed to build", project.name)
+                    finished.append(name)
+                    if output:
+                        ui.info(output, end="")
+
+        job_queue.run(build_one)
+        if job_queue.failed:
+            (_, error) = job_queue.failed[0]
+            if job_queue.skipped:
+                ui.error("Not built because of previous errors:",
+                         ", ".join(job_queue.skipped))
+            raise error
+
+    def _get_deps_graph(self, projects):
+        """ Helper for configure_parallel and build_parallel:
+        use the same dependencies as the ones used to sort the projects
+
+        """
+        res = dict()
+        for project in projects:
+            project_deps = set()
+            if "build" in self.dep_types:
+                project_deps.update(project.build_depends)
+            if "runtime" in self.dep_types:
+                project_deps.update(project.run_depends)
+            res[project.name] = project_deps
+        return res
+
     @need_configure
     def install(self, dest_dir, *args, **kwargs):
         """ Install the projects and the packages to the dest_dir """
@@ -139,6 +298,9 @@ class CMakeBuilder(AbstractBuilder):
         prefix = prefix[1:]
         real_dest = os.path.join(dest_dir, prefix)
         components = kwargs.get("components")
+        # how to install the files of the packages, see qisys.sh.install
+        install_mode = kwargs.pop("install_mode", "copy")
+        check_contents = kwargs.pop("check_contents", False)
 
         if projects:
             ui.info(ui.green, "the following projects")
@@ -156,12 +318,19 @@ class CMakeBuilder(AbstractBuilder):
 
         if packages:
             ui.info(ui.green, ":: ", "installing packages")
+        stats = qisys.sh.InstallStats()
         for i, package in enumerate(packages):
             ui.info_count(i, len(packages),
                           ui.green, "Installing",
                           ui.blue, package.name)
-            files = package.install(real_dest, components=components)
+            files = package.install(real_dest, components=components,
+                                    mode=install_mode,
+                                    check_contents=check_contents,
+                                    stats=stats,
+                                    num_jobs=multiprocessing.cpu_count())
             installed.extend(files)
+        if packages:
+            ui.info(ui.green, "Packages:", ui.reset, stats)
 
         # Remove qitest.json so that we don't append tests twice
         # when running qibuild install --with-tests twice
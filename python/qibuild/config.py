@@ -7,8 +7,10 @@
 
 """
 
+import contextlib
 import os
 import operator
+import StringIO
 
 
 from qisys import ui
@@ -19,12 +21,39 @@ from qisys.qixml import etree
 
 
 
+# Cache for get_registered_worktrees()
+_REGISTERED_WORKTREES = dict()
+
 def get_global_cfg_path():
     """ Get path to global config file
 
     """
     return qisys.sh.get_config_path("qi", "qibuild.xml")
 
+def get_registered_worktrees(cfg_path=None):
+    """ Get the paths of the worktrees registered in the
+    global config file, without parsing the whole config.
+    The result is cached as long as the file does not change
+
+    """
+    if not cfg_path:
+        cfg_path = get_global_cfg_path()
+    if not os.path.exists(cfg_path):
+        return list()
+    stat = os.stat(cfg_path)
+    signature = (stat.st_mtime, stat.st_size)
+    cached = _REGISTERED_WORKTREES.get(cfg_path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    try:
+        tree = qisys.qixml.read(cfg_path)
+    except Exception:
+        # let QiBuildConfig.read() display a nice error message
+        return list()
+    res = [x.get("path") for x in tree.findall("worktree")]
+    _REGISTERED_WORKTREES[cfg_path] = (signature, res)
+    return res
+
 
 class Env:
     def __init__(self):
@@ -375,6 +404,27 @@ class Config:
             res += "\n"
         return res
 
+@contextlib.contextmanager
+def edit_global_config():
+    """ Lock the global config file and read it, yielding a
+    :py:class:`QiBuildConfig` that is written back at the end of the
+    ``with`` block, so that concurrent qibuild processes do not
+    overwrite each other's changes::
+
+        with qibuild.config.edit_global_config() as qibuild_cfg:
+            qibuild_cfg.add_worktree(path)
+
+    Nothing should be asked to the user inside the block, since the
+    other qibuild processes wait for the lock meanwhile.
+
+    """
+    cfg_path = get_global_cfg_path()
+    with qisys.sh.file_lock(cfg_path):
+        qibuild_cfg = QiBuildConfig()
+        qibuild_cfg.read(cfg_path, create_if_missing=True)
+        yield qibuild_cfg
+        qibuild_cfg.write(cfg_path)
+
 
 class QiBuildConfig:
     """ A class to represent both local and global
@@ -638,7 +688,15 @@ class QiBuildConfig:
             worktree_tree = worktree.tree()
             qibuild_tree.append(worktree_tree)
 
-        qisys.qixml.write(qibuild_tree, xml_path)
+        if not isinstance(xml_path, basestring):
+            # a file object
+            qisys.qixml.write(qibuild_tree, xml_path)
+            return
+        # Several qibuild processes may read this file at the same time,
+        # make sure they never see a half-written file
+        out = StringIO.StringIO()
+        qisys.qixml.write(qibuild_tree, out)
+        qisys.sh.write_file_atomically(out.getvalue(), xml_path)
 
     def __str__(self):
         res = ""
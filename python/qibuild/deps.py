@@ -4,10 +4,25 @@ class DepsSolver(object):
     """ Solve dependencies across projects in a build worktree
     and packages in a toolchain
 
+    The dependency graphs are only computed once for each set of
+    dependency types, and the results are cached in the build worktree,
+    which resets them when a project is added, removed or moved.
+
     """
     def __init__(self, build_worktree):
         self.build_worktree = build_worktree
 
+    @property
+    def _graphs(self):
+        """ frozenset(dep_types) -> (forward, reverse) dicts """
+        return self.build_worktree.deps_cache.setdefault("graphs", dict())
+
+    @property
+    def _sorted_names(self):
+        """ (head names, frozenset(dep_types), reverse) -> sorted names """
+        return self.build_worktree.deps_cache.setdefault("sorted_names",
+                                                         dict())
+
     def get_dep_projects(self, projects, dep_types, reverse=False):
         """ Solve the dependencies of the list of projects
 
@@ -39,7 +54,7 @@ class DepsSolver(object):
         toolchain = self.build_worktree.toolchain
         if not toolchain:
             return list()
-        build_project_names = [x.name for x in self.build_worktree.build_projects]
+        build_project_names = set(x.name for x in self.build_worktree.build_projects)
 
         dep_packages = list()
         for name in sorted_names:
@@ -66,21 +81,32 @@ class DepsSolver(object):
 
     def _get_sorted_names(self, projects, dep_types, reverse=False):
         """ Helper for get_dep_* functions """
-        if reverse:
-            reverse_deps = set()
-            for project in self.build_worktree.build_projects:
-                if "build" in dep_types:
-                    if any(x.name in project.build_depends for x in projects):
-                        reverse_deps.add(project.name)
-                if "runtime" in dep_types:
-                    if any(x.name in project.run_depends for x in projects):
-                        reverse_deps.add(project.name)
-                if "test" in dep_types:
-                    if any(x.name in project.test_depends for x in projects):
-                        reverse_deps.add(project.name)
-            return sorted(list(reverse_deps))
-
-        to_sort = dict()
+        key = (tuple(x.name for x in projects), frozenset(dep_types), reverse)
+        res = self._sorted_names.get(key)
+        if res is None:
+            (forward, backward) = self._get_graphs(dep_types)
+            if reverse:
+                reverse_deps = set()
+                for project in projects:
+                    reverse_deps.update(backward.get(project.name, list()))
+                res = sorted(reverse_deps)
+            else:
+                res = qisys.sort.topological_sort(forward,
+                                                  [x.name for x in projects])
+            self._sorted_names[key] = res
+        return res[:]
+
+    def _get_graphs(self, dep_types):
+        """ Get the dependency graph of the build projects and its reverse,
+        as two dicts ``name -> set of names``
+
+        """
+        key = frozenset(dep_types)
+        res = self._graphs.get(key)
+        if res is not None:
+            return res
+        forward = dict()
+        backward = dict()
         for project in self.build_worktree.build_projects:
             deps = set()
             if "build" in dep_types:
@@ -89,8 +115,12 @@ class DepsSolver(object):
                 deps.update(project.run_depends)
             if "test" in dep_types:
                 deps.update(project.test_depends)
-            to_sort[project.name] = deps
-        return qisys.sort.topological_sort(to_sort, [x.name for x in projects])
+            forward[project.name] = deps
+            for dep in deps:
+                backward.setdefault(dep, set()).add(project.name)
+        res = (forward, backward)
+        self._graphs[key] = res
+        return res
 
 
 def read_deps_from_xml(object, xml_elem):
@@ -223,7 +223,7 @@ class BuildProjectParser(qisys.parsers.AbstractProjectParser):
 
         # WorkTreeProjectParser returns None or a list of one element
         worktree_proj = worktree_projects[0]
-        build_proj = qisys.parsers.find_parent_project(self.build_worktree.build_projects,
+        build_proj = qisys.parsers.find_parent_project(self.build_worktree.path_index,
                                                        worktree_proj.path)
         if not build_proj:
             # step 2: if we can't find, still look for a qiproject.xml not
@@ -199,7 +199,11 @@ set(QIBUILD_PYTHON_PATH "%s" CACHE STRING "" FORCE)
         qisys.sh.write_file_if_different(to_write, dep_cmake)
 
     def configure(self, **kwargs):
-        """ Delegate to :py:func:`qibuild.cmake.cmake` """
+        """ Delegate to :py:func:`qibuild.cmake.cmake`
+
+        :return: the output of cmake when called with ``capture=True``
+
+        """
         qisys.sh.mkdir(self.sdk_directory, recursive=True)
         cmake_args = self.cmake_args
         # only required the first time, afterwards this setting is
@@ -209,14 +213,15 @@ set(QIBUILD_PYTHON_PATH "%s" CACHE STRING "" FORCE)
         cmake_qibuild_dir = qisys.sh.to_posix_path(cmake_qibuild_dir)
         cmake_args.append("-Dqibuild_DIR=%s" % cmake_qibuild_dir)
         try:
-            qibuild.cmake.cmake(self.path, self.build_directory,
-                                cmake_args, env=self.build_env, **kwargs)
+            output = qibuild.cmake.cmake(self.path, self.build_directory,
+                                         cmake_args, env=self.build_env, **kwargs)
         except qisys.command.CommandFailedException as error:
             raise qibuild.build.ConfigureFailed(self, error)
         # Write the qitest.json file:
         tests = self.parse_qitest_cmake()
         with open(self.qitest_json, "w") as fp:
             json.dump(tests, fp, indent=2)
+        return output
 
     def parse_qitest_cmake(self):
         """ The qitest.cmake is written from CMake """
@@ -258,8 +263,17 @@ set(QIBUILD_PYTHON_PATH "%s" CACHE STRING "" FORCE)
         return tests
 
     def build(self, num_jobs=None, rebuild=False, target=None,
-              coverity=False, env=None):
-        """ Build the project """
+              coverity=False, env=None, capture=False):
+        """ Build the project
+
+        :param num_jobs: number of jobs to use. Defaults to the
+                         value set in the build config
+        :param capture: if True, the output of the build is not
+                        displayed but returned as a string. (It is
+                        then available in the ``output`` attribute of
+                        the :py:class:`.BuildFailed` exception)
+
+        """
         timer = ui.timer("make %s" % self.name)
         timer.start()
         build_type = self.build_config.build_type
@@ -281,7 +295,9 @@ set(QIBUILD_PYTHON_PATH "%s" CACHE STRING "" FORCE)
         if rebuild:
             cmd += ["--clean-first"]
         cmd += [ "--" ]
-        cmd += self.parse_num_jobs(self.build_config.num_jobs)
+        if num_jobs is None:
+            num_jobs = self.build_config.num_jobs
+        cmd += self.parse_num_jobs(num_jobs)
 
         if not env:
             build_env = self.build_env.copy()
@@ -294,6 +310,10 @@ set(QIBUILD_PYTHON_PATH "%s" CACHE STRING "" FORCE)
                     build_env["VERBOSE"] = "1"
                 if self.cmake_generator == "Ninja":
                     cmd.append("-v")
+        if capture:
+            output = self._call_captured(cmd, build_env)
+            timer.stop()
+            return output
         try:
             qisys.command.call(cmd, env=build_env)
         except qisys.command.CommandFailedException:
@@ -301,6 +321,17 @@ set(QIBUILD_PYTHON_PATH "%s" CACHE STRING "" FORCE)
 
         timer.stop()
 
+    def _call_captured(self, cmd, env):
+        """ Helper for self.build(capture=True) """
+        cmd[0] = qisys.command.find_program(cmd[0], env=env, raises=True)
+        process = qisys.command.Process(cmd, env=env)
+        process.run()
+        if process.return_type == qisys.command.Process.NOT_RUN:
+            raise qibuild.build.BuildFailed(self, output=str(process.exception))
+        if process.return_type != qisys.command.Process.OK:
+            raise qibuild.build.BuildFailed(self, output=process.out)
+        return process.out
+
     def parse_num_jobs(self, num_jobs, cmake_generator=None):
         """ Convert a number of jobs to a list of cmake args """
         if not cmake_generator:
@@ -325,7 +356,7 @@ set(QIBUILD_PYTHON_PATH "%s" CACHE STRING "" FORCE)
         return list()
 
 
-    def install(self, destdir, prefix="/", components=None, num_jobs=1,
+    def install(self, destdir, prefix="/", components=None, num_jobs=None,
                 split_debug=False):
         """ Install the project
 
@@ -537,8 +568,8 @@ The following tools were not found: {missing}\
     def _add_scm_info(self, package_xml_root):
         worktree = self.build_worktree.worktree
         git_worktreee = qisrc.worktree.GitWorkTree(worktree)
-        git_projects = git_worktreee.git_projects
-        parent_git_project = qisys.parsers.find_parent_project(git_projects, self.path)
+        parent_git_project = qisys.parsers.find_parent_project(git_worktreee.path_index,
+                                                               self.path)
         if not parent_git_project:
             return
         git = qisrc.git.Git(parent_git_project.path)
@@ -1,6 +1,7 @@
 import os
 
 import qisys.sh
+import qisys.envsetter
 import qibuild.build_config
 import qitoolchain.toolchain
 
@@ -103,6 +104,35 @@ def test_build_env(build_worktree):
     assert r"c:\swig" in path
     assert r"c:\mingw\bin" in path
 
+def test_build_env_is_cached(build_worktree, monkeypatch):
+    qibuild_xml = qisys.sh.get_config_path("qi", "qibuild.xml")
+    with open(qibuild_xml, "w") as fp:
+        fp.write(r"""
+<qibuild>
+  <config name="mingw">
+    <env path="c:\mingw\bin" />
+  </config>
+</qibuild>
+""")
+    calls = list()
+    read_config = qisys.envsetter.EnvSetter.read_config
+    def counting_read_config(envsetter, qibuild_cfg):
+        calls.append(qibuild_cfg)
+        read_config(envsetter, qibuild_cfg)
+    monkeypatch.setattr(qisys.envsetter.EnvSetter, "read_config",
+                        counting_read_config)
+    build_config = qibuild.build_config.CMakeBuildConfig(build_worktree)
+    build_env = build_config.build_env
+    build_env["FOO"] = "BAR"
+    assert "FOO" not in build_config.build_env
+    assert len(calls) == 1
+    build_config.set_active_config("mingw")
+    assert r"c:\mingw\bin" in build_config.build_env["PATH"]
+    assert len(calls) == 2
+    monkeypatch.setenv("QIBUILD_TEST_VAR", "1")
+    assert build_config.build_env["QIBUILD_TEST_VAR"] == "1"
+    assert len(calls) == 3
+
 def test_local_cmake(build_worktree, toolchains):
     toolchains.create("foo")
     foo_cmake = os.path.join(build_worktree.root, ".qi", "foo.cmake")
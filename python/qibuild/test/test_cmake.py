@@ -28,3 +28,34 @@ def test_pip_debian_install(tmpdir):
     cmake_dir.ensure("qibuild", "qibuild-config.cmake", file=True)
     res = qibuild.cmake.find_installed_cmake_qibuild_dir(python_dir.strpath)
     assert res == cmake_dir.strpath
+
+def test_read_cmake_cache(tmpdir):
+    cmake_cache = tmpdir.join("CMakeCache.txt")
+    cmake_cache.write("""\
+# This is the CMakeCache file.
+//Path to a program.
+CMAKE_AR:FILEPATH=/usr/bin/ar
+CMAKE_BUILD_TYPE:STRING=Debug
+FOO-BAR_1:BOOL=ON
+EMPTY:STRING=
+//CMAKE_GENERATOR:INTERNAL=not a value
+""")
+    cache = qibuild.cmake.read_cmake_cache(cmake_cache.strpath)
+    assert cache == {
+        "CMAKE_AR" : "/usr/bin/ar",
+        "CMAKE_BUILD_TYPE" : "Debug",
+        "FOO-BAR_1" : "ON",
+        "EMPTY" : "",
+    }
+    assert qibuild.cmake.get_cached_var(tmpdir.strpath, "CMAKE_BUILD_TYPE") == "Debug"
+    assert qibuild.cmake.get_cached_var(tmpdir.strpath, "NOPE", default="x") == "x"
+    # callers can not change the cached values:
+    cache["CMAKE_BUILD_TYPE"] = "Release"
+    assert qibuild.cmake.get_cached_var(tmpdir.strpath, "CMAKE_BUILD_TYPE") == "Debug"
+
+def test_cmake_cache_is_re_read_when_changed(tmpdir):
+    cmake_cache = tmpdir.join("CMakeCache.txt")
+    cmake_cache.write("CMAKE_BUILD_TYPE:STRING=Debug\n")
+    assert qibuild.cmake.get_cached_var(tmpdir.strpath, "CMAKE_BUILD_TYPE") == "Debug"
+    cmake_cache.write("CMAKE_BUILD_TYPE:STRING=Release\n")
+    assert qibuild.cmake.get_cached_var(tmpdir.strpath, "CMAKE_BUILD_TYPE") == "Release"
@@ -7,6 +7,8 @@
 """
 
 import os
+import threading
+import time
 import unittest
 from StringIO import StringIO
 
@@ -500,3 +502,22 @@ def test_do_not_leak_default_config(tmpdir):
     assert qibuild_cfg.env.path is None
     assert qibuild_cfg.env.bat_file is None
     assert qibuild_cfg.ide is None
+
+def test_edit_global_config_is_locked():
+    started = threading.Event()
+    def add_foo():
+        with qibuild.config.edit_global_config() as qibuild_cfg:
+            started.set()
+            time.sleep(0.5)
+            qibuild_cfg.add_worktree("/path/to/foo")
+    thread = threading.Thread(target=add_foo)
+    thread.start()
+    started.wait()
+    # waits for the first edit to be written, so it is not lost:
+    with qibuild.config.edit_global_config() as qibuild_cfg:
+        qibuild_cfg.set_server_access("gerrit", "john")
+    thread.join()
+    qibuild_cfg = qibuild.config.QiBuildConfig()
+    qibuild_cfg.read()
+    assert qibuild_cfg.worktrees.keys() == ["/path/to/foo"]
+    assert qibuild_cfg.get_server_access("gerrit").username == "john"
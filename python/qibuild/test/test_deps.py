@@ -105,3 +105,35 @@ def test_complex_reverse_deps(build_worktree):
 
     assert deps_solver.get_dep_projects([libworld], ["build", "runtime"],
         reverse=True) == [hello, libhello]
+
+def test_results_are_cached(build_worktree):
+    world = build_worktree.create_project("world")
+    hello = build_worktree.create_project("hello", build_depends=["world"])
+    deps_solver = DepsSolver(build_worktree)
+    res = deps_solver.get_dep_projects([hello], ["build"])
+    assert res == [world, hello]
+    # callers may modify the list they get:
+    res.pop()
+    assert deps_solver.get_dep_projects([hello], ["build"]) == [world, hello]
+    # ordering of dep types does not matter:
+    assert deps_solver._get_sorted_names([hello], ["runtime", "build"]) == \
+           deps_solver._get_sorted_names([hello], ["build", "runtime"])
+
+def test_cache_cleared_when_worktree_changes(build_worktree):
+    world = build_worktree.create_project("world")
+    deps_solver = DepsSolver(build_worktree)
+    assert deps_solver.get_dep_projects([world], ["build"], reverse=True) == []
+    hello = build_worktree.create_project("hello", build_depends=["world"])
+    assert deps_solver.get_dep_projects([world], ["build"], reverse=True) == \
+        [hello]
+    assert deps_solver.get_dep_projects([hello], ["build"]) == [world, hello]
+    build_worktree.worktree.remove_project("hello")
+    assert deps_solver.get_dep_projects([world], ["build"], reverse=True) == []
+
+def test_solvers_are_not_registered(build_worktree):
+    world = build_worktree.create_project("world")
+    num_observers = len(build_worktree.worktree._observers)
+    for _ in range(3):
+        deps_solver = DepsSolver(build_worktree)
+        deps_solver.get_dep_projects([world], ["build"])
+    assert len(build_worktree.worktree._observers) == num_observers
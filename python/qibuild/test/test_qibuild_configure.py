@@ -176,3 +176,25 @@ def test_using_dash_s_with_path_conf(qibuild_action):
     qibuild_action("configure", "-s", "usepath")
     path_conf_after = read_path_conf(stagepath_proj)
     assert path_conf_before == path_conf_after
+
+def test_configure_several_projects_at_once(qibuild_action):
+    qibuild_action.add_test_project("world")
+    hello_proj = qibuild_action.add_test_project("hello")
+    qibuild_action("configure", "hello", "--project-jobs", "2")
+    assert os.path.exists(hello_proj.cmake_cache)
+    qibuild_action("make", "hello")
+
+def test_configure_several_projects_failure(qibuild_action):
+    world_proj = qibuild_action.add_test_project("world")
+    qibuild_action.add_test_project("hello")
+    qibuild_action.create_project("other")
+    with open(os.path.join(world_proj.path, "CMakeLists.txt"), "a") as fp:
+        fp.write("message(FATAL_ERROR \"world is broken\")\n")
+    # pylint: disable-msg=E1101
+    with pytest.raises(qibuild.build.ConfigureFailed) as e:
+        qibuild_action("configure", "--all", "--project-jobs", "2")
+    assert e.value.project.name == "world"
+    assert "world is broken" in e.value.exception.stdout
+    # projects that do not depend on world are still configured:
+    other_proj = qibuild_action.build_worktree.get_build_project("other")
+    assert os.path.exists(other_proj.cmake_cache)
@@ -1,5 +1,19 @@
+import qibuild.actions.depends
+
 def test_simple(qibuild_action, record_messages):
     # More complex tests should be written at a lower level
     qibuild_action.create_project("world")
     qibuild_action.create_project("hello", build_depends=["world"])
     qibuild_action("depends", "hello")
+
+def test_reverse_in_build_order(build_worktree):
+    world = build_worktree.create_project("world")
+    build_worktree.create_project("zhello", src="a/hello",
+                                  build_depends=["world"])
+    build_worktree.create_project("abye", src="b/bye",
+                                  build_depends=["world"])
+    deps = qibuild.actions.depends.get_deps(build_worktree, world,
+                                            True, False, True)
+    assert [x.to_name for x in deps] == \
+           [x.name for x in build_worktree.build_projects if x.name != "world"]
+    assert [x.to_name for x in deps] == ["zhello", "abye"]
@@ -5,3 +5,11 @@ def test_simple(qibuild_action, record_messages):
     qibuild_action("foreach", "--", "python", "--version")
     assert record_messages.find("nested")
     assert record_messages.find("nested/foo")
+
+def test_parallel(qibuild_action, record_messages):
+    qibuild_action.add_test_project("world")
+    qibuild_action.add_test_project("hello")
+    qibuild_action("foreach", "-j", "2", "--interleave",
+                   "--", "python", "--version")
+    assert record_messages.find(r"\[world\] Python")
+    assert record_messages.find(r"\[hello\] Python")
@@ -45,6 +45,30 @@ def test_running_from_install_dir_dep_in_toolchain(cd_to_tmpdir):
     qisys.command.call([hello])
 
 
+def test_packages_installed_only_once(cd_to_tmpdir, record_messages):
+    qibuild_action = QiBuildAction()
+    qitoolchain_action = QiToolchainAction()
+    build_worktree = qibuild_action.build_worktree
+    qibuild_action.add_test_project("world")
+    qibuild_action.add_test_project("hello")
+    world_package = qibuild_action("package", "world")
+    qitoolchain_action("create", "foo")
+    qitoolchain_action("add-package", "-c", "foo", world_package)
+    build_worktree.worktree.remove_project("world", from_disk=True)
+    qibuild_action("configure", "-c", "foo", "hello")
+    qibuild_action("make", "-c", "foo", "hello")
+    prefix = cd_to_tmpdir.mkdir("prefix")
+    qibuild_action("install", "-c", "foo", "hello", prefix.strpath,
+                   "--install-mode", "hardlink")
+    assert record_messages.find(r"Packages: \d+ files installed .*, 0 files up to date")
+    record_messages.reset()
+    qibuild_action("install", "-c", "foo", "hello", prefix.strpath)
+    assert record_messages.find(r"Packages: 0 files installed .*, \d+ files up to date")
+    record_messages.reset()
+    qibuild_action("install", "-c", "foo", "hello", prefix.strpath,
+                   "--check-contents")
+    assert record_messages.find(r"Packages: 0 files installed .*, \d+ files up to date")
+
 def test_devel_components_installed_by_default(qibuild_action, tmpdir):
     qibuild_action.add_test_project("world")
     qibuild_action.add_test_project("hello")
@@ -1,6 +1,7 @@
 import os
 
 import qisys.command
+import qibuild.build
 import qibuild.find
 
 import pytest
@@ -33,3 +34,24 @@ def test_running_from_build_dir_incremental(qibuild_action):
     qibuild_action("make", "hello")
     hello = qibuild.find.find_bin([hello_proj.sdk_directory], "hello")
     qisys.command.call([hello])
+
+def test_make_several_projects_at_once(qibuild_action):
+    qibuild_action.add_test_project("world")
+    hello_proj = qibuild_action.add_test_project("hello")
+    qibuild_action("configure", "hello")
+    qibuild_action("make", "hello", "--project-jobs", "2", "-j", "2")
+    hello = qibuild.find.find_bin([hello_proj.sdk_directory], "hello")
+    qisys.command.call([hello])
+
+def test_make_several_projects_failure(qibuild_action):
+    qibuild_action.add_test_project("world")
+    qibuild_action.add_test_project("hello")
+    qibuild_action("configure", "hello")
+    world_proj = qibuild_action.build_worktree.get_build_project("world")
+    with open(os.path.join(world_proj.path, "world", "world.cpp"), "a") as fp:
+        fp.write("this is not c++\n")
+    # pylint: disable-msg=E1101
+    with pytest.raises(qibuild.build.BuildFailed) as e:
+        qibuild_action("make", "hello", "--project-jobs", "2")
+    assert e.value.project.name == "world"
+    assert "error" in e.value.output
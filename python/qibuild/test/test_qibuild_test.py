@@ -5,6 +5,7 @@ import xml.etree.ElementTree as etree
 
 import qisys.worktree
 import qibuild.worktree
+import qitest.durations
 
 def test_various_outcomes(qibuild_action, record_messages):
     qibuild_action.add_test_project("testme")
@@ -83,3 +84,31 @@ def test_do_not_overwrite_xml_when_test_fails(qibuild_action):
     with open(fake_xml, "r") as fp:
         contents = fp.read()
     assert contents == "<gtest>FAKE_RESULTS</gtest>\n"
+
+def test_durations_are_saved(qibuild_action, record_messages):
+    testme = qibuild_action.add_test_project("testme")
+    qibuild_action("configure", "testme")
+    qibuild_action("make", "testme")
+    qibuild_action("test", "testme", "-k", "ok", "-k", "fail", retcode=True)
+    durations_json = os.path.join(testme.sdk_directory, "qitest-durations.json")
+    durations = qitest.durations.TestDurations(durations_json)
+    assert sorted(durations.durations.keys()) == ["fail", "ok"]
+    record_messages.reset()
+    qibuild_action("test", "testme", "-k", "ok", "-j", "2")
+    assert record_messages.find(r"Ran 1 tests in \d+s \(expected: \d+s\)")
+
+def test_output_tail_and_log(qibuild_action, record_messages):
+    qibuild_action.add_test_project("testme")
+    qibuild_action("configure", "testme")
+    qibuild_action("make", "testme")
+    rc = qibuild_action("test", "testme", "-k", "spam",
+                        "--output-tail", "100", "--log-output", retcode=True)
+    assert rc == 1
+    result_dir = get_result_dir()
+    spam_log = os.path.join(result_dir, "spam.log")
+    with open(spam_log, "r") as fp:
+        assert fp.read().count("spamming like a madman") == 1000
+    assert record_messages.find(r"\[\.\.\. \d+ bytes skipped, see .*spam.log")
+    tree = etree.parse(os.path.join(result_dir, "spam.xml"))
+    failure = tree.find("testsuite/testcase/failure")
+    assert failure.text.count("spamming like a madman") <= 5
@@ -1,3 +1,6 @@
+import qibuild.test_runner
+import qitest.durations
+import qitest.result
 from qibuild.test_runner import get_cpu_list
 
 def test_get_cpu_list():
@@ -23,3 +26,52 @@ def test_get_cpu_list():
     assert worker_1_opts == [0, 1, 2]
     assert worker_2_opts == [3, 4, 5]
     assert worker_3_opts == [6, 7, 0]
+
+def test_parse_gtest_list():
+    output = """\
+FooTest.
+  test_one
+  test_two
+TypedTest/0.  # TypeParam = int
+  test_three
+Instance/ParamTest.
+  test_four/0  # GetParam() = 42
+"""
+    assert qibuild.test_runner.parse_gtest_list(output) == [
+        "FooTest.test_one", "FooTest.test_two",
+        "TypedTest/0.test_three",
+        "Instance/ParamTest.test_four/0",
+    ]
+
+def test_split_gtest():
+    test = {"name" : "foo_test", "cmd" : ["foo_test"], "gtest" : True}
+    cases = ["A.one", "A.two", "A.three", "B.one", "C.one", "C.two"]
+    parts = qibuild.test_runner.split_gtest(test, cases, 3)
+    assert [x["name"] for x in parts] == ["foo_test#1", "foo_test#2", "foo_test#3"]
+    assert [x["gtest_filter"] for x in parts] == \
+        ["A.one:A.two", "A.three:B.*", "C.*"]
+    assert all(x["gtest_part_of"] == "foo_test" for x in parts)
+    # more parts than test cases:
+    parts = qibuild.test_runner.split_gtest(test, cases[:2], 4)
+    assert [x["gtest_filter"] for x in parts] == ["A.one", "A.two"]
+
+def test_merge_interrupted_gtest():
+    test = {"name" : "foo_test", "cmd" : ["foo_test"], "gtest" : True}
+    parts = qibuild.test_runner.split_gtest(test, ["A.one", "B.one"], 2)
+    first = qitest.result.TestResult(parts[0])
+    first.ok = True
+    first.time = 2
+    # the second part did not run:
+    res = qibuild.test_runner.merge_gtest_results(test, [first], num_parts=2)
+    assert res.ok is None
+    assert res.time is None
+    durations = qitest.durations.TestDurations("nonexisting.json")
+    durations.update({"foo_test" : res})
+    assert durations.durations == dict()
+    second = qitest.result.TestResult(parts[1])
+    second.ok = True
+    second.time = 3
+    res = qibuild.test_runner.merge_gtest_results(test, [first, second],
+                                                  num_parts=2)
+    assert res.ok is True
+    assert res.time == 5
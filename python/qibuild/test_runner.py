@@ -1,3 +1,5 @@
+import collections
+import copy
 import datetime
 import multiprocessing
 import os
@@ -9,6 +11,8 @@ from qisys import ui
 from qisys.qixml import etree
 import qisys.command
 import qitest.conf
+import qitest.junit
+import qitest.result
 import qitest.runner
 
 
@@ -22,6 +26,14 @@ class ProjectTestRunner(qitest.runner.TestSuiteRunner):
         self._coverage = False
         self._valgrind = False
         self._num_cpus = -1
+        # only the end of the output of each test is kept in memory
+        self.output_tail = 16384
+        # whether to write the whole output of each test in test_results_dir
+        self.log_output = False
+        # split each gtest binary in at most gtest_split jobs
+        self.gtest_split = 1
+        # name -> test, for the tests that are split
+        self._split_tests = dict()
         tests = project.tests
 
     @property
@@ -29,6 +41,73 @@ class ProjectTestRunner(qitest.runner.TestSuiteRunner):
         """ Implements TestSuiteRunner.launcher """
         return ProcessTestLauncher(self)
 
+    def get_jobs(self, tests):
+        """ Implements :py:meth:`.TestSuiteRunner.get_jobs`
+
+        When ``gtest_split`` is greater than one, each gtest binary is run
+        several times at once, each time with a ``--gtest_filter`` matching
+        a part of its test cases.
+
+        """
+        if self.gtest_split <= 1:
+            return tests
+        self._split_tests = dict()
+        res = list()
+        launcher = self.launcher
+        for test in tests:
+            cases = None
+            if test.get("gtest") and not test.get("perf"):
+                cases = launcher.list_gtest_cases(test)
+            if not cases or len(cases) < 2:
+                res.append(test)
+                continue
+            self._split_tests[test["name"]] = test
+            res.extend(split_gtest(test, cases, self.gtest_split))
+        return res
+
+    def on_jobs_done(self, jobs, results):
+        """ Implements :py:meth:`.TestSuiteRunner.on_jobs_done`
+
+        Merge the results and the XML files of the parts of each
+        gtest binary
+
+        """
+        parts = collections.OrderedDict()
+        for job in jobs:
+            gtest_name = job.get("gtest_part_of")
+            if gtest_name:
+                parts.setdefault(gtest_name, list()).append(job["name"])
+        if not parts:
+            return results
+        merged_results = collections.OrderedDict()
+        for name, result in results.iteritems():
+            gtest_name = result.test.get("gtest_part_of")
+            if not gtest_name:
+                merged_results[name] = result
+            elif gtest_name not in merged_results:
+                part_results = [results[x] for x in parts[gtest_name]
+                                if x in results]
+                merged_results[gtest_name] = merge_gtest_results(
+                    self._split_tests[gtest_name], part_results,
+                    num_parts=len(parts[gtest_name]))
+        self._merge_gtest_xmls(parts)
+        return merged_results
+
+    def _merge_gtest_xmls(self, parts):
+        """ Merge the XML files written by the parts of each gtest binary """
+        for gtest_name, part_names in parts.iteritems():
+            part_xmls = [os.path.join(self.test_results_dir, x + ".xml")
+                         for x in part_names]
+            part_xmls = [x for x in part_xmls if os.path.exists(x)]
+            if not part_xmls:
+                continue
+            merged = qitest.junit.MergedResults()
+            for part_xml in part_xmls:
+                merged.add_xml(part_xml)
+            merged.write(os.path.join(self.test_results_dir, gtest_name + ".xml"))
+            for part_xml in part_xmls:
+                qisys.sh.rm(part_xml)
+
     @property
     def test_results_dir(self):
         return self._test_results_dir
@@ -100,6 +179,7 @@ class ProcessTestLauncher(qitest.runner.TestLauncher):
         self.valgrind_log = None
         self.perf_out = None
         self.test_out = None
+        self.test_log = None
 
     def launch(self, test):
         """ Implements :py:func:`qitest.runner.TestLauncher.launch`
@@ -113,6 +193,10 @@ class ProcessTestLauncher(qitest.runner.TestLauncher):
                                      test["name"] + ".xml")
         self.test_out = os.path.join(self.suite_runner.test_results_dir,
                                      test["name"] + ".xml")
+        self.test_log = None
+        if self.suite_runner.log_output:
+            self.test_log = os.path.join(self.suite_runner.test_results_dir,
+                                         test["name"] + ".log")
         res = qitest.result.TestResult(test)
         self._update_test(test)
         cmd = test["cmd"]
@@ -120,12 +204,21 @@ class ProcessTestLauncher(qitest.runner.TestLauncher):
         env = test["env"]
         cwd = test["working_directory"]
         process = qisys.command.Process(cmd, cwd=cwd, env=env)
+        process.max_out_size = self.suite_runner.output_tail
+        process.out_log = self.test_log
         start = datetime.datetime.now()
         process.run(timeout)
         end = datetime.datetime.now()
         delta = end - start
 
         res.time = float(delta.microseconds) / 10 ** 6 + delta.seconds
+        skipped = process.out_size - len(process.out)
+        if skipped:
+            header = "[... %i bytes skipped" % skipped
+            if self.test_log:
+                header += ", see %s" % self.test_log
+            header += " ...]\n"
+            process.out = header + process.out
         res.out = process.out
         # Sometimes the process did not have any output,
         # but we still want to let the user know it ran
@@ -149,6 +242,26 @@ class ProcessTestLauncher(qitest.runner.TestLauncher):
         self._post_run(process, res, test)
         return res
 
+    def list_gtest_cases(self, test):
+        """ Get the full names of the test cases of a gtest binary,
+        using ``--gtest_list_tests``
+
+        :returns: None if the test cases could not be listed
+
+        """
+        test = copy.deepcopy(test)
+        self._update_test_executable(test)
+        self._update_test_env(test)
+        self._update_test_cwd(test)
+        cmd = test["cmd"] + ["--gtest_list_tests"]
+        process = qisys.command.Process(cmd, cwd=test["working_directory"],
+                                        env=test["env"])
+        process.run(test["timeout"])
+        if process.return_type != qisys.command.Process.OK:
+            ui.debug("Could not list test cases of", test["name"])
+            return None
+        return parse_gtest_list(process.out)
+
     def _update_test(self, test):
         """ Update the test given the settings on the test suite """
         self._update_test_cmd_for_project(test)
@@ -171,6 +284,9 @@ class ProcessTestLauncher(qitest.runner.TestLauncher):
         if test.get("gtest"):
             cmd = test["cmd"]
             cmd.append("--gtest_output=xml:%s" % self.test_out)
+            gtest_filter = test.get("gtest_filter")
+            if gtest_filter:
+                cmd.append("--gtest_filter=%s" % gtest_filter)
         if test.get("perf"):
             cmd = test["cmd"]
             cmd.extend(["--output", self.perf_out])
@@ -254,8 +370,8 @@ class ProcessTestLauncher(qitest.runner.TestLauncher):
 
     def _write_xml(self, res, test, out_xml):
         """ Make sure a Junit XML compatible file is written """
-        # Arbitrary limit output (~700 lines) to prevent from crashing on read
-        res.out = res.out[-16384:]
+        # The output was already limited to the output_tail last bytes,
+        # (~700 lines by default) to prevent from crashing on read
         res.out = re.sub('\x1b[^m]*m', "", res.out)
 
         message_as_string = " ".join(str(x) for x in res.message
@@ -325,6 +441,101 @@ class ProcessTestLauncher(qitest.runner.TestLauncher):
                 return qisys.command.str_from_signal(-retcode)
 
 
+def parse_gtest_list(output):
+    """ Parse the output of ``--gtest_list_tests``, returning
+    a list of full test names, like ``['Suite.Case', ...]``
+
+    """
+    res = list()
+    suite = None
+    for line in output.splitlines():
+        # remove comments such as '# GetParam() = 42'
+        line = line.split("#")[0].rstrip()
+        if not line.strip():
+            continue
+        if not line.startswith(" "):
+            suite = line.strip()
+        elif suite:
+            res.append(suite + line.strip())
+    return res
+
+def split_gtest(test, cases, num_parts):
+    """ Split a gtest test in at most ``num_parts`` tests, each one
+    running a contiguous part of the test cases, so that test suites
+    are split as little as possible
+
+    """
+    num_parts = min(num_parts, len(cases))
+    part_size = (len(cases) + num_parts - 1) / num_parts
+    chunks = [cases[i:i + part_size] for i in range(0, len(cases), part_size)]
+    res = list()
+    for i, chunk in enumerate(chunks):
+        part = copy.deepcopy(test)
+        part["name"] = "%s#%i" % (test["name"], i + 1)
+        part["gtest_part_of"] = test["name"]
+        part["gtest_filter"] = get_gtest_filter(chunk, cases)
+        res.append(part)
+    return res
+
+def merge_gtest_results(test, part_results, num_parts=None):
+    """ Merge the results of the parts of a gtest binary in one
+    :py:class:`qitest.result.TestResult` for the whole binary
+
+    :param num_parts: the number of parts the binary was split in.
+                      When some of them did not run (because the tests
+                      were interrupted), the result has no ``time``
+
+    """
+    res = qitest.result.TestResult(test)
+    res.out = "".join(getattr(x, "out", "") for x in part_results)
+    if num_parts is not None and len(part_results) < num_parts:
+        res.time = None
+        res.ok = None
+        res.message = (ui.brown, "interrupted")
+        return res
+    res.time = sum(x.time for x in part_results)
+    failures = [x for x in part_results if x.ok is False]
+    if failures:
+        res.ok = False
+        message = [ui.red]
+        for failure in failures:
+            message.append("\n  %s:" % failure.test["name"])
+            message.extend(x for x in failure.message if isinstance(x, basestring))
+        res.message = tuple(message)
+    elif any(x.ok is None for x in part_results):
+        res.ok = None
+        res.message = (ui.brown, "interrupted")
+    else:
+        res.ok = True
+        res.message = (ui.green, "[OK]")
+    return res
+
+def get_gtest_filter(chunk, cases):
+    """ Get a gtest filter matching the given test cases, using
+    'Suite.*' when every test case of a suite is in the chunk
+
+    """
+    def get_suite(name):
+        return name.split(".")[0]
+    num_cases = dict()
+    for name in cases:
+        suite = get_suite(name)
+        num_cases[suite] = num_cases.get(suite, 0) + 1
+    num_in_chunk = dict()
+    for name in chunk:
+        suite = get_suite(name)
+        num_in_chunk[suite] = num_in_chunk.get(suite, 0) + 1
+    patterns = list()
+    for name in chunk:
+        suite = get_suite(name)
+        if num_in_chunk[suite] == num_cases[suite]:
+            pattern = suite + ".*"
+        else:
+            pattern = name
+        if not patterns or patterns[-1] != pattern:
+            patterns.append(pattern)
+    return ":".join(patterns)
+
 def get_cpu_list(total_cpus, num_cpus_per_test, worker_index):
     cpu_list = list()
     i = worker_index * num_cpus_per_test
@@ -33,7 +33,6 @@ def guess_cmake(qibuild_cfg):
     # Add path to CMake in build env
     cmake_path = os.path.dirname(cmake)
     qibuild_cfg.add_to_default_path(cmake_path)
-    qibuild_cfg.write()
     return cmake
 
 def ask_cmake_generator():
@@ -215,7 +214,11 @@ def run_config_wizard(build_worktree=None):
     if ide:
         configure_ide(qibuild_cfg, ide)
 
-    qibuild_cfg.write()
+    # Only change the settings handled by the wizard, the others
+    # may have been changed by an other process meanwhile
+    with qibuild.config.edit_global_config() as global_cfg:
+        global_cfg.defaults = qibuild_cfg.defaults
+        global_cfg.ides = qibuild_cfg.ides
 
     if build_worktree:
         configure_local_settings(build_worktree)
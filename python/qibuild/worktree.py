@@ -19,6 +19,8 @@ class BuildWorkTree(qisys.worktree.WorkTreeObserver):
         self.root = self.worktree.root
         self.build_config = qibuild.build_config.CMakeBuildConfig(self)
         self.build_projects = list()
+        self._projects_by_name = dict()
+        self._path_index = None
         self._load_build_projects()
         worktree.register(self)
 
@@ -52,11 +54,18 @@ class BuildWorkTree(qisys.worktree.WorkTreeObserver):
         """ The default config to use """
         return self.build_config.default_config
 
+    @property
+    def path_index(self):
+        """ A :py:class:`qisys.worktree.PathIndex` of the build projects """
+        if self._path_index is None:
+            self._path_index = qisys.worktree.PathIndex(self.build_projects)
+        return self._path_index
+
     def get_build_project(self, name, raises=True):
         """ Get a :py:class:`.BuildProject` given its name """
-        for build_project in self.build_projects:
-            if build_project.name == name:
-                return build_project
+        build_project = self._projects_by_name.get(name)
+        if build_project is not None:
+            return build_project
         if raises:
             mess = ui.did_you_mean("No such qibuild project: %s" % name,
                                    name, [x.name for x in self.build_projects])
@@ -79,11 +88,17 @@ class BuildWorkTree(qisys.worktree.WorkTreeObserver):
 
         """
         self.build_projects = list()
+        self._projects_by_name = dict()
+        self._path_index = None
+        # results of qibuild.deps.DepsSolver, only valid until the
+        # projects change
+        self.deps_cache = dict()
         for wt_project in self.worktree.projects:
             build_project = new_build_project(self, wt_project)
             if build_project:
                 self.check_unique_name(build_project)
                 self.build_projects.append(build_project)
+                self._projects_by_name[build_project.name] = build_project
 
     def configure_build_profile(self, name, flags):
         """ Configure a build profile for the worktree """
@@ -113,9 +128,9 @@ class BuildWorkTree(qisys.worktree.WorkTreeObserver):
         self.build_config.set_active_config(active_config)
 
     def check_unique_name(self, new_project):
-        for project in self.build_projects:
-            if project.name == new_project.name:
-                raise Exception("""\
+        project = self._projects_by_name.get(new_project.name)
+        if project is not None:
+            raise Exception("""\
 Found two projects with the same name ({project.name})
 In:
 * {project.path}
@@ -132,7 +147,7 @@ def new_build_project(build_worktree, project):
     """
     if not os.path.exists(project.qiproject_xml):
         return None
-    tree = qisys.qixml.read(project.qiproject_xml)
+    tree = project.worktree.read_qiproject_xml(project.qiproject_xml)
     root = tree.getroot()
     if root.get("version") == "3":
         qibuild_elem = root.find("qibuild")
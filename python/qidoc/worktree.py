@@ -16,16 +16,19 @@ class DocWorkTree(qisys.worktree.WorkTreeObserver):
         self.worktree = worktree
         self.root = worktree.root
         self.doc_projects = list()
+        self._projects_by_name = dict()
         self._load_doc_projects()
         worktree.register(self)
 
     def _load_doc_projects(self):
         self.doc_projects = list()
+        self._projects_by_name = dict()
         for worktree_project in self.worktree.projects:
             doc_project = new_doc_project(self, worktree_project)
             if doc_project:
                 if not isinstance(doc_project, TemplateProject):
                     self.check_unique_name(doc_project)
+                    self._projects_by_name[doc_project.name] = doc_project
                 self.doc_projects.append(doc_project)
 
     @property
@@ -53,11 +56,9 @@ class DocWorkTree(qisys.worktree.WorkTreeObserver):
         self._load_doc_projects()
 
     def get_doc_project(self, name, raises=False):
-        for project in self.doc_projects:
-            if isinstance(project, TemplateProject):
-                continue
-            if project.name == name:
-                return project
+        project = self._projects_by_name.get(name)
+        if project is not None:
+            return project
         if raises:
             mess = ui.did_you_mean("No such qidoc project: %s\n" % name,
                                    name, [x.name for x in self.doc_projects])
@@ -91,7 +92,7 @@ def new_doc_project(doc_worktree, project):
     qiproject_xml = project.qiproject_xml
     if not os.path.exists(qiproject_xml):
         return None
-    tree = qisys.qixml.read(project.qiproject_xml)
+    tree = project.worktree.read_qiproject_xml(project.qiproject_xml)
     root = tree.getroot()
     if root.get("version") == "3":
         return _new_doc_project_3(doc_worktree, project)
@@ -102,7 +103,7 @@ def new_template_project(doc_worktree, project):
     qiproject_xml = project.qiproject_xml
     if not os.path.exists(qiproject_xml):
         return None
-    tree = qisys.qixml.read(project.qiproject_xml)
+    tree = project.worktree.read_qiproject_xml(project.qiproject_xml)
     root = tree.getroot()
     if root.get("version") == "3":
         return
@@ -110,7 +111,7 @@ def new_template_project(doc_worktree, project):
 
 def _new_doc_project_3(doc_worktree, project):
     qiproject_xml = project.qiproject_xml
-    tree = qisys.qixml.read(qiproject_xml)
+    tree = project.worktree.read_qiproject_xml(qiproject_xml)
     root = tree.getroot()
     qidoc_elem = root.find("qidoc")
     if qidoc_elem is None:
@@ -131,7 +132,7 @@ def _new_doc_project_2(doc_worktree, project):
     # the 'src' attributes of 'spinxdoc' and 'doxygen' tags
     # in qisys.WorkTree ...
     qiproject_xml = project.qiproject_xml
-    tree = qisys.qixml.read(qiproject_xml)
+    tree = project.worktree.read_qiproject_xml(qiproject_xml)
     root = tree.getroot()
 
     if qisys.qixml.parse_bool_attr(root, "template_repo"):
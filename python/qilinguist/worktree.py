@@ -62,7 +62,7 @@ In:
 def new_linguist_project(linguist_worktree, project):
     if not os.path.exists(project.qiproject_xml):
         return None
-    tree = qisys.qixml.read(project.qiproject_xml)
+    tree = project.worktree.read_qiproject_xml(project.qiproject_xml)
     root = tree.getroot()
     if root.get("version") != "3":
         return None
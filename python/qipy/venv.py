@@ -79,9 +79,9 @@ def handle_extensions(venv_path, python_worktree, build_worktree):
 
     """
     extensions_projects = list()
-    build_projects = build_worktree.build_projects
+    path_index = build_worktree.path_index
     for project in python_worktree.python_projects:
-        parent_project = qisys.parsers.find_parent_project(build_projects,
+        parent_project = qisys.parsers.find_parent_project(path_index,
                                                            project.path)
         if parent_project:
             extensions_projects.append(parent_project)
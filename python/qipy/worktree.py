@@ -92,7 +92,7 @@ Found two projects with the same name. (%s)
 
 def new_python_project(worktree, project):
     qiproject_xml = project.qiproject_xml
-    tree = qisys.qixml.read(qiproject_xml)
+    tree = project.worktree.read_qiproject_xml(qiproject_xml)
     qipython_elem = tree.find("qipython")
     if qipython_elem is None:
         return
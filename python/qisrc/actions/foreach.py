@@ -24,7 +24,13 @@ def configure_parser(parser):
     parser.add_argument("command", metavar="COMMAND", nargs="+")
     parser.add_argument("-c", "--ignore-errors", "--continue",
         action="store_true", help="continue on error")
-    parser.set_defaults(git_only=True)
+    parser.add_argument("-j", "--jobs", dest="num_jobs", type=int,
+                        help="Number of projects on which the command runs "
+                             "at the same time")
+    parser.add_argument("--interleave", action="store_true",
+                        help="When using -j, display the output as it comes, "
+                             "prefixed by the project name")
+    parser.set_defaults(git_only=True, num_jobs=1)
 
 def do(args):
     """Main entry point"""
@@ -36,4 +42,6 @@ def do(args):
         projects = worktree.projects
 
     qisys.actions.foreach(projects, args.command,
-                          ignore_errors=args.ignore_errors)
+                          ignore_errors=args.ignore_errors,
+                          num_jobs=args.num_jobs,
+                          interleave=args.interleave)
@@ -12,18 +12,32 @@ Options are the same as in git grep, e.g.:
 
 import os
 import sys
+import multiprocessing
+import subprocess
+import threading
+import Queue
 
 from qisys import ui
+import qisys.command
 import qisrc.git
 import qisrc.parsers
 import qibuild.parsers
 
+# Maximum number of lines kept in memory for each project
+# waiting to be displayed
+MAX_BUFFERED_LINES = 10000
+
 def configure_parser(parser):
     """Configure parser for this action."""
     qisrc.parsers.worktree_parser(parser)
     qibuild.parsers.project_parser(parser, positional=False)
     parser.add_argument("--path", help="type of patch to print",
             default="project", choices=['none', 'absolute', 'worktree', 'project'])
+    parser.add_argument("-j", "--jobs", dest="num_jobs", type=int,
+                        help="Number of git grep to run at the same time. "
+                        "Defaults to the number of CPUs")
+    parser.add_argument("--first", action="store_true",
+                        help="Stop after the first project containing a match")
     parser.add_argument("git_grep_opts", metavar="-- git grep options", nargs="*",
                         help="git grep options preceded with -- to escape the leading '-'")
     parser.add_argument("pattern", metavar="PATTERN",
@@ -51,27 +65,148 @@ def do(args):
         sys.exit(0)
 
     max_src = max(len(x.src) for x in git_projects)
+    jobs = [GrepJob(x, git_grep_opts, args.path) for x in git_projects]
+    num_jobs = args.num_jobs or multiprocessing.cpu_count()
+    stop_event = threading.Event()
+    todo = Queue.Queue()
+    for job in jobs:
+        todo.put(job)
+    for i in range(min(num_jobs, len(jobs))):
+        worker = threading.Thread(target=_worker_loop,
+                                  args=(todo, stop_event),
+                                  name="GrepWorker#%i" % i)
+        worker.daemon = True
+        worker.start()
+
     retcode = 1
-    for i, project in enumerate(git_projects):
-        ui.info_count(i, len(git_projects),
-                      ui.green, "Looking in",
-                      ui.blue, project.src.ljust(max_src),
-                      end="\r")
-        git = qisrc.git.Git(project.path)
-        (status, out) = git.call("grep", *git_grep_opts, raises=False)
-        if out != "":
-            if args.path == 'absolute' or args.path == 'worktree':
-                lines = out.splitlines()
-                out_lines = list()
-                for line in lines:
-                    line_split = line.split('\0')
-                    prepend = project.src if args.path == 'worktree' else project.path
-                    line_split[0] = os.path.join(prepend, line_split[0])
-                    out_lines.append(":".join(line_split))
-                out = '\n'.join(out_lines)
-            ui.info("\n", ui.reset, out)
-        if status == 0:
-            retcode = 0
-    if not out:
+    has_output = False
+    try:
+        # Display the output of the projects in order, as soon as
+        # it is available. The other greps keep running meanwhile
+        for i, job in enumerate(jobs):
+            ui.info_count(i, len(jobs),
+                          ui.green, "Looking in",
+                          ui.blue, job.project.src.ljust(max_src),
+                          end="\r")
+            has_output = False
+            for line in job.get_lines():
+                if not has_output:
+                    ui.info()
+                    has_output = True
+                ui.info(ui.reset, line)
+            if job.retcode == 0:
+                retcode = 0
+                if args.first:
+                    break
+    finally:
+        stop_event.set()
+        # do not wait for the greps still running to output something
+        for job in jobs:
+            job.kill()
+    if not has_output:
         ui.info(ui.reset)
     sys.exit(retcode)
+
+
+class GrepJob(object):
+    """ Run git grep in one project.
+
+    The lines are sent through a bounded queue, so that the
+    output of a huge number of matches is never kept in memory
+
+    """
+    def __init__(self, project, git_grep_opts, path_mode):
+        self.project = project
+        self.git_grep_opts = git_grep_opts
+        self.path_mode = path_mode
+        self.retcode = None
+        self._lines = Queue.Queue(maxsize=MAX_BUFFERED_LINES)
+        self._process = None
+        self._process_lock = threading.Lock()
+
+    def run(self, stop_event):
+        """ Run git grep, stopping as soon as stop_event is set """
+        try:
+            self._run(stop_event)
+        except Exception, e:
+            self._put("git grep failed: %s" % e, stop_event)
+        finally:
+            # always tell the main thread this job is over
+            self._put(None, stop_event)
+
+    def _run(self, stop_event):
+        git = qisys.command.find_program("git", raises=True)
+        cmd = [git, "grep"] + self.git_grep_opts
+        with self._process_lock:
+            if stop_event.is_set():
+                return
+            process = subprocess.Popen(cmd, cwd=self.project.path,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT)
+            self._process = process
+        for line in iter(process.stdout.readline, ""):
+            if not self._put(self.fix_path(line.rstrip("\n")), stop_event):
+                self.kill()
+                break
+        process.stdout.close()
+        self.retcode = process.wait()
+
+    def kill(self):
+        """ Kill git grep if it is still running """
+        with self._process_lock:
+            process = self._process
+            if process is None or process.poll() is not None:
+                return
+            try:
+                process.kill()
+            except OSError:
+                # already dead
+                pass
+
+    def fix_path(self, line):
+        """ Make the paths relative to the worktree, or absolute """
+        if self.path_mode == 'absolute' or self.path_mode == 'worktree':
+            line_split = line.split('\0')
+            if self.path_mode == 'worktree':
+                prepend = self.project.src
+            else:
+                prepend = self.project.path
+            line_split[0] = os.path.join(prepend, line_split[0])
+            line = ":".join(line_split)
+        return line
+
+    def get_lines(self):
+        """ Yield the lines of the output, until git grep is done """
+        while True:
+            # use a timeout so that the main thread can still
+            # receive KeyboardInterrupt
+            try:
+                line = self._lines.get(True, 0.1)
+            except Queue.Empty:
+                continue
+            if line is None:
+                return
+            yield line
+
+    def _put(self, line, stop_event):
+        """ Wait until there is room for the line, return
+        False if stop_event was set meanwhile
+
+        """
+        while not stop_event.is_set():
+            try:
+                self._lines.put(line, True, 0.1)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+
+def _worker_loop(todo, stop_event):
+    """ Run the grep jobs until there are none left """
+    while not stop_event.is_set():
+        try:
+            job = todo.get_nowait()
+        except Queue.Empty:
+            return
+        job.run(stop_event)
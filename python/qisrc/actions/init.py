@@ -19,17 +19,25 @@ def configure_parser(parser):
     parser.add_argument("manifest_url", nargs="?")
     parser.add_argument("-b", "--branch", dest="branch",
         help="Use this branch for the manifest")
-    parser.set_defaults(branch="master")
+    parser.add_argument("-j", "--jobs", dest="num_jobs", type=int,
+        help="Number of repositories to clone at the same time")
+    parser.add_argument("--git-cache", dest="git_cache",
+        help="Directory of git mirrors shared by several worktrees. "
+             "New clones will only download the objects missing from it")
+    parser.set_defaults(branch="master", num_jobs=1)
 
 def do(args):
     """Main entry point"""
     root = os.getcwd()
     workrtee = qisys.worktree.WorkTree(root)
     git_worktree = qisrc.worktree.GitWorkTree(workrtee)
+    if args.git_cache:
+        git_worktree.configure_git_cache(args.git_cache)
     if args.manifest_url:
         git_worktree.configure_manifest(args.manifest_url,
                                         groups=args.groups,
-                                        branch=args.branch)
+                                        branch=args.branch,
+                                        num_jobs=args.num_jobs)
 
     ui.info(ui.green, "New qisrc worktree initialized in",
             ui.reset, ui.bold, root)
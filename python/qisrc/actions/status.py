@@ -6,9 +6,12 @@
 """
 
 import sys
+import multiprocessing
+import threading
 
 from qisys import ui
 import qisys
+import qisys.parallel
 import qisrc.parsers
 import qisrc.status
 
@@ -22,6 +25,9 @@ def configure_parser(parser):
         dest="untracked_files",
         action="store_true",
         help="display untracked files")
+    group.add_argument("-j", "--jobs", dest="num_jobs", type=int,
+        help="Number of projects to check at the same time. "
+             "Defaults to the number of CPUs")
 
 def do(args):
     """Main method."""
@@ -35,18 +41,29 @@ def do(args):
 
     num_projs = len(git_projects)
     max_len = max(len(p.src) for p in git_projects)
-    state_projects = list()
-
-    for (i, git_project) in enumerate(git_projects, start = 1):
-        if sys.stdout.isatty():
-            src = git_project.src
-            to_write = "Checking (%d/%d) " % (i, num_projs)
-            to_write += src.ljust(max_len)
-            sys.stdout.write(to_write + "\r")
-            sys.stdout.flush()
+    num_jobs = args.num_jobs or multiprocessing.cpu_count()
+    lock = threading.Lock()
+    done = list()
 
+    def check_one(git_project):
         state_project = qisrc.status.check_state(git_project, args.untracked_files)
-        state_projects.append(state_project)
+        with lock:
+            done.append(git_project)
+            if sys.stdout.isatty():
+                src = git_project.src
+                to_write = "Checking (%d/%d) " % (len(done), num_projs)
+                to_write += src.ljust(max_len)
+                sys.stdout.write(to_write + "\r")
+                sys.stdout.flush()
+        return state_project
+
+    job_queue = qisys.parallel.JobQueue(git_projects, num_workers=num_jobs)
+    job_queue.run(check_one)
+    if job_queue.failed:
+        (git_project, error) = job_queue.failed[0]
+        raise error
+    # display the results in the original order
+    state_projects = [job_queue.results[x] for x in git_projects]
 
     if sys.stdout.isatty():
         ui.info("Checking (%d/%d):" % (num_projs, num_projs), "done",
@@ -10,8 +10,10 @@
 """
 
 import sys
+import threading
 
 from qisys import ui
+import qisys.parallel
 import qisys.parsers
 import qisrc.git
 import qisrc.sync
@@ -26,6 +28,8 @@ def configure_parser(parser):
     group = parser.add_argument_group("qisrc sync options")
     group.add_argument("--rebase-devel", action="store_true",
                        help="Rebase development branches. Advanced users only")
+    group.add_argument("-j", "--jobs", dest="num_jobs", type=int, default=1,
+                       help="Number of projects to clone or synchronize at the same time")
 
 def print_overview(total, skipped, failed):
     out = [ ui.green, "Success:", ui.white, total - skipped - failed ]
@@ -45,7 +49,7 @@ def print_overview(total, skipped, failed):
 def do(args):
     """Main entry point"""
     git_worktree = qisrc.parsers.get_git_worktree(args)
-    sync_ok = git_worktree.sync()
+    sync_ok = git_worktree.sync(num_jobs=args.num_jobs)
     git_projects = qisrc.parsers.get_git_projects(git_worktree, args,
                                                   default_all=True,
                                                   use_build_deps=True)
@@ -56,6 +60,13 @@ def do(args):
     skipped = list()
     failed = list()
     ui.info(ui.green, ":: Syncing projects ...")
+    if args.num_jobs > 1:
+        (skipped, failed) = sync_parallel(git_projects, args.num_jobs,
+                                          rebase_devel=args.rebase_devel)
+        print_overview(len(git_projects), len(skipped), len(failed))
+        if failed or not sync_ok:
+            sys.exit(1)
+        return
     max_src = max(len(x.src) for x in git_projects)
     for (i, git_project) in enumerate(git_projects):
         ui.info_count(i, len(git_projects),
@@ -75,3 +86,41 @@ def do(args):
     print_overview(len(git_projects), len(skipped), len(failed))
     if failed or not sync_ok:
         sys.exit(1)
+
+def sync_parallel(git_projects, num_jobs, rebase_devel=False):
+    """ Synchronize the projects using ``num_jobs`` threads.
+
+    The output of each project is displayed at once, when its
+    synchronization is over.
+
+    :returns: a ``(skipped, failed)`` tuple of lists of
+              ``(src, output)`` tuples
+
+    """
+    skipped = list()
+    failed = list()
+    done = list()
+    lock = threading.Lock()
+    max_src = max(len(x.src) for x in git_projects)
+
+    def sync_one(git_project):
+        try:
+            (status, out) = git_project.sync(rebase_devel=rebase_devel)
+        except Exception, e:
+            (status, out) = (False, str(e))
+        with lock:
+            ui.info_count(len(done), len(git_projects),
+                          ui.blue, git_project.src.ljust(max_src))
+            done.append(git_project)
+            if status is None:
+                ui.info(ui.brown, "  [skipped]")
+                skipped.append((git_project.src, out))
+            if status is False:
+                ui.info(ui.red, "  [failed]")
+                failed.append((git_project.src, out))
+            if out:
+                print ui.indent(out + "\n\n", num=2)
+
+    job_queue = qisys.parallel.JobQueue(git_projects, num_workers=num_jobs)
+    job_queue.run(sync_one)
+    return (skipped, failed)
@@ -0,0 +1,130 @@
+## Copyright (c) 2012-2014 Aldebaran Robotics. All rights reserved.
+## Use of this source code is governed by a BSD-style license that can be
+## found in the COPYING file.
+
+""" A local cache of git objects, which can be shared by several
+worktrees
+
+The cache is a directory containing a bare mirror of every repository
+cloned through it. New clones borrow the objects of the mirror (using
+git alternates, like ``git clone --reference --dissociate`` does), so
+that only the objects missing from the mirror are downloaded from the
+remote.
+
+"""
+
+import contextlib
+import hashlib
+import os
+
+import qisys.sh
+import qisrc.git
+
+
+class GitCache(object):
+    """ A directory of bare mirrors, one per remote url """
+    def __init__(self, root):
+        self.root = qisys.sh.to_native_path(root)
+
+    def mirror_path(self, url):
+        """ Path to the bare mirror of the given url """
+        name = os.path.basename(qisrc.git.name_from_url(url).rstrip("/"))
+        if not name.endswith(".git"):
+            name += ".git"
+        # several remotes may have a project with the same name:
+        digest = hashlib.sha1(url).hexdigest()[:8]
+        return os.path.join(self.root, "%s-%s" % (digest, name))
+
+    def update(self, url):
+        """ Create or update the mirror of the given url.
+        Several processes may update the same mirror at
+        the same time.
+
+        :returns: a ``(success, output)`` tuple
+
+        """
+        mirror = self.mirror_path(url)
+        qisys.sh.mkdir(self.root, recursive=True)
+        with qisys.sh.file_lock(mirror):
+            git = qisrc.git.Git(mirror)
+            if os.path.exists(mirror):
+                rc, out = git.call("fetch", "--prune", "--quiet", "origin",
+                                   raises=False)
+            else:
+                rc, out = git.call("clone", "--mirror", "--quiet", url, mirror,
+                                   cwd=self.root, raises=False)
+                if rc != 0:
+                    qisys.sh.rm(mirror)
+        return (rc == 0, out)
+
+    def borrow_objects(self, repo_path, url):
+        """ Update the mirror of the url, and make the git repository
+        in ``repo_path`` use its objects. To be called right after
+        ``git init``.
+
+        Failing to update the mirror is not fatal: the objects will
+        simply be fetched from the remote.
+
+        :returns: a ``(success, output)`` tuple
+
+        """
+        ok, out = self.update(url)
+        if not ok:
+            return (ok, out)
+        mirror = self.mirror_path(url)
+        with open(_get_alternates(repo_path), "w") as fp:
+            fp.write(os.path.join(mirror, "objects") + "\n")
+        return (ok, out)
+
+    def dissociate(self, repo_path):
+        """ Copy the objects borrowed by the git repository in
+        ``repo_path``, so that it no longer depends on the cache
+
+        :returns: a ``(success, output)`` tuple
+
+        """
+        alternates = _get_alternates(repo_path)
+        if not os.path.exists(alternates):
+            return (True, "")
+        git = qisrc.git.Git(repo_path)
+        rc, out = git.call("repack", "-a", "-d", "--quiet", raises=False)
+        if rc == 0:
+            os.remove(alternates)
+        return (rc == 0, out)
+
+    def __repr__(self):
+        return "<GitCache in %s>" % self.root
+
+
+@contextlib.contextmanager
+def borrowed_objects(git_cache, repo_path, url):
+    """ Make the git repository in ``repo_path`` borrow the objects of
+    the mirror of ``url`` while running the commands of the ``with``
+    block, then copy them so that it no longer depends on the cache.
+    To be used right after ``git init``::
+
+        with borrowed_objects(git_cache, repo_path, url) as warnings:
+            git.fetch(...)
+
+    Nothing is done if ``git_cache`` is None. Failing to use the cache
+    is not fatal: the messages are appended to the list given by the
+    ``with`` statement.
+
+    """
+    warnings = list()
+    if git_cache:
+        ok, out = git_cache.borrow_objects(repo_path, url)
+        if not ok:
+            warnings.append("Could not update git cache\n" + out)
+    try:
+        yield warnings
+    finally:
+        # even if the block failed, the repository must not keep
+        # depending on the cache, which may be pruned later on
+        if git_cache:
+            ok, out = git_cache.dissociate(repo_path)
+            if not ok:
+                warnings.append("Could not copy objects from git cache\n" + out)
+
+def _get_alternates(repo_path):
+    return os.path.join(repo_path, ".git", "objects", "info", "alternates")
@@ -97,7 +97,7 @@ class GitProjectParser(qisys.parsers.AbstractProjectParser):
         worktree_projects = self.wt_parser.parse_one_project(args, project_arg)
         worktree_project = worktree_projects[0]
         # closest git_project
-        parent_git_project = qisys.parsers.find_parent_project(self.git_projects,
+        parent_git_project = qisys.parsers.find_parent_project(self.git_worktree.path_index,
                                                                worktree_project.path)
         if parent_git_project:
             return [parent_git_project]
@@ -149,7 +149,7 @@ class GitBuildProjectParser(qisys.parsers.AbstractProjectParser):
         deps_solver.dep_types = dep_types
         build_projects = deps_solver.get_dep_projects([build_project], dep_types)
         for build_project in build_projects:
-            git_project = qisys.parsers.find_parent_project(self.git_worktree.git_projects,
+            git_project = qisys.parsers.find_parent_project(self.git_worktree.path_index,
                                                             build_project.path)
             git_projects.append(git_project)
         # Idiom to sort an iterable preserving order
@@ -102,8 +102,8 @@ def get_gerrit_username(server, ssh_port):
             return None
 
     # Add it to config so we ask only once
-    qibuild_cfg.set_server_access(server, username)
-    qibuild_cfg.write()
+    with qibuild.config.edit_global_config() as qibuild_cfg:
+        qibuild_cfg.set_server_access(server, username)
     return username
 
 
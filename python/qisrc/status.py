@@ -11,16 +11,79 @@ def stat_tracking_remote(git, branch, tracking):
     """Check if branch is ahead and / or behind tracking."""
     behind = 0
     ahead = 0
-    (ret, out) = git.call("rev-list", "--left-right",
-                          "%s..%s" % (tracking, branch), raises=False)
+    (ret, out) = git.call("rev-list", "--left-right", "--count",
+                          "%s...%s" % (tracking, branch), raises=False)
     if ret == 0:
-        ahead = len(out.split())
-    (ret, out) = git.call("rev-list", "--left-right",
-                          "%s..%s" % (branch, tracking), raises=False)
-    if ret == 0:
-        behind = len(out.split())
+        (behind, ahead) = [int(x) for x in out.split()]
     return (ahead, behind)
 
+class PorcelainStatus(object):
+    """ The result of ``git status --porcelain=v2 --branch``,
+    which gives everything ``qisrc status`` needs in one call
+
+    """
+    def __init__(self):
+        self.head = None
+        self.upstream = None
+        self.ahead = 0
+        self.behind = 0
+        # entries in the format of ``git status --porcelain``
+        self.entries = list()
+
+    def parse(self, out):
+        for line in out.splitlines():
+            if line.startswith("# branch.head "):
+                head = line[len("# branch.head "):]
+                if head != "(detached)":
+                    self.head = head
+            elif line.startswith("# branch.upstream "):
+                self.upstream = line[len("# branch.upstream "):]
+            elif line.startswith("# branch.ab "):
+                (ahead, behind) = line[len("# branch.ab "):].split()
+                self.ahead = int(ahead)
+                self.behind = -int(behind)
+            elif line.startswith("1 "):
+                fields = line.split(" ", 8)
+                self.entries.append("%s %s" % (_xy_code(fields[1]), fields[8]))
+            elif line.startswith("2 "):
+                fields = line.split(" ", 9)
+                (path, orig_path) = fields[9].split("\t", 1)
+                self.entries.append("%s %s -> %s" % (_xy_code(fields[1]),
+                                                     orig_path, path))
+            elif line.startswith("u "):
+                fields = line.split(" ", 10)
+                self.entries.append("%s %s" % (_xy_code(fields[1]), fields[10]))
+            elif line.startswith("? "):
+                self.entries.append("?? %s" % line[2:])
+
+    @property
+    def clean(self):
+        return not self.entries
+
+def _xy_code(xy):
+    """ porcelain v2 uses "." for unchanged, where
+    porcelain v1 uses a space
+
+    """
+    return xy.replace(".", " ")
+
+def get_porcelain_status(git, untracked):
+    """ Run ``git status --porcelain=v2 --branch``
+
+    :returns: a :py:class:`PorcelainStatus`, or None if
+              git status failed
+
+    """
+    args = ["--porcelain=v2", "--branch"]
+    if not untracked:
+        args.append("--untracked-files=no")
+    (rc, out) = git.status(*args, raises=False)
+    if rc != 0:
+        return None
+    res = PorcelainStatus()
+    res.parse(out)
+    return res
+
 class ProjectState():
     """A class which represent a project and is cleanlyness."""
     def __init__(self, project):
@@ -54,6 +117,43 @@ def check_state(project, untracked):
 
     git = qisrc.git.Git(project.path)
 
+    status = get_porcelain_status(git, untracked)
+    if status is None:
+        # Either not a git repository, or git is too old
+        # to know about --porcelain=v2
+        return _check_state_legacy(project, untracked)
+
+    state_project.clean = status.clean
+    state_project.current_branch = status.head
+    state_project.tracking = status.upstream
+    if project.default_remote and project.default_branch:
+        state_project.manifest_branch = "%s/%s" % (project.default_remote.name, project.default_branch.name)
+    if state_project.clean:
+        if state_project.current_branch is None:
+            state_project.not_on_a_branch = True
+            return state_project
+
+        if project.default_branch:
+            if state_project.current_branch != project.default_branch.name:
+                state_project.incorrect_proj = True
+
+        state_project.ahead = status.ahead
+        state_project.behind = status.behind
+        if state_project.incorrect_proj:
+            (state_project.ahead_manifest, state_project.behind_manifest) = stat_tracking_remote(
+                git, state_project.current_branch, state_project.manifest_branch)
+
+    if not state_project.sync_and_clean:
+        state_project.status = status.entries
+
+    return state_project
+
+def _check_state_legacy(project, untracked):
+    """ Same as check_state, calling git several times """
+    state_project = ProjectState(project)
+
+    git = qisrc.git.Git(project.path)
+
     if not git.is_valid():
         state_project.valid = False
         return state_project
@@ -27,25 +27,28 @@ class WorkTreeSyncer(object):
         self.git_worktree = git_worktree
         # Read manifest configuration now, before any
         self.manifest = LocalManifest()
+        # Directory of a qisrc.git_cache.GitCache, if any
+        self.git_cache = None
         root = qisys.qixml.read(self.manifest_xml).getroot()
         parser = WorkTreeSyncerParser(self)
         parser.parse(root)
         self.old_repos = list()
         self.new_repos = list()
 
-    def sync(self):
+    def sync(self, num_jobs=1):
         """" Synchronize with a remote manifest:
         * clone missing repos
         * move repos that needs to be moved
         * reconfigure remotes and default branches
         * synchronizes build profiles
+        :param num_jobs: number of repos to clone at the same time
         :returns: True in case of success, False otherwise
 
         """
         # backup old repos configuration now, so that
         # we know what to sync
         self.old_repos = self.get_old_repos()
-        return self.sync_repos()
+        return self.sync_repos(num_jobs=num_jobs)
 
     @property
     def manifest_xml(self):
@@ -71,7 +74,7 @@ class WorkTreeSyncer(object):
             git.commit("-m", "initial commit")
         return res
 
-    def sync_repos(self):
+    def sync_repos(self, num_jobs=1):
         """ Update every manifest, inspect changes, and updates the
         git worktree accordingly
 
@@ -88,7 +91,8 @@ class WorkTreeSyncer(object):
         self._sync_manifest()
         self._sync_groups()
         self.new_repos = self.get_new_repos()
-        res = self._sync_repos(self.old_repos, self.new_repos)
+        res = self._sync_repos(self.old_repos, self.new_repos,
+                               num_jobs=num_jobs)
         # re-read self.old_repos so we can do several syncs:
         self.old_repos = self.get_old_repos()
         # if everything went well, save the manifests configurations:
@@ -131,7 +135,8 @@ class WorkTreeSyncer(object):
         xml = parser.xml_elem()
         qisys.qixml.write(xml, self.manifest_xml)
 
-    def configure_manifest(self, url, branch="master", groups=None, ref=None):
+    def configure_manifest(self, url, branch="master", groups=None, ref=None,
+                           num_jobs=1):
         """ Add a manifest to the list. Will be stored in
         .qi/manifests/<name>
 
@@ -142,7 +147,7 @@ class WorkTreeSyncer(object):
         self.manifest.branch = branch
         self.manifest.ref = ref
         self._sync_manifest()
-        res = self.sync_repos()
+        res = self.sync_repos(num_jobs=num_jobs)
         self.configure_projects()
         return res
 
@@ -207,7 +212,7 @@ class WorkTreeSyncer(object):
         if not transaction.ok:
             raise Exception("Update failed\n" + transaction.output)
 
-    def _sync_repos(self, old_repos, new_repos):
+    def _sync_repos(self, old_repos, new_repos, num_jobs=1):
         """ Sync the remote repo configurations with the git worktree """
         res = True
         ##
@@ -248,6 +253,11 @@ class WorkTreeSyncer(object):
         if to_add:
             ui.info(ui.green, ":: Cloning new repositories ...")
 
+        if num_jobs > 1:
+            if not self._clone_repos_parallel(to_add, num_jobs):
+                res = False
+            to_add = list()
+
         for i, repo in enumerate(to_add):
             ui.info_count(i, len(to_add),
                     ui.blue, repo.project,
@@ -274,6 +284,30 @@ class WorkTreeSyncer(object):
 
         return res
 
+    def _clone_repos_parallel(self, repos, num_jobs):
+        """ Clone the missing repos using ``num_jobs`` threads,
+        configuring each of them as soon as it is cloned
+
+        :returns: True if every repo could be cloned
+
+        """
+        to_clone = list()
+        for repo in repos:
+            project = self.git_worktree.get_git_project(repo.src)
+            if project:  # Repo is already there, re-apply config
+                project.read_remote_config(repo)
+                project.apply_config()
+            else:
+                to_clone.append(repo)
+        def configure(repo):
+            project = self.git_worktree.get_git_project(repo.src)
+            project.read_remote_config(repo)
+            project.apply_config()
+        cloned = self.git_worktree.clone_missing_repos(to_clone,
+                                                       num_jobs=num_jobs,
+                                                       on_added=configure)
+        return len(cloned) == len(to_clone)
+
     def _sync_groups(self):
         """ Synchronize the repsitories groups read from the given manifest """
         remote_xml = os.path.join(self.manifest_repo, "manifest.xml")
@@ -433,6 +467,9 @@ class WorkTreeSyncerParser(qisys.qixml.XMLParser):
         self.target.manifest = manifest
 
     def _write_manifest(self, elem):
+        if not self.target.manifest.url:
+            # not configured yet
+            return
         parser = LocalManifestParser(self.target.manifest)
         manifest_elem = parser.xml_elem(node_name="manifest")
         elem.append(manifest_elem)
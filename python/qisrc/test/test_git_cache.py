@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+import qisys.sh
+import qisys.script
+import qisrc.git
+import qisrc.git_cache
+from qisrc.test.conftest import TestGitWorkTree
+
+def get_sha1(path, ref="HEAD"):
+    git = qisrc.git.Git(path)
+    rc, out = git.call("rev-parse", ref, raises=False)
+    assert rc == 0
+    return out
+
+def test_update_mirror(tmpdir, git_server):
+    foo_url = git_server.create_repo("foo.git").clone_url
+    git_cache = qisrc.git_cache.GitCache(tmpdir.join("cache").strpath)
+    ok, _ = git_cache.update(foo_url)
+    assert ok
+    mirror = git_cache.mirror_path(foo_url)
+    assert os.path.isdir(mirror)
+    git_server.push_file("foo.git", "foo.txt", "new change")
+    ok, _ = git_cache.update(foo_url)
+    assert ok
+    srv_path = foo_url[len("file://"):]
+    assert get_sha1(mirror, "master") == get_sha1(srv_path, "master")
+
+def test_update_mirror_bad_url(tmpdir):
+    git_cache = qisrc.git_cache.GitCache(tmpdir.join("cache").strpath)
+    bad_url = "file://" + tmpdir.join("nonexisting.git").strpath
+    ok, _ = git_cache.update(bad_url)
+    assert not ok
+    assert not os.path.exists(git_cache.mirror_path(bad_url))
+
+def test_clone_with_git_cache(qisrc_action, git_server):
+    foo_url = git_server.create_repo("foo.git").clone_url
+    git_server.create_repo("bar.git")
+    cache = qisrc_action.tmpdir.join("cache")
+    qisrc_action("init", git_server.manifest_url, "--git-cache", cache.strpath)
+    git_worktree = TestGitWorkTree()
+    assert git_worktree.git_cache.root == cache.strpath
+    foo = git_worktree.get_git_project("foo")
+    mirror = git_worktree.git_cache.mirror_path(foo_url)
+    assert get_sha1(foo.path) == get_sha1(mirror, "master")
+    # clones do not depend on the cache:
+    alternates = os.path.join(foo.path, ".git", "objects", "info", "alternates")
+    assert not os.path.exists(alternates)
+    qisys.sh.rm(cache.strpath)
+    git = qisrc.git.Git(foo.path)
+    rc, _ = git.call("fsck", raises=False)
+    assert rc == 0
+
+def test_new_repos_use_git_cache(qisrc_action, git_server):
+    git_server.create_repo("foo.git")
+    cache = qisrc_action.tmpdir.join("cache")
+    qisrc_action("init", git_server.manifest_url, "--git-cache", cache.strpath)
+    bar_url = git_server.create_repo("bar.git").clone_url
+    git_server.create_repo("baz.git")
+    qisrc_action("sync", "-j", "2")
+    git_worktree = TestGitWorkTree()
+    assert git_worktree.get_git_project("bar")
+    assert git_worktree.get_git_project("baz")
+    assert os.path.isdir(git_worktree.git_cache.mirror_path(bar_url))
+
+def test_borrowed_objects(tmpdir, git_server):
+    foo_url = git_server.create_repo("foo.git").clone_url
+    git_cache = qisrc.git_cache.GitCache(tmpdir.join("cache").strpath)
+    repo_path = tmpdir.join("foo").strpath
+    git = qisrc.git.Git(repo_path)
+    qisys.sh.mkdir(repo_path)
+    git.init()
+    alternates = os.path.join(repo_path, ".git", "objects", "info", "alternates")
+    with qisrc.git_cache.borrowed_objects(git_cache, repo_path,
+                                          foo_url) as warnings:
+        assert os.path.exists(alternates)
+        git.fetch(foo_url, "master")
+    assert not warnings
+    assert not os.path.exists(alternates)
+    rc, _ = git.call("fsck", raises=False)
+    assert rc == 0
+
+def test_borrowed_objects_when_interrupted(tmpdir, git_server):
+    foo_url = git_server.create_repo("foo.git").clone_url
+    git_cache = qisrc.git_cache.GitCache(tmpdir.join("cache").strpath)
+    repo_path = tmpdir.join("foo").strpath
+    git = qisrc.git.Git(repo_path)
+    qisys.sh.mkdir(repo_path)
+    git.init()
+    alternates = os.path.join(repo_path, ".git", "objects", "info", "alternates")
+    with pytest.raises(KeyboardInterrupt):
+        with qisrc.git_cache.borrowed_objects(git_cache, repo_path, foo_url):
+            git.fetch(foo_url, "master")
+            raise KeyboardInterrupt()
+    assert not os.path.exists(alternates)
+
+def test_borrowed_objects_bad_url(tmpdir):
+    git_cache = qisrc.git_cache.GitCache(tmpdir.join("cache").strpath)
+    repo_path = tmpdir.join("foo").strpath
+    qisys.sh.mkdir(repo_path)
+    qisrc.git.Git(repo_path).init()
+    bad_url = "file://" + tmpdir.join("nonexisting.git").strpath
+    with qisrc.git_cache.borrowed_objects(git_cache, repo_path,
+                                          bad_url) as warnings:
+        pass
+    assert "Could not update git cache" in warnings[0]
@@ -1,5 +1,8 @@
+import os
+
 import qisys.qixml
 import qisys.worktree
+import qisrc.git
 import qisrc.worktree
 
 from qisrc.git_config import Remote
@@ -119,6 +122,33 @@ def test_clone_missing_evil_nested(git_worktree, git_server):
     git_worktree.clone_missing(foo_repo)
     assert len(git_worktree.git_projects) == 2
 
+def test_clone_missing_repos_nested(git_worktree, git_server, monkeypatch):
+    foo_repo = git_server.create_repo("foo")
+    git_server.push_file("foo", "foo.txt", "foo\n")
+    foo_bar_repo = git_server.create_repo("foo/bar")
+    git_server.push_file("foo/bar", "bar.txt", "bar\n")
+    events = list()
+    clone_repo = qisrc.worktree._clone_repo
+    def recording_clone_repo(repo, *args, **kwargs):
+        events.append(("start", repo.src))
+        res = clone_repo(repo, *args, **kwargs)
+        events.append(("end", repo.src))
+        return res
+    monkeypatch.setattr(qisrc.worktree, "_clone_repo", recording_clone_repo)
+    def on_added(repo):
+        assert git_worktree.get_git_project(repo.src)
+        events.append(("added", repo.src))
+    res = git_worktree.clone_missing_repos([foo_bar_repo, foo_repo],
+                                           num_jobs=2, on_added=on_added)
+    assert res == [foo_bar_repo, foo_repo]
+    assert len(git_worktree.git_projects) == 2
+    # the parent is cloned and added before its nested repo is cloned:
+    assert events == [("start", "foo"), ("end", "foo"), ("added", "foo"),
+                      ("start", "foo/bar"), ("end", "foo/bar"),
+                      ("added", "foo/bar")]
+    bar_path = os.path.join(git_worktree.root, "foo", "bar")
+    assert qisrc.git.get_repo_root(bar_path) == bar_path
+
 def test_clone_missing_already_correct(git_worktree, git_server, record_messages):
     foo_repo = git_server.create_repo("FooBar")
     git_worktree.clone_missing(foo_repo)
@@ -1,3 +1,8 @@
+import pytest
+
+import qisys.actions
+import qisys.sh
+
 def test_qisrc_foreach(qisrc_action, record_messages):
     worktree = qisrc_action.worktree
     worktree.create_project("not_in_git")
@@ -10,3 +15,42 @@ def test_qisrc_foreach(qisrc_action, record_messages):
     qisrc_action("foreach", "ls", "--all")
     assert record_messages.find("not_in_git")
     assert record_messages.find("git_project")
+
+def test_qisrc_foreach_parallel(qisrc_action, capsys):
+    git_worktree = qisrc_action.git_worktree
+    for name in ["a", "b", "c"]:
+        git_worktree.create_git_project(name)
+    qisrc_action("foreach", "-j", "2", "--", "git", "status")
+    # output is displayed in order, project by project:
+    messages = capsys.readouterr()[0]
+    indexes = [messages.index("* (%i/3) %s" % (i + 1, name))
+               for (i, name) in enumerate(["a", "b", "c"])]
+    assert indexes == sorted(indexes)
+
+def test_qisrc_foreach_parallel_errors(qisrc_action, record_messages):
+    git_worktree = qisrc_action.git_worktree
+    git_worktree.create_git_project("a")
+    git_worktree.create_git_project("b")
+    # first project fails, second one still runs:
+    rc = qisrc_action("foreach", "-j", "2", "--ignore-errors", "--",
+                      "git", "rev-parse", "--verify", "nosuchref",
+                      retcode=True)
+    assert rc == 1
+    assert record_messages.find("Command failed on the following projects")
+    assert record_messages.find(r"\*\s+a\b")
+    assert record_messages.find(r"\*\s+b\b")
+
+def test_qisrc_foreach_parallel_missing_path(qisrc_action, record_messages):
+    git_worktree = qisrc_action.git_worktree
+    for name in ["a", "b", "c"]:
+        git_worktree.create_git_project(name)
+    projects = git_worktree.get_git_projects()
+    qisys.sh.rm(git_worktree.get_git_project("b").path)
+    with pytest.raises(SystemExit) as e:
+        qisys.actions.foreach(projects, ["git", "rev-parse", "--show-toplevel"],
+                              num_jobs=2)
+    assert e.value.code == 1
+    # the output of the projects after b is still displayed:
+    assert record_messages.find(r"\(3/3\) c")
+    assert record_messages.find(r"/c\b")
+    assert record_messages.find(r"\*\s+b\b")
@@ -1,4 +1,8 @@
+import threading
+
+import qisrc.actions.grep
 import qisrc.git
+from qisrc.test.conftest import TestGitWorkTree
 
 import py
 
@@ -35,3 +39,46 @@ def test_using_projects(qisrc_action):
     assert rc == 0
     rc = qisrc_action("grep", "-p", "bar", "spam", retcode=True)
     assert rc == 1
+
+def create_project_with_spam(qisrc_action, name, num_files=1):
+    proj = qisrc_action.create_git_project(name)
+    git = qisrc.git.Git(proj.path)
+    # pylint: disable-msg=E1101
+    proj_path = py.path.local(proj.path)
+    for i in range(num_files):
+        proj_path.join("%s%i.txt" % (name, i)).write("spam in %s\n" % name)
+    git.add(".")
+
+def test_output_is_grouped_by_project(qisrc_action, capsys):
+    for name in ["a", "b", "c", "d"]:
+        create_project_with_spam(qisrc_action, name, num_files=20)
+    capsys.readouterr()
+    rc = qisrc_action("grep", "-j", "4", "--path", "worktree", "spam",
+                      retcode=True)
+    assert rc == 0
+    (out, _) = capsys.readouterr()
+    matches = [x for x in out.splitlines() if "spam in" in x]
+    assert len(matches) == 80
+    sources = [x.split()[-1] for x in matches]
+    assert sources == sorted(sources)
+
+def test_first(qisrc_action, record_messages):
+    create_project_with_spam(qisrc_action, "a")
+    create_project_with_spam(qisrc_action, "b")
+    record_messages.reset()
+    rc = qisrc_action("grep", "--first", "spam", retcode=True)
+    assert rc == 0
+    assert record_messages.find("spam in a")
+    assert not record_messages.find("spam in b")
+
+def test_stopped_job_does_not_run(qisrc_action):
+    create_project_with_spam(qisrc_action, "a")
+    git_worktree = TestGitWorkTree()
+    project = git_worktree.get_git_project("a")
+    job = qisrc.actions.grep.GrepJob(project, ["spam"], "project")
+    stop_event = threading.Event()
+    stop_event.set()
+    job.run(stop_event)
+    assert job.retcode is None
+    # nothing to kill:
+    job.kill()
@@ -86,3 +86,25 @@ def test_stores_default_group(qisrc_action, git_server):
     qisrc_action("init", manifest_url)
     git_worktree = TestGitWorkTree()
     assert git_worktree.manifest.groups == ["default"]
+
+def test_clone_several_repos_at_once(qisrc_action, git_server):
+    git_server.create_repo("foo.git")
+    git_server.create_repo("bar.git")
+    git_server.create_repo("lib/baz.git")
+    qisrc_action("init", git_server.manifest_url, "-j", "3")
+    git_worktree = TestGitWorkTree()
+    assert len(git_worktree.git_projects) == 3
+    for src in ["foo", "bar", "lib/baz"]:
+        git_project = git_worktree.get_git_project(src)
+        assert git_project.default_remote
+        assert git_project.default_branch.name == "master"
+
+def test_parallel_clone_failure(qisrc_action, git_server):
+    git_server.create_repo("foo.git")
+    git_server.manifest.add_repo("bogus", None, ["origin"])
+    git_server.create_repo("bar.git")
+    qisrc_action("init", git_server.manifest_url, "-j", "3")
+    git_worktree = TestGitWorkTree()
+    assert git_worktree.get_git_project("foo")
+    assert git_worktree.get_git_project("bar")
+    assert not git_worktree.get_git_project("bogus")
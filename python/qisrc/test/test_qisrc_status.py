@@ -1,4 +1,5 @@
 import qisrc.git
+import qisrc.status
 from qisrc.test.conftest import TestGitWorkTree
 
 import py
@@ -52,3 +53,55 @@ def test_not_on_any_branch(qisrc_action, record_messages):
     foo_git.checkout(out)
     qisrc_action("status")
     assert record_messages.find("not on any branch")
+
+def test_porcelain_v2_parsing():
+    out = """\
+# branch.oid 0123456789abcdef0123456789abcdef01234567
+# branch.head master
+# branch.upstream origin/master
+# branch.ab +2 -1
+1 .M N... 100644 100644 100644 0123 0123 a file.txt
+2 R. N... 100644 100644 100644 0123 0123 R100 new.txt\told.txt
+u UU N... 100644 100644 100644 100644 0123 0123 0123 conflict.txt
+? untracked.txt"""
+    status = qisrc.status.PorcelainStatus()
+    status.parse(out)
+    assert status.head == "master"
+    assert status.upstream == "origin/master"
+    assert status.ahead == 2
+    assert status.behind == 1
+    assert not status.clean
+    assert status.entries == [" M a file.txt",
+                              "R  old.txt -> new.txt",
+                              "UU conflict.txt",
+                              "?? untracked.txt"]
+
+def test_same_state_as_legacy(qisrc_action, git_server):
+    git_server.create_repo("foo.git")
+    git_server.create_repo("bar.git")
+    git_server.create_repo("baz.git")
+    git_server.push_file("baz.git", "a.txt", "a\n")
+    git_server.push_file("baz.git", "b.txt", "b\n")
+    git_server.push_file("baz.git", "c.txt", "c\n")
+    qisrc_action("init", git_server.manifest_url)
+    git_worktree = TestGitWorkTree()
+    foo = git_worktree.get_git_project("foo")
+    bar = git_worktree.get_git_project("bar")
+    baz = git_worktree.get_git_project("baz")
+    git_server.push_file("foo.git", "new_file", "")
+    qisrc.git.Git(foo.path).fetch()
+    # pylint: disable-msg=E1101
+    py.path.local(bar.path).ensure("untracked", file=True)
+    # modified, staged and renamed files:
+    baz_path = py.path.local(baz.path)
+    baz_path.join("a.txt").write("modified\n")
+    baz_path.join("b.txt").write("staged\n")
+    baz_path.ensure("untracked", file=True)
+    baz_git = qisrc.git.Git(baz.path)
+    baz_git.add("b.txt")
+    baz_git.call("mv", "c.txt", "d.txt")
+    for project in [foo, bar, baz]:
+        for untracked in [True, False]:
+            state = qisrc.status.check_state(project, untracked)
+            legacy = qisrc.status._check_state_legacy(project, untracked)
+            assert vars(state) == vars(legacy)
@@ -224,3 +224,21 @@ def test_new_project_under_gitorious(git_worktree, git_server):
     foo = git_worktree.get_git_project("foo")
     assert len(foo.remotes) == 1
     assert foo.default_remote.name == "gitorious"
+
+def test_sync_several_projects_at_once(qisrc_action, git_server, record_messages):
+    git_server.create_repo("foo.git")
+    git_server.create_repo("bar.git")
+    git_server.create_repo("baz.git")
+    qisrc_action("init", git_server.manifest_url)
+    git_worktree = TestGitWorkTree()
+    baz = git_worktree.get_git_project("baz")
+    TestGit(baz.path).checkout("-b", "wip")
+    git_server.push_file("foo.git", "foo.txt", "change in foo")
+    git_server.push_file("bar.git", "bar.txt", "change in bar")
+    record_messages.reset()
+    qisrc_action("sync", "-j", "3")
+    foo = git_worktree.get_git_project("foo")
+    bar = git_worktree.get_git_project("bar")
+    assert os.path.exists(os.path.join(foo.path, "foo.txt"))
+    assert os.path.exists(os.path.join(bar.path, "bar.txt"))
+    assert record_messages.find("Skipped: 1")
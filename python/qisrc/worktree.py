@@ -1,10 +1,13 @@
 import os
 import copy
 import operator
+import threading
 
 from qisys import ui
+import qisys.parallel
 import qisys.worktree
 import qisrc.git
+import qisrc.git_cache
 import qisrc.snapshot
 import qisrc.sync
 import qisrc.project
@@ -32,25 +35,49 @@ class GitWorkTree(qisys.worktree.WorkTreeObserver):
         self._root_xml = qisys.qixml.read(self.git_xml).getroot()
         worktree.register(self)
         self.git_projects = list()
+        self._projects_by_src = dict()
+        self._path_index = None
         self.load_git_projects()
         self._syncer = qisrc.sync.WorkTreeSyncer(self)
 
     def configure_manifest(self, manifest_url, groups=None,
-                           branch="master", ref=None):
+                           branch="master", ref=None, num_jobs=1):
         """ Add a new manifest to this worktree """
         return self._syncer.configure_manifest(manifest_url, groups=groups,
-                                               branch=branch, ref=ref)
+                                               branch=branch, ref=ref,
+                                               num_jobs=num_jobs)
 
     def configure_projects(self, projects):
         self._syncer.configure_projects(projects)
 
+    def configure_git_cache(self, path):
+        """ Borrow the git objects of the mirrors in the given
+        directory when cloning new repositories.
+        Use ``None`` to stop using a git cache
+
+        """
+        if path:
+            path = qisys.sh.to_native_path(path)
+        self._syncer.git_cache = path
+        self._syncer.dump_manifest()
+
+    @property
+    def git_cache(self):
+        """ The :py:class:`qisrc.git_cache.GitCache` used when cloning
+        new repositories, or None
+
+        """
+        if not self._syncer.git_cache:
+            return None
+        return qisrc.git_cache.GitCache(self._syncer.git_cache)
+
     def check_manifest(self, xml_path):
         """ Run a sync using just the xml file given as parameter """
         return self._syncer.sync_from_manifest_file(xml_path)
 
-    def sync(self):
+    def sync(self, num_jobs=1):
         """ Delegates to WorkTreeSyncer """
-        return self._syncer.sync()
+        return self._syncer.sync(num_jobs=num_jobs)
 
     def load_git_projects(self):
         """ Build a list of git projects using the
@@ -58,22 +85,35 @@ class GitWorkTree(qisys.worktree.WorkTreeObserver):
 
         """
         self.git_projects = list()
+        self._projects_by_src = dict()
+        self._path_index = None
+        git_elems = dict()
+        for xml_elem in self._root_xml.findall("project"):
+            git_elems.setdefault(xml_elem.get("src"), xml_elem)
         for worktree_project in self.worktree.projects:
             project_src = worktree_project.src
             if not qisrc.git.is_git(worktree_project.path):
                 continue
             git_project = qisrc.project.GitProject(self, worktree_project)
-            git_elem = self._get_elem(project_src)
+            git_elem = git_elems.get(project_src)
             if git_elem is not None:
                 git_project.load_xml(git_elem)
             self.git_projects.append(git_project)
+            self._projects_by_src[project_src] = git_project
+
+    @property
+    def path_index(self):
+        """ A :py:class:`qisys.worktree.PathIndex` of the git projects """
+        if self._path_index is None:
+            self._path_index = qisys.worktree.PathIndex(self.git_projects)
+        return self._path_index
 
     def get_git_project(self, path, raises=False, auto_add=False):
         """ Get a git project by its sources """
         src = self.worktree.normalize_path(path)
-        for git_project in self.git_projects:
-            if git_project.src == src:
-                return git_project
+        git_project = self._projects_by_src.get(src)
+        if git_project is not None:
+            return git_project
         if auto_add:
             self.worktree.add_project(path)
             return self.get_git_project(path)
@@ -167,42 +207,118 @@ class GitWorkTree(qisys.worktree.WorkTreeObserver):
         """
         worktree_project = self.worktree.add_project(repo.src)
         git_project = qisrc.project.GitProject(self, worktree_project)
-        if os.path.exists(git_project.path):
-            git = qisrc.git.Git(git_project.path)
-            git_root = qisrc.git.get_repo_root(git_project.path)
-            if not git_root == git_project.path:
-                # Nested git projects:
-                return self._clone_missing(git_project, repo)
-            if git.is_valid() and git.is_empty():
-                ui.warning("Removing empty git project in", git_project.src)
-                qisys.sh.rm(git_project.path)
-            else:
-                # Do nothing, the remote will be re-configured later
-                # anyway
-                return True
+        if not self._needs_clone(git_project.path, git_project.src):
+            # Do nothing, the remote will be re-configured later
+            # anyway
+            return True
         return self._clone_missing(git_project, repo)
 
+    def _needs_clone(self, path, src):
+        """ Whether a repo needs to be cloned in the given path.
+        Empty git repositories are removed.
+
+        """
+        if not os.path.exists(path):
+            return True
+        git = qisrc.git.Git(path)
+        git_root = qisrc.git.get_repo_root(path)
+        if not git_root == path:
+            # Nested git projects:
+            return True
+        if git.is_valid() and git.is_empty():
+            ui.warning("Removing empty git project in", src)
+            qisys.sh.rm(path)
+            return True
+        return False
+
     def _clone_missing(self, git_project, repo):
-        branch = repo.default_branch
-        clone_url = repo.clone_url
-        qisys.sh.mkdir(git_project.path, recursive=True)
-        git = qisrc.git.Git(git_project.path)
-        remote_name = repo.default_remote.name
-        try:
-            git.init()
-            git.remote("add", remote_name, clone_url)
-            git.fetch(remote_name, "--quiet")
-            git.checkout("-b", branch, "%s/%s" % (remote_name, branch))
-        except:
+        (ok, out) = _clone_repo(repo, git_project.path,
+                                git_cache=self.git_cache)
+        if not ok:
             ui.error("Cloning repo failed")
-            if git.is_empty():
-                qisys.sh.rm(git_project.path)
+            ui.info(ui.indent(out, num=2))
             self.worktree.remove_project(repo.src)
             return False
+        if out:
+            ui.warning(out)
         self.save_project_config(git_project)
         self.load_git_projects()
         return True
 
+    def clone_missing_repos(self, repos, num_jobs=1, on_added=None):
+        """ Same as calling :py:meth:`clone_missing` for each repo, but
+        ``num_jobs`` repos are cloned at the same time.
+
+        A nested repo is only cloned once the repo containing it has
+        been cloned.
+
+        :param on_added: called with each repo as soon as its project
+                         has been added to the worktree
+        :returns: the list of the repos that are now in the worktree
+
+        """
+        to_clone = [x for x in repos if self._needs_clone(self._repo_path(x),
+                                                          x.src)]
+        # clone parents before the repos nested in them:
+        deps = dict()
+        for repo in to_clone:
+            deps[repo] = [x for x in to_clone
+                          if repo.src.startswith(x.src + "/")]
+
+        lock = threading.Lock()
+        done = list()
+        git_cache = self.git_cache
+        def clone_one(repo):
+            (ok, out) = _clone_repo(repo, self._repo_path(repo),
+                                    git_cache=git_cache)
+            with lock:
+                ui.info_count(len(done), len(to_clone),
+                              ui.blue, repo.project,
+                              ui.green, "->",
+                              ui.blue, repo.src,
+                              ui.white, "(%s)" % repo.default_branch)
+                done.append(repo)
+                if not ok:
+                    ui.error("Cloning repo failed")
+                    ui.info(ui.indent(out, num=2))
+                    return False
+                if out:
+                    ui.warning(out)
+                self._add_repo(repo, cloned=True, on_added=on_added)
+            return True
+
+        job_queue = qisys.parallel.DagJobQueue(to_clone, deps,
+                                               num_workers=num_jobs)
+        job_queue.stop_on_failure = False
+        job_queue.run(clone_one)
+        for repo in job_queue.skipped:
+            ui.error("Not cloning", repo.src,
+                     "because the repo containing it could not be cloned")
+        cloned = [x for x in to_clone if job_queue.results.get(x)]
+
+        res = list()
+        for repo in repos:
+            if repo in to_clone and repo not in cloned:
+                continue
+            if repo not in to_clone:
+                self._add_repo(repo, cloned=False, on_added=on_added)
+            res.append(repo)
+        return res
+
+    def _add_repo(self, repo, cloned=True, on_added=None):
+        """ Helper for clone_missing_repos """
+        worktree_project = self.worktree.add_project(repo.src)
+        if cloned:
+            git_project = qisrc.project.GitProject(self, worktree_project)
+            self.save_project_config(git_project)
+        self.load_git_projects()
+        if on_added:
+            on_added(repo)
+
+    def _repo_path(self, repo):
+        """ The native path where the repo should be cloned """
+        return qisys.sh.to_native_path(os.path.join(self.root, repo.src))
+
     def move_repo(self, repo, new_src):
         """ Move a project in the worktree (same remote url, different
         src)
@@ -346,5 +462,35 @@ Tips:
 """
     ui.warning(mess.format(worktree=worktree, groups=groups) + tips)
 
+def _clone_repo(repo, path, git_cache=None):
+    """ Clone a repository in the given path, without
+    displaying anything, so that it can be called from
+    several threads at once.
+
+    :param git_cache: a :py:class:`qisrc.git_cache.GitCache`
+                      to borrow objects from, if any
+    :returns: a ``(success, output)`` tuple
+
+    """
+    branch = repo.default_branch
+    remote_name = repo.default_remote.name
+    qisys.sh.mkdir(path, recursive=True)
+    git = qisrc.git.Git(path)
+    with git.transaction() as transaction:
+        git.init()
+    output = transaction.output
+    if transaction.ok:
+        with qisrc.git_cache.borrowed_objects(git_cache, path,
+                                              repo.clone_url) as warnings:
+            with git.transaction() as transaction:
+                git.remote("add", remote_name, repo.clone_url)
+                git.fetch(remote_name, "--quiet")
+                git.checkout("-b", branch, "%s/%s" % (remote_name, branch))
+        output = "".join(warnings) + transaction.output
+    if not transaction.ok and git.is_empty():
+        qisys.sh.rm(path)
+    return (transaction.ok, output)
+
+
 class NoSuchGitProject(Exception):
     pass
@@ -3,16 +3,28 @@
 """
 
 import sys
+import subprocess
+import threading
+
 from qisys import ui
 import qisys.command
+import qisys.parallel
 import qisys
 
-def foreach(projects, cmd, ignore_errors=True):
+def foreach(projects, cmd, ignore_errors=True, num_jobs=1, interleave=False):
     """ Execute the command on every project
     :param ignore_errors: whether to stop at first
     failure
+    :param num_jobs: number of projects on which the command
+                     runs at the same time
+    :param interleave: when running several commands at once,
+                       display their output as it comes, prefixed by
+                       the project name, instead of project by project
 
     """
+    if num_jobs > 1:
+        return foreach_parallel(projects, cmd, ignore_errors=ignore_errors,
+                                num_jobs=num_jobs, interleave=interleave)
     errors = list()
     ui.info(ui.green, "Running `%s` on every project" % " ".join(cmd))
     for i, project in enumerate(projects):
@@ -26,6 +38,10 @@ def foreach(projects, cmd, ignore_errors=True):
                 continue
             else:
                 raise
+    print_errors(errors)
+
+def print_errors(errors):
+    """ Print the projects on which the command failed, and exit """
     if not errors:
         return
     print
@@ -33,3 +49,95 @@ def foreach(projects, cmd, ignore_errors=True):
     for project in errors:
         ui.info(ui.green, " * ", ui.reset, ui.blue, project.src)
     sys.exit(1)
+
+def foreach_parallel(projects, cmd, ignore_errors=True, num_jobs=2,
+                     interleave=False):
+    """ Same as :py:func:`foreach`, but the command runs
+    on ``num_jobs`` projects at the same time.
+
+    The output of each command is captured, and displayed project by
+    project in the original order, or line by line if ``interleave``
+    is True.
+
+    """
+    ui.info(ui.green, "Running `%s` on every project" % " ".join(cmd))
+    exe_full_path = qisys.command.find_program(cmd[0])
+    if not exe_full_path:
+        raise qisys.command.NotInPath(cmd[0])
+    cmd = [exe_full_path] + cmd[1:]
+    projects = list(projects)
+    lock = threading.Lock()
+    outputs = dict()
+    # used to display the projects in order
+    displayed = list()
+
+    def display_finished():
+        """ Display the output of the finished projects that
+        come next in the list
+
+        """
+        while len(displayed) < len(projects):
+            i = len(displayed)
+            project = projects[i]
+            if project not in outputs:
+                return
+            (out, error) = outputs[project]
+            ui.info_count(i, len(projects), ui.blue, project.src)
+            if out:
+                ui.info(out, end="")
+            if error:
+                ui.error(error)
+            displayed.append(project)
+
+    def run_one(project):
+        lines = list()
+        try:
+            error = run_command(project, lines)
+        except Exception, e:
+            error = e
+        with lock:
+            if interleave:
+                if error:
+                    ui.error("[%s]" % project.src, error)
+            else:
+                # always store something, otherwise the output of the
+                # next projects would never be displayed
+                outputs[project] = ("".join(lines), error)
+                display_finished()
+        if error:
+            raise error
+
+    def run_command(project, lines):
+        """ Run the command, storing its output in ``lines``
+
+        :return: an exception if the command failed, else None
+
+        """
+        process = subprocess.Popen(cmd, cwd=project.path,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT)
+        for line in iter(process.stdout.readline, ""):
+            if interleave:
+                with lock:
+                    ui.info(ui.blue, "[%s]" % project.src, ui.reset,
+                            line, end="")
+            else:
+                lines.append(line)
+        process.stdout.close()
+        returncode = process.wait()
+        if returncode != 0:
+            return qisys.command.CommandFailedException(cmd, returncode,
+                                                        project.path)
+        return None
+
+    job_queue = qisys.parallel.JobQueue(projects, num_workers=num_jobs)
+    job_queue.stop_on_failure = not ignore_errors
+    job_queue.run(run_one)
+    if job_queue.failed and not ignore_errors:
+        failed_projects = [x[0] for x in job_queue.failed]
+        first = [x for x in projects if x in failed_projects][0]
+        errors = dict(job_queue.failed)
+        raise errors[first]
+    failed_projects = [x[0] for x in job_queue.failed]
+    errors = [x for x in projects if x in failed_projects]
+    print_errors(errors)
@@ -8,10 +8,14 @@
 
 import os
 import sys
+import collections
 import contextlib
+import errno
+import select
 import subprocess
 import signal
 import threading
+import time
 import Queue
 
 from qisys import ui
@@ -23,6 +27,14 @@ _FIND_PROGRAM_CACHE = dict()
 
 SIGINT_EVENT = threading.Event()
 
+# Set by get_process_supervisor()
+_PROCESS_SUPERVISOR = None
+_PROCESS_SUPERVISOR_LOCK = threading.Lock()
+
+# bounds of ProcessSupervisor._exiting_timeout
+_MIN_EXITING_TIMEOUT = 10
+_MAX_EXITING_TIMEOUT = 1000
+
 class Process:
     """ A simple way to run commands.
 
@@ -31,6 +43,10 @@ class Process:
     process and wait 5 seconds for it to terminate alone (timeout). If it
     doesn't stop by itself, it will kill the group of process (created with
     subprocess) to exterminate it. Process is then considered to be a zombie.
+
+    The output of the process is read while it runs. Set ``max_out_size``
+    to only keep its last bytes in memory, and ``out_log`` to the path
+    of a file where to write the whole output.
     """
 
     OK          = 0
@@ -49,70 +65,150 @@ class Process:
         self._process = None
         self.exception = None
         self.return_type = Process.FAILED
+        self.max_out_size = None
+        self.out_log = None
+        # size of the whole output, even if only the end is kept
+        self.out_size = 0
+        self._chunks = collections.deque()
+        self._chunks_size = 0
+        self._out_log_fp = None
+        self._done = None
 
     def run(self, timeout=None):
-        def target():
-            ui.debug("Starting thread.")
-            ui.debug("Calling:", subprocess.list2cmdline(self.cmd))
-            try:
-                opts = dict()
-                if os.name == 'posix':
-                    opts = {
-                        'preexec_fn': os.setsid,
-                        'close_fds': True
-                    }
-                elif os.name == 'nt':
-                    opts = {
-                        'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP,
-                    }
-                self._process = subprocess.Popen(self.cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    cwd=self.cwd,
-                    env=self.env,
-                    **opts)
-            except Exception, e:
-                self.exception = e
-                self.return_type = Process.NOT_RUN
+        ui.debug("Calling:", subprocess.list2cmdline(self.cmd))
+        # open the log before starting the process, so that nothing
+        # can fail while the output of the process is not being read
+        if self.out_log:
+            self._out_log_fp = open(self.out_log, "wb")
+        try:
+            opts = dict()
+            if os.name == 'posix':
+                opts = {
+                    'preexec_fn': os.setsid,
+                    'close_fds': True
+                }
+            elif os.name == 'nt':
+                opts = {
+                    'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP,
+                }
+            self._process = subprocess.Popen(self.cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cwd=self.cwd,
+                env=self.env,
+                **opts)
+        except Exception, e:
+            if self._out_log_fp:
+                self._out_log_fp.close()
+            self.exception = e
+            self.return_type = Process.NOT_RUN
+            return
+        self._done = threading.Event()
+        if os.name == 'posix':
+            get_process_supervisor().add(self)
+        else:
+            # select() does not work with pipes on Windows
+            thread = threading.Thread(target=self._communicate)
+            thread.daemon = True
+            thread.start()
+        if timeout is not None:
+            deadline = time.time() + timeout
+        while not self._done.is_set():
+            if SIGINT_EVENT.is_set():
+                self._interrupt()
                 return
-            self.out = self._process.communicate()[0]
-            self.returncode = self._process.returncode
-            if self.returncode == 0:
-                ui.debug("Setting return code to Process.OK")
-                self.return_type = Process.OK
-            ui.debug("Thread terminated.")
-
-        self._thread = threading.Thread(target=target)
-        self._thread.start()
-        while ((timeout is None or 0 < timeout) and self._thread.is_alive() and
-               not SIGINT_EVENT.is_set()):
-            self._thread.join(1)
+            # SIGINT_EVENT can not wake us up, so check it regularly
+            to_wait = 0.1
             if timeout is not None:
-                timeout -= 1
-        if not self._thread.is_alive():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    ui.debug("Process timed out")
+                    self._kill_subprocess()
+                    return
+                to_wait = min(to_wait, remaining)
+            self._done.wait(to_wait)
+
+    def _communicate(self):
+        while True:
+            data = self._process.stdout.read(65536)
+            if not data:
+                break
+            self._on_output(data)
+        self._process.stdout.close()
+        self._process.wait()
+        self._on_exit()
+
+    def _on_output(self, data):
+        """ Called each time the process writes something """
+        self.out_size += len(data)
+        if self._out_log_fp:
+            self._out_log_fp.write(data)
+        self._chunks.append(data)
+        self._chunks_size += len(data)
+        if self.max_out_size is None:
             return
-        elif SIGINT_EVENT.is_set():
-            self._interrupt()
-        else:
-            ui.debug("Process timed out")
-            self._kill_subprocess()
+        # drop the chunks that are no longer in the last max_out_size bytes
+        while len(self._chunks) > 1 and \
+              self._chunks_size - len(self._chunks[0]) >= self.max_out_size:
+            self._chunks_size -= len(self._chunks.popleft())
+
+    def _on_exit(self):
+        """ Called once the process has exited and its output
+        has been read
+
+        """
+        self.out = "".join(self._chunks)
+        self._chunks.clear()
+        if self.max_out_size is not None and len(self.out) > self.max_out_size:
+            self.out = self.out[len(self.out) - self.max_out_size:]
+        if self._out_log_fp:
+            self._out_log_fp.close()
+        self.returncode = self._process.returncode
+        if self.returncode == 0:
+            ui.debug("Setting return code to Process.OK")
+            self.return_type = Process.OK
+        self._done.set()
+
+    def _on_error(self, error):
+        """ Called when the output of the process could not be handled.
+        The process is killed, and :py:meth:`run` returns
+
+        """
+        self.exception = error
+        self.return_type = Process.FAILED
+        try:
+            self._process.stdout.close()
+        except Exception:
+            pass
+        if os.name == 'posix':
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        try:
+            self._process.wait()
+        except OSError:
+            pass
+        self.returncode = self._process.returncode
+        self.out = "".join(self._chunks)
+        if self._out_log_fp:
+            self._out_log_fp.close()
+        self._done.set()
 
     def _kill_subprocess(self):
-        if self._thread and self._process:
+        if self._process:
             self.return_type = Process.TIME_OUT
             ui.debug("Terminating process")
             try:
                 self._process.terminate()
             except Exception:
-                pass
-            ui.debug("Terminating process failed")
-            self._thread.join(5)
-            if self._thread.is_alive():
+                ui.debug("Terminating process failed")
+            if not self._done.wait(5):
                 ui.debug("Killing zombies")
                 self._destroy_zombie()
 
     def _interrupt(self):
-        if self._process and self._thread.is_alive():
+        if self._process and not self._done.is_set():
             self._destroy_zombie()
         self.return_type = Process.INTERRUPTED
 
@@ -120,12 +216,148 @@ class Process:
         if not self._process:
             pass
         elif os.name == 'posix':
-            os.killpg(self._process.pid, signal.SIGKILL)
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)
+            except OSError:
+                # already gone
+                pass
         elif os.name == 'nt':
             # pylint: disable-msg=E1101
             os.kill(self._process.pid, signal.CTRL_BREAK_EVENT)
         self.return_type = Process.ZOMBIE
-        self._thread.join()
+        self._done.wait()
+
+
+class ProcessSupervisor(object):
+    """ Read the output of the running :py:class:`Process` instances
+    and notice when they exit, all from a single thread using
+    ``select.poll()``, so that running many processes at once does
+    not require one thread per process.
+
+    Use :py:func:`get_process_supervisor` to get the instance shared by
+    the whole program.
+
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._new = list()
+        # read end of the pipe of each running process -> Process
+        self._by_fd = dict()
+        # processes whose output is closed, but which have not exited yet
+        self._exiting = list()
+        # how long to wait before checking them again, in ms
+        self._exiting_timeout = _MIN_EXITING_TIMEOUT
+        # used to wake up the thread when a process is added
+        (self._wakeup_read, self._wakeup_write) = os.pipe()
+
+    def add(self, process):
+        """ Start supervising a process started by :py:meth:`Process.run` """
+        with self._lock:
+            self._new.append(process)
+            if not self._thread:
+                self._thread = threading.Thread(target=self._loop,
+                                                name="ProcessSupervisor")
+                self._thread.daemon = True
+                self._thread.start()
+        os.write(self._wakeup_write, "x")
+
+    def _loop(self):
+        poller = select.poll()
+        poller.register(self._wakeup_read, select.POLLIN)
+        while True:
+            # processes usually exit right after closing their output,
+            # but some keep running: check them less and less often.
+            # (reaping them on SIGCHLD would need a signal handler in the
+            # main thread, and would interrupt system calls everywhere)
+            if self._exiting:
+                poll_timeout = self._exiting_timeout
+                self._exiting_timeout = min(self._exiting_timeout * 2,
+                                            _MAX_EXITING_TIMEOUT)
+            else:
+                poll_timeout = None
+            try:
+                events = poller.poll(poll_timeout)
+            except select.error as e:
+                if e.args[0] == errno.EINTR:
+                    continue
+                raise
+            for (fd, event) in events:
+                if fd == self._wakeup_read:
+                    os.read(fd, 4096)
+                    with self._lock:
+                        new = self._new
+                        self._new = list()
+                    for process in new:
+                        try:
+                            process_fd = process._process.stdout.fileno()
+                            self._by_fd[process_fd] = process
+                            poller.register(process_fd, select.POLLIN)
+                        except Exception, e:
+                            process._on_error(e)
+                    continue
+                process = self._by_fd.get(fd)
+                if process is None:
+                    # already removed
+                    _unregister(poller, fd)
+                    continue
+                # an error while handling a process must not stop the
+                # supervision of the others:
+                try:
+                    self._handle_event(poller, fd, event, process)
+                except Exception, e:
+                    self._remove(poller, fd)
+                    process._on_error(e)
+            for process in self._exiting[:]:
+                try:
+                    if process._process.poll() is None:
+                        continue
+                    self._exiting.remove(process)
+                    process._on_exit()
+                except Exception, e:
+                    if process in self._exiting:
+                        self._exiting.remove(process)
+                    process._on_error(e)
+
+    def _handle_event(self, poller, fd, event, process):
+        """ Read the output of a process, or notice that it is closed """
+        if event & select.POLLNVAL:
+            raise Exception("Output of the process is no longer valid")
+        try:
+            data = os.read(fd, 65536)
+        except OSError:
+            # POLLERR, for instance
+            data = ""
+        if data:
+            process._on_output(data)
+            return
+        self._remove(poller, fd)
+        process._process.stdout.close()
+        self._exiting.append(process)
+        self._exiting_timeout = _MIN_EXITING_TIMEOUT
+
+    def _remove(self, poller, fd):
+        """ Stop watching the given fd """
+        _unregister(poller, fd)
+        self._by_fd.pop(fd, None)
+
+
+def _unregister(poller, fd):
+    try:
+        poller.unregister(fd)
+    except (KeyError, ValueError):
+        pass
+
+def get_process_supervisor():
+    """ Get the :py:class:`ProcessSupervisor` shared by every
+    :py:class:`Process`
+
+    """
+    global _PROCESS_SUPERVISOR
+    with _PROCESS_SUPERVISOR_LOCK:
+        if not _PROCESS_SUPERVISOR:
+            _PROCESS_SUPERVISOR = ProcessSupervisor()
+        return _PROCESS_SUPERVISOR
 
 def str_from_signal(code):
     """ Return a description about what happened when the
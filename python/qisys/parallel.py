@@ -0,0 +1,219 @@
+## Copyright (c) 2012-2014 Aldebaran Robotics. All rights reserved.
+## Use of this source code is governed by a BSD-style license that can be
+## found in the COPYING file.
+
+""" Tools to run jobs in parallel using a pool of worker threads
+
+"""
+
+import sys
+import threading
+import Queue
+
+import qisys.command
+
+
+class DagJobQueue(object):
+    """ Run a job for each node of a dependency graph, using
+    a pool of worker threads.
+
+    A node is started as soon as all the nodes it depends on are
+    done. When several nodes are ready at the same time, they are
+    started in the order given to the constructor, so using a
+    topological order with ``num_workers=1`` behaves exactly like
+    a sequential loop.
+
+    :param nodes: the list of nodes to process
+    :param deps: a dict ``node -> list of nodes``. Dependencies
+                 that are not in ``nodes`` are ignored
+
+    After :py:meth:`run` has been called:
+
+    * ``done`` contains the nodes that were successfully processed
+    * ``results`` is a dict ``node -> value returned by the job``
+    * ``failed`` contains ``(node, exception)`` tuples
+    * ``skipped`` contains the nodes that were never started, either
+      because one of their dependencies failed, or because
+      ``stop_on_failure`` is True
+
+    """
+    def __init__(self, nodes, deps, num_workers=1):
+        self.nodes = list(nodes)
+        known = set(self.nodes)
+        self.deps = dict()
+        for node in self.nodes:
+            node_deps = deps.get(node, list())
+            self.deps[node] = set(x for x in node_deps
+                                  if x in known and x != node)
+        self.num_workers = max(1, num_workers)
+        self.stop_on_failure = True
+        self.num_running = 0
+        self.done = list()
+        self.results = dict()
+        self.failed = list()
+        self.skipped = list()
+
+    @property
+    def ok(self):
+        return not self.failed and not self.skipped
+
+    def run(self, func):
+        """ Call ``func(node)`` for every node.
+
+        Exceptions raised by ``func`` are stored in ``self.failed``,
+        and the nodes depending on a failed node are never started.
+
+        :return: True if every node was processed successfully
+
+        """
+        tasks = Queue.Queue()
+        results = Queue.Queue()
+        workers = list()
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=_worker_loop,
+                                      args=(func, tasks, results),
+                                      name="DagWorker#%i" % i)
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        pending = list(self.nodes)
+        finished = set()
+        broken = set()
+        stopping = False
+        try:
+            while True:
+                if stopping:
+                    self.skipped.extend(pending)
+                    pending = list()
+                else:
+                    pending = self._skip_broken(pending, broken)
+                    to_start = self._get_ready(pending, finished)
+                    # update the counter before anything is started, so
+                    # that jobs can use it to know how much work is going
+                    # on in parallel
+                    self.num_running += len(to_start)
+                    for node in to_start:
+                        pending.remove(node)
+                        tasks.put(node)
+                if not self.num_running:
+                    break
+                node, result, error = _wait_result(results)
+                self.num_running -= 1
+                if error:
+                    self.failed.append((node, error))
+                    broken.add(node)
+                    if self.stop_on_failure:
+                        stopping = True
+                else:
+                    finished.add(node)
+                    self.done.append(node)
+                    self.results[node] = result
+        except KeyboardInterrupt:
+            # make sure processes started by qisys.command.Process
+            # are killed
+            qisys.command.SIGINT_EVENT.set()
+            raise
+        finally:
+            for worker in workers:
+                tasks.put(None)
+        return self.ok
+
+    def _get_ready(self, pending, finished):
+        """ Get the nodes that can be started right now """
+        free_slots = self.num_workers - self.num_running
+        if free_slots <= 0:
+            return list()
+        res = [x for x in pending if self.deps[x].issubset(finished)]
+        if not res and not self.num_running and pending:
+            # nothing is ready, nothing is running: there is a cycle
+            # in the graph, fall back to the given order
+            res = [pending[0]]
+        return res[:free_slots]
+
+    def _skip_broken(self, pending, broken):
+        """ Move nodes depending on a failed or skipped node
+        to self.skipped
+
+        """
+        if not broken:
+            return pending
+        changed = True
+        while changed:
+            changed = False
+            for node in pending[:]:
+                if self.deps[node] & broken:
+                    pending.remove(node)
+                    broken.add(node)
+                    self.skipped.append(node)
+                    changed = True
+        return pending
+
+
+class JobQueue(DagJobQueue):
+    """ Run a job for each item of a list, using a pool of worker
+    threads. Items are started in the given order.
+
+    Contrary to :py:class:`DagJobQueue`, a failure does not prevent
+    the other jobs from running.
+
+    """
+    def __init__(self, items, num_workers=1):
+        DagJobQueue.__init__(self, items, dict(), num_workers=num_workers)
+        self.stop_on_failure = False
+
+
+class JobBudget(object):
+    """ A fixed number of jobs shared between tasks running
+    concurrently. For instance, the value of ``-j`` given to
+    several ``cmake --build`` running at the same time
+
+    """
+    def __init__(self, total):
+        self.total = max(1, total)
+        self.available = self.total
+        self._cond = threading.Condition()
+
+    def acquire(self, wanted):
+        """ Wait until at least one job is available, then
+        take up to ``wanted`` jobs.
+
+        :return: the number of jobs taken
+
+        """
+        with self._cond:
+            while self.available == 0:
+                self._cond.wait()
+            res = min(max(1, wanted), self.available)
+            self.available -= res
+            return res
+
+    def release(self, count):
+        """ Give back jobs taken by :py:meth:`acquire` """
+        with self._cond:
+            self.available += count
+            self._cond.notify_all()
+
+
+def _worker_loop(func, tasks, results):
+    """ Consume the tasks queue until None is found """
+    while True:
+        node = tasks.get()
+        if node is None:
+            return
+        try:
+            res = func(node)
+            results.put((node, res, None))
+        except Exception, e:
+            results.put((node, None, e))
+
+def _wait_result(results):
+    """ Use a timeout so that the main thread can still
+    receive KeyboardInterrupt
+
+    """
+    while True:
+        try:
+            return results.get(True, 0.1)
+        except Queue.Empty:
+            pass
@@ -189,7 +189,7 @@ class WorkTreeProjectParser(AbstractProjectParser):
         # assume absolute path
         as_path = qisys.sh.to_native_path(project_arg)
         if os.path.exists(as_path):
-            parent_project = find_parent_project(self.worktree.projects, as_path)
+            parent_project = find_parent_project(self.worktree.path_index, as_path)
             if parent_project:
                 return [parent_project]
 
@@ -198,12 +198,17 @@ class WorkTreeProjectParser(AbstractProjectParser):
         return [project]
 
 def find_parent_project(projects, path):
-    """ Find the parent project of a given path """
-    projs = projects[:]
-    projs.reverse()
-    for project in projs:
-        if qisys.sh.is_path_inside(path, project.path):
-            return project
+    """ Find the parent project of a given path
+
+    :param projects: a list of projects, or a
+                     :py:class:`qisys.worktree.PathIndex`, which is
+                     faster when called several times with the same
+                     projects
+
+    """
+    if isinstance(projects, qisys.worktree.PathIndex):
+        return projects.find_parent(path)
+    return qisys.worktree.PathIndex(projects).find_parent(path)
 
 def find_or_add(worktree, cwd=None):
     """ If we find a qiproject.xml in a path not
@@ -41,7 +41,7 @@ class WorkTreeProject(object):
         """
         if not os.path.exists(self.qiproject_xml):
             return
-        tree = qisys.qixml.read(self.qiproject_xml)
+        tree = self.worktree.read_qiproject_xml(self.qiproject_xml)
         project_elems = tree.findall("project")
         for project_elem in project_elems:
             sub_src = qisys.qixml.parse_required_attr(project_elem, "src",
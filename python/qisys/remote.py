@@ -76,8 +76,9 @@ def authenticated_urlopen(location):
             passman.add_password(None, location, user, password)
     authhandler = urllib2.HTTPBasicAuthHandler(passman)
     opener = urllib2.build_opener(authhandler)
-    urllib2.install_opener(opener)
-    return urllib2.urlopen(location)
+    # do not use install_opener(): several threads may download
+    # files at the same time, with different credentials
+    return opener.open(location)
 
 def open_remote_location(location, timeout=10):
     """ Open a file from an url
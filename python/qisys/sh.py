@@ -12,9 +12,11 @@ import sys
 import contextlib
 import time
 import errno
+import filecmp
 import stat
 import shutil
 import tempfile
+import threading
 import subprocess
 import ntpath
 import posixpath
@@ -111,6 +113,65 @@ def write_file_if_different(data, out_path, mode="w"):
     with open(out_path, mode) as out_file:
         out_file.write(data)
 
+def write_file_atomically(data, out_path, mode="w"):
+    """ Write the data to out_path, so that other processes
+    reading out_path see either the old or the new content,
+    never a partially written file
+
+    """
+    dirname = os.path.dirname(os.path.abspath(out_path))
+    (fd, tmp_path) = tempfile.mkstemp(dir=dirname,
+                                      prefix=os.path.basename(out_path),
+                                      suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as fp:
+            fp.write(data)
+        # mkstemp creates files only readable by the user
+        if os.path.exists(out_path):
+            shutil.copymode(out_path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0644)
+        if os.name == 'nt' and os.path.exists(out_path):
+            # os.rename does not overwrite files on Windows
+            os.remove(out_path)
+        os.rename(tmp_path, out_path)
+    except:
+        rm(tmp_path)
+        raise
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """ Hold an exclusive lock on ``<path>.lock``, to be used in
+    a ``with`` statement by processes modifying the same file::
+
+        with qisys.sh.file_lock(cfg_path):
+            read_modify_and_write(cfg_path)
+
+    """
+    lock_path = path + ".lock"
+    mkdir(os.path.dirname(os.path.abspath(lock_path)), recursive=True)
+    with open(lock_path, "a") as fp:
+        if os.name == 'nt':
+            import msvcrt
+            while True:
+                # LK_LOCK gives up after 10 seconds
+                try:
+                    msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except IOError:
+                    pass
+        else:
+            import fcntl
+            fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == 'nt':
+                msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+
 
 def configure_file(in_path, out_path, copy_only=False, *args, **kwargs):
     """Configure a file.
@@ -180,9 +241,13 @@ def _handle_dirs(src, dest, root, directories, filter_fun, quiet):
     return installed
 
 
-def _handle_files(src, dest, root, files, filter_fun, quiet):
+def _handle_files(src, dest, root, files, filter_fun, quiet,
+                  mode="copy", check_contents=False, stats=None, to_copy=None):
     """ Helper function used by install()
 
+    If ``to_copy`` is a list, regular files are not installed
+    right away, but ``(src, dest)`` tuples are appended to it
+
     """
     installed = list()
     rel_root = os.path.relpath(root, src)
@@ -203,18 +268,175 @@ def _handle_files(src, dest, root, files, filter_fun, quiet):
         else:
             if os.path.lexists(fdest) and os.path.isdir(fdest):
                 raise Exception("Expecting a file but found a directory: %s" % fdest)
-            if not quiet:
-                print "-- Installing %s" % fdest
             mkdir(new_root, recursive=True)
-            # We do not want to fail if dest exists but is read only
-            # (following what `install` does, but not what `cp` does)
-            rm(fdest)
-            shutil.copy(fsrc, fdest)
             installed.append(rel_path)
+            if to_copy is not None:
+                to_copy.append((fsrc, fdest))
+                continue
+            copied = _install_file(fsrc, fdest, mode=mode,
+                                   check_contents=check_contents, stats=stats)
+            if not quiet:
+                if copied:
+                    print "-- Installing %s" % fdest
+                else:
+                    print "-- Up-to-date: %s" % fdest
     return installed
 
+def _install_files_parallel(to_copy, num_jobs, quiet=False, mode="copy",
+                            check_contents=False, stats=None):
+    """ Helper function used by install(): install the files using
+    ``num_jobs`` threads, reporting the progress instead of every
+    file
+
+    """
+    import qisys.parallel
+    # small batches make the overhead of the job queue negligible:
+    batches = [tuple(to_copy[i:i + 64]) for i in range(0, len(to_copy), 64)]
+    lock = threading.Lock()
+    done = list()
+    show_progress = not quiet and sys.stdout.isatty()
+
+    def install_batch(batch):
+        batch_stats = InstallStats()
+        for (fsrc, fdest) in batch:
+            _install_file(fsrc, fdest, mode=mode,
+                          check_contents=check_contents, stats=batch_stats)
+        with lock:
+            if stats is not None:
+                stats.add(batch_stats)
+            done.extend(batch)
+            if show_progress:
+                sys.stdout.write("-- Installing files (%i/%i)\r" %
+                                 (len(done), len(to_copy)))
+                sys.stdout.flush()
+
+    job_queue = qisys.parallel.JobQueue(batches, num_workers=num_jobs)
+    job_queue.run(install_batch)
+    if show_progress:
+        sys.stdout.write("\n")
+    if job_queue.failed:
+        raise job_queue.failed[0][1]
+
+
+class InstallStats(object):
+    """ Count the files copied and skipped by :py:func:`install` """
+    def __init__(self):
+        self.num_copied = 0
+        self.bytes_copied = 0
+        self.num_skipped = 0
+        self.bytes_skipped = 0
+
+    def add(self, other):
+        """ Add the counts of an other InstallStats """
+        self.num_copied += other.num_copied
+        self.bytes_copied += other.bytes_copied
+        self.num_skipped += other.num_skipped
+        self.bytes_skipped += other.bytes_skipped
+
+    def __str__(self):
+        return "%i files installed (%s), %i files up to date (%s)" % (
+            self.num_copied, _human_size(self.bytes_copied),
+            self.num_skipped, _human_size(self.bytes_skipped))
+
+
+def _human_size(num_bytes):
+    size = float(num_bytes)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    if unit == "B":
+        return "%i B" % num_bytes
+    return "%.1f %s" % (size, unit)
+
+def _install_file(src, dest, mode="copy", check_contents=False, stats=None):
+    """ Install a file, unless the destination is already up to date.
+    See :py:func:`install` for the meaning of ``mode`` and ``check_contents``
+
+    :return: True if the file was installed, False if it was skipped
+
+    """
+    src_stat = os.stat(src)
+    if _is_installed(src, src_stat, dest, check_contents):
+        if stats:
+            stats.num_skipped += 1
+            stats.bytes_skipped += src_stat.st_size
+        return False
+    # We do not want to fail if dest exists but is read only
+    # (following what `install` does, but not what `cp` does)
+    rm(dest)
+    done = False
+    if mode == "hardlink":
+        try:
+            os.link(src, dest)
+            done = True
+        except (AttributeError, OSError):
+            # not supported on this platform, or on another file system
+            pass
+    elif mode == "clone":
+        done = _clone_file(src, dest)
+    if not done:
+        # copy2 also copies the modification time, so that the next
+        # install knows the file is up to date
+        shutil.copy2(src, dest)
+    if stats:
+        stats.num_copied += 1
+        stats.bytes_copied += src_stat.st_size
+    return True
 
-def install(src, dest, filter_fun=None, quiet=False):
+def _is_installed(src, src_stat, dest, check_contents=False):
+    """ Whether dest is a copy of src """
+    try:
+        dest_stat = os.lstat(dest)
+    except OSError:
+        return False
+    if not stat.S_ISREG(dest_stat.st_mode):
+        return False
+    if os.name == "posix" and \
+       (src_stat.st_dev, src_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+        # hard link
+        return True
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if stat.S_IMODE(src_stat.st_mode) != stat.S_IMODE(dest_stat.st_mode):
+        return False
+    if not check_contents:
+        return abs(src_stat.st_mtime - dest_stat.st_mtime) < 0.001
+    if not filecmp.cmp(src, dest, shallow=False):
+        return False
+    # so that the next install does not need to check again
+    try:
+        shutil.copystat(src, dest)
+    except OSError:
+        pass
+    return True
+
+# From linux/fs.h
+_FICLONE = 0x40049409
+
+def _clone_file(src, dest):
+    """ Create a copy-on-write clone of src. Only supported on Linux,
+    on file systems such as btrfs or xfs
+
+    :return: False if the clone could not be created
+
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    try:
+        with open(src, "rb") as src_fp:
+            with open(dest, "wb") as dest_fp:
+                fcntl.ioctl(dest_fp.fileno(), _FICLONE, src_fp.fileno())
+    except (IOError, OSError):
+        rm(dest)
+        return False
+    shutil.copystat(src, dest)
+    return True
+
+
+def install(src, dest, filter_fun=None, quiet=False,
+            mode="copy", check_contents=False, stats=None, num_jobs=1):
     """Install a directory or a file to a destination.
 
     If filter_fun is not None, then the file will only be
@@ -223,9 +445,27 @@ def install(src, dest, filter_fun=None, quiet=False):
 
     If ``dest`` does not exist, it will be created first.
 
+    Files for which the destination has the same size, permissions and
+    modification time as the source are considered up to date, and
+    are not installed again. With ``check_contents``, the contents of
+    files having the same size are compared instead of their
+    modification times.
+
     When installing files, if the destination already exists,
     it will be removed first, then overwritten by the new file.
 
+    :param mode: "copy" (the default), "hardlink" to create hard
+                 links instead of copies, or "clone" to create copy-on-write
+                 clones (Linux only). When this is not possible, files are
+                 copied.
+                 Beware that with hard links, modifying an installed file
+                 also modifies the source.
+    :param stats: a :py:class:`InstallStats` instance to update
+    :param num_jobs: number of files to install at the same time. When
+                     greater than one, directories and links are created
+                     first, and only the progress is displayed instead
+                     of every file
+
     This function will preserve relative symlinks between directories,
     used for instance in Mac frameworks::
 
@@ -255,10 +495,18 @@ def install(src, dest, filter_fun=None, quiet=False):
     if os.path.isdir(src):
         if src == dest:
             raise Exception("source and destination are the same directory")
+        to_copy = None
+        if num_jobs > 1:
+            to_copy = list()
         for (root, dirs, files) in os.walk(src):
             dirs = _handle_dirs (src, dest, root, dirs,  filter_fun, quiet)
-            files = _handle_files(src, dest, root, files, filter_fun, quiet)
+            files = _handle_files(src, dest, root, files, filter_fun, quiet,
+                                  mode=mode, check_contents=check_contents,
+                                  stats=stats, to_copy=to_copy)
             installed.extend(files)
+        if to_copy:
+            _install_files_parallel(to_copy, num_jobs, quiet=quiet, mode=mode,
+                                    check_contents=check_contents, stats=stats)
     else:
         # Emulate posix `install' behavior:
         # if dest is a dir, install in the directory, else
@@ -268,12 +516,10 @@ def install(src, dest, filter_fun=None, quiet=False):
         if src == dest:
             raise Exception("source and destination are the same file")
         mkdir(os.path.dirname(dest), recursive=True)
-        if sys.stdout.isatty() and not quiet:
+        copied = _install_file(src, dest, mode=mode,
+                               check_contents=check_contents, stats=stats)
+        if sys.stdout.isatty() and not quiet and copied:
             print "-- Installing %s" % dest
-        # We do not want to fail if dest exists but is read only
-        # (following what `install` does, but not what `cp` does)
-        rm(dest)
-        shutil.copy(src, dest)
         installed.append(os.path.basename(src))
     return installed
 
@@ -591,6 +837,12 @@ def change_cwd(directory):
     os.chdir(previous_cwd)
 
 
+# used by is_runtime:
+_NON_RUNTIME_LIB_EXTS = (".a", ".lib", ".la", ".pc")
+_NON_RUNTIME_SHARE_DIRS = (os.path.join("share", "cmake"),
+                           os.path.join("share", "man"))
+_RUNTIME_BIN_EXTS = (".exe", ".dll")
+
 def is_runtime(filename):
     """ Filter function to only install runtime components of packages
 
@@ -599,34 +851,20 @@ def is_runtime(filename):
     # Maybe a user-generated MANIFEST at the root of the package path
     # would be better?
 
-    basename = os.path.basename(filename)
-    basedir = filename.split(os.path.sep)[0]
     if filename.startswith("bin"):
         if sys.platform.startswith("win"):
-            if filename.endswith(".exe"):
-                return True
-            if filename.endswith(".dll"):
-                return True
-            else:
-                return False
-        else:
-            return True
-    if filename.startswith("lib"):
-        if filename.endswith((".a", ".lib", ".la", ".pc")):
-            return False
+            return filename.endswith(_RUNTIME_BIN_EXTS)
         return True
-    if filename.startswith(os.path.join("share", "cmake")):
-        return False
-    if filename.startswith(os.path.join("share", "man")):
+    if filename.startswith("lib"):
+        return not filename.endswith(_NON_RUNTIME_LIB_EXTS)
+    if filename.startswith(_NON_RUNTIME_SHARE_DIRS):
         return False
+    basedir = filename.split(os.path.sep, 1)[0]
     if basedir == "share":
         return True
     if basedir == "include":
         # exception for python:
-        if filename.endswith("pyconfig.h"):
-            return True
-        else:
-            return False
+        return filename.endswith("pyconfig.h")
     if basedir.endswith(".framework"):
         return True
 
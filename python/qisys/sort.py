@@ -4,21 +4,37 @@
 
 """ Topological sort
 
+Graphs are given as dictionaries ``node -> iterable of dependencies``.
+Every function here is iterative and runs in linear time in the
+size of the graph, so deep or large graphs are not a problem.
+
 """
 
-__all__ = [ "DagError", "assert_dag", "topological_sort" ]
+__all__ = [ "DagError", "assert_dag", "topological_sort", "find_cycles" ]
 
 class DagError(Exception):
-    """ Dag Exception """
-    def __init__(self, node, parent, result):
+    """ Dag Exception
+
+    ``cycles`` contains every cycle found in the graph, each of them as
+    a list of nodes, (``['a', 'b']`` means that ``a`` depends on ``b``
+    and ``b`` depends on ``a``)
+
+    """
+    def __init__(self, node, parent, result, cycles=None):
         Exception.__init__(self)
         self.node   = node
         self.parent = parent
         self.result = result
+        if cycles is None:
+            cycles = [result]
+        self.cycles = cycles
 
     def __str__(self):
-        return "Circular dependency error: Starting from '%s', node '%s' depends on '%s', complete path %s" \
+        mess = "Circular dependency error: Starting from '%s', node '%s' depends on '%s', complete path %s" \
                % (self.node, self.parent, self.node, self.result)
+        for cycle in self.cycles[1:]:
+            mess += "\nOther cycle: %s" % " -> ".join(cycle + cycle[:1])
+        return mess
 
 def assert_dag(data):
     """ Check if data is a dag
@@ -34,11 +50,33 @@ def assert_dag(data):
     ...   'e' : ( 'e', 'c' )})
     Traceback (most recent call last):
         ...
-    DagError: Circular dependency error: Starting from 'e', node 'e' depends on 'e', complete path []
+    DagError: Circular dependency error: Starting from 'e', node 'e' depends on 'e', complete path ['e']
     """
+    cycles = find_cycles(data)
+    if cycles:
+        first = cycles[0]
+        raise DagError(first[0], first[-1], first, cycles=cycles)
 
-    for node, _ in data.items():
-        _topological_sort(data, node, node, True)
+def find_cycles(data):
+    """ Find the cycles of the graph, in one pass.
+
+    Return a list of cycles, each cycle being a list of nodes
+    in dependency order, starting with the first node found
+
+    >>> find_cycles({
+    ...   'a' : ( 'b', ),
+    ...   'b' : ( 'a', 'c' ),
+    ...   'c' : ( 'c', )})
+    [['a', 'b'], ['c']]
+
+    """
+    cycles = list()
+    def on_cycle(path):
+        cycles.append(path)
+    visited = set()
+    for node in sorted(data):
+        _visit(data, node, visited, list(), on_cycle=on_cycle)
+    return cycles
 
 def topological_sort(data, heads):
     """ Topological sort
@@ -107,36 +145,51 @@ def topological_sort(data, heads):
     ...   'e' : ( 'g', 'c' )}, [ 'a', 'q' ])
     ['g', 'c', 'e', 'b', 'd', 'a', 'u', 'y', 'o', 'i', 'q']
     """
-    if isinstance(heads, list):
-        data['internalfakehead'] = heads
-        head = 'internalfakehead'
-        result =  _topological_sort(data, head, head)
-        return [ x for x in result if x != 'internalfakehead' ]
-    else:
-        head = heads
-        return _topological_sort(data, head, head)
-
-def _topological_sort(data, head, top_node, raise_exception = False, result = None, visited = None):
-    """ Internal function
+    if not isinstance(heads, list):
+        heads = [heads]
+    result = list()
+    visited = set()
+    for head in heads:
+        _visit(data, head, visited, result)
+    return result
+
+def _visit(data, head, visited, result, on_cycle=None):
+    """ Iterative depth-first search starting from head.
+
+    Nodes are appended to result once all their dependencies have
+    been appended. Already visited nodes are skipped, so the search
+    never loops, and on_cycle(path) is called for every dependency
+    going back to a node of the current path
+
     """
-    if not result:
-        result = []
-    if not visited:
-        visited = []
-    deps = data.get(head, list())
     if head in visited:
-        if head == top_node and raise_exception:
-            raise DagError(head, head, result)
-        return result
-    visited.append(head)
-    for i in deps:
-        try:
-            result.index(i)
-        except ValueError:
-            #the item does not exist
-            result = _topological_sort(data, i, top_node, raise_exception, result, visited)
-    result.append(head)
-    return result
+        return
+    visited.add(head)
+    # the current path, and the position of each of its nodes,
+    # used to report cycles
+    path = [head]
+    on_path = {head: 0}
+    stack = [iter(data.get(head, list()))]
+    while stack:
+        node = None
+        for dep in stack[-1]:
+            if dep in visited:
+                if on_cycle and dep in on_path:
+                    on_cycle(path[on_path[dep]:])
+                continue
+            node = dep
+            break
+        if node is None:
+            # every dependency is done
+            stack.pop()
+            done = path.pop()
+            del on_path[done]
+            result.append(done)
+            continue
+        visited.add(node)
+        on_path[node] = len(path)
+        path.append(node)
+        stack.append(iter(data.get(node, list())))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+import sys
+import time
+
+import pytest
+
+import qisys.command
+import qisys.parallel
+
+from qisys.test.conftest import skip_on_win
+
+def run_python(code, timeout=None):
+    process = qisys.command.Process([sys.executable, "-c", code])
+    process.run(timeout=timeout)
+    return process
+
+def test_process_ok():
+    process = run_python("import sys; sys.stdout.write('hello')")
+    assert process.return_type == qisys.command.Process.OK
+    assert process.returncode == 0
+    assert process.out == "hello"
+
+def test_process_failed():
+    process = run_python("import sys; sys.stderr.write('oops'); sys.exit(2)")
+    assert process.return_type == qisys.command.Process.FAILED
+    assert process.returncode == 2
+    assert process.out == "oops"
+
+def test_process_not_run(tmpdir):
+    process = qisys.command.Process([tmpdir.join("nonexisting").strpath])
+    process.run()
+    assert process.return_type == qisys.command.Process.NOT_RUN
+
+def test_large_output():
+    process = run_python("print 'x' * 1000000")
+    assert process.return_type == qisys.command.Process.OK
+    assert len(process.out.strip()) == 1000000
+
+def test_timeout_is_exact():
+    start = time.time()
+    process = run_python("import time; time.sleep(10)", timeout=0.5)
+    elapsed = time.time() - start
+    assert process.return_type == qisys.command.Process.TIME_OUT
+    assert elapsed < 2
+
+@skip_on_win
+def test_zombie():
+    code = "import signal, time; "
+    code += "signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+    code += "print 'ready'; "
+    code += "time.sleep(20)"
+    process = run_python(code, timeout=1)
+    assert process.return_type == qisys.command.Process.ZOMBIE
+
+def test_many_processes_at_once():
+    processes = [qisys.command.Process([sys.executable, "-c", "print %i" % i])
+                 for i in range(20)]
+    job_queue = qisys.parallel.JobQueue(processes, num_workers=10)
+    job_queue.run(lambda x: x.run(timeout=10))
+    for i, process in enumerate(processes):
+        assert process.return_type == qisys.command.Process.OK
+        assert process.out.strip() == str(i)
+
+def test_max_out_size(tmpdir):
+    out_log = tmpdir.join("out.log")
+    process = qisys.command.Process([sys.executable, "-c",
+                                     "for i in range(100000): print i"])
+    process.max_out_size = 20
+    process.out_log = out_log.strpath
+    process.run()
+    assert process.return_type == qisys.command.Process.OK
+    full_out = out_log.read()
+    assert full_out.splitlines()[-1] == "99999"
+    assert process.out_size == len(full_out)
+    assert process.out == full_out[-20:]
+
+def test_out_log_cannot_be_written(tmpdir):
+    started = tmpdir.join("started")
+    process = qisys.command.Process([sys.executable, "-c",
+                                     "open(%r, 'w').write('')" % started.strpath])
+    process.out_log = tmpdir.join("nonexisting", "out.log").strpath
+    with pytest.raises(IOError):
+        process.run()
+    # the process was not started:
+    assert not started.check()
+
+@skip_on_win
+def test_supervisor_survives_errors():
+    class BrokenProcess(qisys.command.Process):
+        def _on_output(self, data):
+            raise KeyError("oops")
+    broken = BrokenProcess([sys.executable, "-c",
+                            "import time; print 'hello'; time.sleep(10)"])
+    start = time.time()
+    broken.run(timeout=5)
+    assert time.time() - start < 4
+    assert isinstance(broken.exception, KeyError)
+    assert broken.return_type == qisys.command.Process.FAILED
+    # the other processes are still supervised:
+    process = run_python("import sys; sys.stdout.write('hello')", timeout=5)
+    assert process.return_type == qisys.command.Process.OK
+    assert process.out == "hello"
+
+@skip_on_win
+def test_process_closing_its_output():
+    process = run_python("import os, time; os.close(1); os.close(2); "
+                         "time.sleep(2)", timeout=10)
+    assert process.return_type == qisys.command.Process.OK
+    # the supervisor did not keep waking up while the process was running:
+    supervisor = qisys.command.get_process_supervisor()
+    assert supervisor._exiting_timeout == qisys.command._MAX_EXITING_TIMEOUT
@@ -0,0 +1,73 @@
+## Copyright (c) 2012-2014 Aldebaran Robotics. All rights reserved.
+## Use of this source code is governed by a BSD-style license that can be
+## found in the COPYING file.
+
+import threading
+import time
+
+import qisys.parallel
+
+def test_deps_are_done_first():
+    deps = {
+        "hello" : ["world"],
+        "world" : ["base"],
+        "other" : ["base"],
+    }
+    lock = threading.Lock()
+    order = list()
+    def job(name):
+        time.sleep(0.01)
+        with lock:
+            order.append(name)
+    job_queue = qisys.parallel.DagJobQueue(["base", "world", "other", "hello"],
+                                           deps, num_workers=3)
+    assert job_queue.run(job)
+    assert order[0] == "base"
+    assert order.index("hello") > order.index("world")
+    assert sorted(job_queue.done) == ["base", "hello", "other", "world"]
+
+def test_single_worker_keeps_order():
+    order = list()
+    job_queue = qisys.parallel.DagJobQueue(["a", "b", "c"], dict())
+    job_queue.run(order.append)
+    assert order == ["a", "b", "c"]
+
+def test_failure_skips_dependents():
+    deps = {"hello" : ["world"]}
+    def job(name):
+        if name == "world":
+            raise Exception("world is broken")
+    job_queue = qisys.parallel.DagJobQueue(["world", "other", "hello"], deps,
+                                           num_workers=2)
+    job_queue.stop_on_failure = False
+    assert not job_queue.run(job)
+    assert job_queue.done == ["other"]
+    assert job_queue.skipped == ["hello"]
+    (node, error) = job_queue.failed[0]
+    assert node == "world"
+    assert str(error) == "world is broken"
+
+def test_cycles_do_not_hang():
+    deps = {"a" : ["b"], "b" : ["a"]}
+    job_queue = qisys.parallel.DagJobQueue(["b", "a"], deps, num_workers=2)
+    order = list()
+    assert job_queue.run(order.append)
+    assert order == ["b", "a"]
+
+def test_job_budget():
+    budget = qisys.parallel.JobBudget(4)
+    assert budget.acquire(3) == 3
+    assert budget.acquire(3) == 1
+    budget.release(3)
+    assert budget.acquire(8) == 3
+
+def test_job_queue_results():
+    def job(value):
+        if value == 2:
+            raise Exception("2 is broken")
+        return value * 10
+    job_queue = qisys.parallel.JobQueue([1, 2, 3], num_workers=3)
+    assert not job_queue.run(job)
+    assert job_queue.results == {1: 10, 3: 30}
+    assert [x[0] for x in job_queue.failed] == [2]
+    assert not job_queue.skipped
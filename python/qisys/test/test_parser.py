@@ -1,3 +1,5 @@
+import os
+
 import qisys.parsers
 import qisys.worktree
 
@@ -93,3 +95,13 @@ def test_auto_add_nested(worktree, args):
 """)
     worktree2 = qisys.worktree.WorkTree(tmpdir.strpath)
     assert len(worktree2.projects) == 3
+
+def test_find_parent_project(worktree):
+    foo = worktree.create_project("foo")
+    bar = worktree.create_project("foo/bar")
+    src = os.path.join(bar.path, "src")
+    for projects in [worktree.projects, worktree.path_index]:
+        assert qisys.parsers.find_parent_project(projects, src) == bar
+        assert qisys.parsers.find_parent_project(projects, bar.path) == bar
+        assert qisys.parsers.find_parent_project(projects, foo.path) == foo
+        assert qisys.parsers.find_parent_project(projects, worktree.root) is None
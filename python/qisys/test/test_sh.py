@@ -8,6 +8,7 @@ import sys
 import pytest
 
 import qisys.sh
+from qisys.test.conftest import skip_on_win
 from qisrc.test.conftest import TestGit
 
 def test_install_ro(tmpdir):
@@ -98,3 +99,84 @@ def test_install_qt_symlinks(tmpdir):
     dest = tmpdir.join("dest")
     qisys.sh.install(qt_src.strpath, dest.strpath, filter_fun=qisys.sh.is_runtime)
     assert dest.join("QtCore.framework").islink()
+
+def test_file_lock(tmpdir):
+    foo = tmpdir.join("foo.xml")
+    with qisys.sh.file_lock(foo.strpath):
+        foo.write("<foo />")
+    assert tmpdir.join("foo.xml.lock").check(file=True)
+    # the lock can be taken again once released
+    with qisys.sh.file_lock(foo.strpath):
+        pass
+
+def test_install_skips_up_to_date_files(tmpdir):
+    src = tmpdir.mkdir("src")
+    src.join("a.txt").write("a")
+    src.join("b.txt").write("b")
+    dest = tmpdir.join("dest")
+    stats = qisys.sh.InstallStats()
+    qisys.sh.install(src.strpath, dest.strpath, stats=stats)
+    assert (stats.num_copied, stats.num_skipped) == (2, 0)
+    stats = qisys.sh.InstallStats()
+    installed = qisys.sh.install(src.strpath, dest.strpath, stats=stats)
+    assert sorted(installed) == ["a.txt", "b.txt"]
+    assert (stats.num_copied, stats.num_skipped) == (0, 2)
+    assert stats.bytes_skipped == 2
+    # same size, but a different modification time:
+    src.join("a.txt").write("c")
+    os.utime(src.join("a.txt").strpath, (0, 0))
+    stats = qisys.sh.InstallStats()
+    qisys.sh.install(src.strpath, dest.strpath, stats=stats)
+    assert (stats.num_copied, stats.num_skipped) == (1, 1)
+    assert dest.join("a.txt").read() == "c"
+
+def test_install_check_contents(tmpdir):
+    src = tmpdir.ensure("src", "a.txt")
+    src.write("a")
+    dest = tmpdir.join("dest", "a.txt")
+    qisys.sh.install(src.strpath, dest.strpath)
+    os.utime(src.strpath, (0, 0))
+    stats = qisys.sh.InstallStats()
+    qisys.sh.install(src.strpath, dest.strpath, check_contents=True, stats=stats)
+    assert stats.num_skipped == 1
+    # modification times are now the same:
+    assert os.stat(dest.strpath).st_mtime == 0
+
+@skip_on_win
+def test_install_hardlink(tmpdir):
+    src = tmpdir.ensure("src", "a.txt")
+    src.write("a")
+    dest = tmpdir.join("dest")
+    qisys.sh.install(src.dirname, dest.strpath, mode="hardlink")
+    assert os.stat(dest.join("a.txt").strpath).st_ino == os.stat(src.strpath).st_ino
+    stats = qisys.sh.InstallStats()
+    qisys.sh.install(src.dirname, dest.strpath, mode="hardlink", stats=stats)
+    assert stats.num_skipped == 1
+
+def test_install_clone_falls_back_to_copy(tmpdir):
+    src = tmpdir.ensure("src", "a.txt")
+    src.write("a")
+    dest = tmpdir.join("dest")
+    qisys.sh.install(src.dirname, dest.strpath, mode="clone")
+    assert dest.join("a.txt").read() == "a"
+
+def test_install_parallel(tmpdir):
+    src = tmpdir.mkdir("src")
+    for i in range(200):
+        src.ensure("dir%i" % (i % 7), "sub", "file%i.txt" % i).write(str(i))
+    src.ensure("skipped", "foo.txt")
+    def filter_fun(path):
+        return not path.startswith("skipped")
+    sequential = qisys.sh.install(src.strpath, tmpdir.join("dest1").strpath,
+                                  filter_fun=filter_fun, quiet=True)
+    stats = qisys.sh.InstallStats()
+    parallel = qisys.sh.install(src.strpath, tmpdir.join("dest2").strpath,
+                                filter_fun=filter_fun, quiet=True,
+                                num_jobs=4, stats=stats)
+    assert parallel == sequential
+    assert len(parallel) == 200
+    assert stats.num_copied == 200
+    for i in range(200):
+        path = tmpdir.join("dest2", "dir%i" % (i % 7), "sub", "file%i.txt" % i)
+        assert path.read() == str(i)
+    assert not tmpdir.join("dest2", "skipped", "foo.txt").check()
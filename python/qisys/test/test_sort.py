@@ -0,0 +1,50 @@
+## Copyright (c) 2012-2014 Aldebaran Robotics. All rights reserved.
+## Use of this source code is governed by a BSD-style license that can be
+## found in the COPYING file.
+
+import qisys.sort
+
+import pytest
+
+def test_simple():
+    data = {
+        "hello" : ["world", "foo"],
+        "world" : ["foo"],
+    }
+    assert qisys.sort.topological_sort(data, ["hello"]) == \
+            ["foo", "world", "hello"]
+    # data should be left untouched
+    assert sorted(data.keys()) == ["hello", "world"]
+
+def test_several_heads():
+    data = {
+        "a" : ["b"],
+        "c" : ["b", "d"],
+    }
+    assert qisys.sort.topological_sort(data, ["a", "c"]) == \
+            ["b", "a", "d", "c"]
+
+def test_deep_graph():
+    # would hit the recursion limit with a recursive implementation
+    depth = 5000
+    data = dict(("n%i" % i, ["n%i" % (i + 1)]) for i in range(depth))
+    res = qisys.sort.topological_sort(data, ["n0"])
+    assert len(res) == depth + 1
+    assert res[0] == "n%i" % depth
+    assert res[-1] == "n0"
+    qisys.sort.assert_dag(data)
+
+def test_all_cycles_are_reported():
+    data = {
+        "a" : ["b"],
+        "b" : ["a"],
+        "c" : ["d"],
+        "d" : ["e"],
+        "e" : ["c"],
+        "f" : ["a"],
+    }
+    # pylint: disable-msg=E1101
+    with pytest.raises(qisys.sort.DagError) as e:
+        qisys.sort.assert_dag(data)
+    assert e.value.cycles == [["a", "b"], ["c", "d", "e"]]
+    assert "c -> d -> e -> c" in str(e.value)
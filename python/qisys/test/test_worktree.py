@@ -13,7 +13,9 @@ import pytest
 import mock
 
 import qisys.sh
+import qisys.qixml
 import qisys.worktree
+import qibuild.config
 
 
 def test_read_projects(tmpdir):
@@ -168,3 +170,76 @@ def test_warns_on_nested_worktrees(tmpdir, record_messages):
     work2.mkdir(".qi")
     wt2 = qisys.worktree.WorkTree(work2.strpath)
     assert record_messages.find("Nested worktrees")
+
+def test_qiproject_xml_are_cached(tmpdir):
+    a_project = tmpdir.mkdir("a")
+    tmpdir.mkdir(".qi").join("worktree.xml").write("""
+<worktree>
+    <project src="a" />
+</worktree>
+""")
+    a_project.join("qiproject.xml").write("""
+<project>
+    <project src="b" />
+</project>
+""")
+    a_project.mkdir("b")
+    worktree = qisys.worktree.WorkTree(tmpdir.strpath)
+    assert [p.src for p in worktree.projects] == ["a", "a/b"]
+    assert tmpdir.join(".qi", "qiproject.cache").check(file=True)
+
+    # unchanged files are not parsed again
+    real_read = qisys.qixml.read
+    def fake_read(xml_path):
+        assert not xml_path.endswith("qiproject.xml")
+        return real_read(xml_path)
+    with mock.patch("qisys.qixml.read", fake_read):
+        worktree = qisys.worktree.WorkTree(tmpdir.strpath)
+    assert [p.src for p in worktree.projects] == ["a", "a/b"]
+
+    # changed files are
+    a_project.join("qiproject.xml").write("""
+<project>
+    <project src="b" />
+    <project src="c" />
+</project>
+""")
+    a_project.mkdir("c")
+    worktree = qisys.worktree.WorkTree(tmpdir.strpath)
+    assert [p.src for p in worktree.projects] == ["a", "a/b", "a/c"]
+
+def test_invalid_qiproject_cache(tmpdir):
+    tmpdir.mkdir("a").join("qiproject.xml").write("<project />\n")
+    tmpdir.mkdir(".qi").join("qiproject.cache").write("this is garbage")
+    worktree = qisys.worktree.WorkTree(tmpdir.strpath)
+    worktree.add_project("a")
+    assert [p.src for p in worktree.projects] == ["a"]
+
+def test_register_self_only_writes_once(tmpdir):
+    tmpdir.join(".qi").ensure(dir=True)
+    worktree = qisys.worktree.WorkTree(tmpdir.strpath)
+    worktree.register_self()
+    cfg_path = qibuild.config.get_global_cfg_path()
+    assert worktree.root in qibuild.config.get_registered_worktrees(cfg_path)
+    with mock.patch.object(qibuild.config.QiBuildConfig, "write") as mock_write:
+        worktree.register_self()
+        assert not mock_write.called
+
+def test_register_self_keeps_other_worktrees(tmpdir):
+    cfg_path = qibuild.config.get_global_cfg_path()
+    qibuild_cfg = qibuild.config.QiBuildConfig()
+    qibuild_cfg.add_worktree("/path/to/other")
+    qibuild_cfg.write(cfg_path)
+    tmpdir.join(".qi").ensure(dir=True)
+    worktree = qisys.worktree.WorkTree(tmpdir.strpath)
+    worktree.register_self()
+    registered = qibuild.config.get_registered_worktrees(cfg_path)
+    assert "/path/to/other" in registered
+    assert worktree.root in registered
+
+def test_path_index_is_updated(worktree):
+    foo = worktree.create_project("foo")
+    assert worktree.path_index.find_parent(foo.path) == foo
+    worktree.remove_project("foo")
+    assert worktree.path_index.find_parent(foo.path) is None
+    assert worktree.get_project("foo") is None
@@ -7,6 +7,7 @@
 """
 
 import abc
+import cPickle
 import os
 import ntpath
 import posixpath
@@ -41,8 +42,11 @@ This path does not exist
         self._observers = list()
         self.root = root
         self.cache = self.load_cache()
+        self.xml_cache = QiProjectXmlCache(self)
         # Re-parse every qiproject.xml to visit the subprojects
         self.projects = list()
+        self._projects_by_src = dict()
+        self._path_index = None
         self.load_projects()
         if sanity_check:
             self.check()
@@ -52,12 +56,15 @@ This path does not exist
         """ Register to the global list of all worktrees  in
         ~/.config/qi/qibuild.xml
 
+        Nothing is written if the worktree is already registered.
+        Otherwise the file is locked while it is updated, so that
+        concurrent qibuild processes do not lose registrations
+
         """
-        qibuild_cfg = qibuild.config.QiBuildConfig()
-        to_read = qibuild.config.get_global_cfg_path()
-        qibuild_cfg.read(to_read, create_if_missing=True)
-        qibuild_cfg.add_worktree(self.root)
-        qibuild_cfg.write()
+        if self.root in qibuild.config.get_registered_worktrees():
+            return
+        with qibuild.config.edit_global_config() as qibuild_cfg:
+            qibuild_cfg.add_worktree(self.root)
 
     def register(self, observer):
         """ Called when an observer wants to be notified
@@ -108,8 +115,17 @@ This path does not exist
 
     def has_project(self, path):
         src = self.normalize_path(path)
-        srcs = (p.src for p in self.projects)
-        return src in srcs
+        return src in self._projects_by_src
+
+    @property
+    def path_index(self):
+        """ A :py:class:`PathIndex` of the projects of this worktree
+        (computed the first time it is used)
+
+        """
+        if self._path_index is None:
+            self._path_index = PathIndex(self.projects)
+        return self._path_index
 
     def load_projects(self):
         """ For every project in cache, re-read the subprojects and
@@ -127,6 +143,18 @@ This path does not exist
         for project in self.projects:
             self._rec_parse_sub_projects(project, res)
         self.projects = sorted(res, key=operator.attrgetter("src"))
+        self._projects_by_src = dict((p.src, p) for p in self.projects)
+        self._path_index = None
+        self.xml_cache.save()
+
+    def read_qiproject_xml(self, xml_path):
+        """ Read a qiproject.xml file of this worktree.
+        See :py:class:`QiProjectXmlCache`
+
+        :returns: an etree object
+
+        """
+        return self.xml_cache.read(xml_path)
 
     def _rec_parse_sub_projects(self, project, res):
         """ Recursively parse every project and subproject,
@@ -151,14 +179,12 @@ This path does not exist
 
         """
         src = self.normalize_path(src)
-        if not self.has_project(src):
-            if not raises:
-                return None
+        project = self._projects_by_src.get(src)
+        if project is None and raises:
             mess  = ui.did_you_mean("No project in '%s'\n" % src,
                                     src, [x.src for x in self.projects])
             raise WorkTreeError(mess)
-        match = (p for p in self.projects if p.src == src)
-        return match.next()
+        return project
 
     def add_project(self, path):
         """ Add a project to a worktree
@@ -264,6 +290,51 @@ def guess_worktree(cwd=None, raises=False):
     else:
         return None
 
+class PathIndex(object):
+    """ Index projects by path, so that the project containing
+    a given path can be found by walking up the parent directories
+    of the path, instead of by checking every project.
+
+    When several projects are nested, the innermost one is returned::
+
+        index = PathIndex(worktree.projects)
+        # returns the project in /path/to/worktree/foo
+        index.find_parent("/path/to/worktree/foo/src")
+
+    """
+    def __init__(self, projects=None):
+        self._by_path = dict()
+        if projects:
+            for project in projects:
+                self.add(project)
+
+    def add(self, project):
+        """ Add a project to the index. It replaces any
+        project previously added with the same path
+
+        """
+        path = qisys.sh.to_native_path(project.path)
+        self._by_path[path] = project
+
+    def find_parent(self, path):
+        """ Return the project containing the given path,
+        or None
+
+        """
+        path = qisys.sh.to_native_path(path)
+        while True:
+            project = self._by_path.get(path)
+            if project is not None:
+                return project
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+    def __len__(self):
+        return len(self._by_path)
+
+
 class WorkTreeObserver():
     """ To be subclasses for objects willing to be
     notified when a project is added or removed from
@@ -322,6 +393,76 @@ class WorkTreeCache:
             srcs.append(qisys.qixml.parse_required_attr(project_elem, "src"))
         return srcs
 
+class QiProjectXmlCache(object):
+    """ Store the parsed qiproject.xml files of a worktree in
+    .qi/qiproject.cache, so that they are parsed again only when
+    they change.
+
+    Each entry is validated by the mtime and size of its xml file,
+    so reading an unchanged file only costs a ``stat``
+
+    """
+    version = 1
+
+    def __init__(self, worktree):
+        self.worktree = worktree
+        self.cache_path = os.path.join(worktree.dot_qi, "qiproject.cache")
+        # path relative to the worktree -> (mtime, size, pickled root)
+        self.entries = dict()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """ Read the cache from disk. Errors are ignored, the
+        cache will just be re-generated
+
+        """
+        self.entries = dict()
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "rb") as fp:
+                (version, entries) = cPickle.load(fp)
+        except Exception, e:
+            ui.debug("Ignoring invalid cache", self.cache_path, e)
+            return
+        if version == self.version:
+            self.entries = entries
+
+    def read(self, xml_path):
+        """ Same as :py:func:`qisys.qixml.read`, using the cache
+        when xml_path has not changed
+
+        """
+        key = self.worktree.normalize_path(xml_path)
+        stat = os.stat(xml_path)
+        signature = (stat.st_mtime, stat.st_size)
+        entry = self.entries.get(key)
+        if entry and entry[:2] == signature:
+            root = cPickle.loads(entry[2])
+            return qisys.qixml.etree.ElementTree(root)
+        tree = qisys.qixml.read(xml_path)
+        as_str = cPickle.dumps(tree.getroot(), cPickle.HIGHEST_PROTOCOL)
+        self.entries[key] = signature + (as_str,)
+        self._dirty = True
+        return tree
+
+    def save(self):
+        """ Write the cache to disk, if something has changed """
+        if not self._dirty:
+            return
+        # forget about files that no longer exist
+        for key in self.entries.keys():
+            if not os.path.exists(os.path.join(self.worktree.root, key)):
+                del self.entries[key]
+        data = cPickle.dumps((self.version, self.entries),
+                             cPickle.HIGHEST_PROTOCOL)
+        try:
+            qisys.sh.write_file_atomically(data, self.cache_path, mode="wb")
+        except (IOError, OSError), e:
+            ui.debug("Could not write", self.cache_path, e)
+        self._dirty = False
+
 class WorkTreeError(Exception):
     """ Just a custom exception. """
 
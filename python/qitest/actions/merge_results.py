@@ -0,0 +1,55 @@
+""" Merge the test results of several runs
+
+For instance, after running::
+
+    qitest run --shard 1/2 --durations durations.json
+    qitest run --shard 2/2 --durations durations.json
+
+on two machines, and gathering their test-results directories::
+
+    qitest merge-results shard1/test-results shard2/test-results \
+        -o results.xml --durations durations.json
+
+"""
+
+import sys
+
+from qisys import ui
+import qitest.durations
+import qitest.junit
+
+def configure_parser(parser):
+    """Configure parser for this action"""
+    parser.add_argument("results", nargs="+", metavar="RESULTS",
+                        help="JUnit XML files or directories containing them")
+    parser.add_argument("-o", "--output", required=True,
+                        help="path of the merged JUnit XML file")
+    parser.add_argument("--durations", dest="durations_path",
+                        help="update this json file with the durations of "
+                             "the tests, to use with qitest run --durations")
+
+def do(args):
+    """Main entry point"""
+    xml_files = qitest.junit.find_xml_files(args.results)
+    if not xml_files:
+        ui.error("No XML file found")
+        sys.exit(1)
+    merged = qitest.junit.MergedResults()
+    for xml_file in xml_files:
+        merged.add_xml(xml_file)
+    merged.write(args.output)
+    ui.info(ui.green, "Merged", len(xml_files), "files in", ui.reset,
+            ui.bold, args.output)
+    if args.durations_path:
+        durations = qitest.durations.TestDurations(args.durations_path)
+        durations.durations.update(merged.durations)
+        durations.write()
+    ui.info("Ran %i tests in %is" % (merged.num_tests, merged.time))
+    if not merged.failures:
+        ui.info(ui.green, "All pass. Congrats!")
+        return
+    num_failed = len(merged.failures)
+    ui.error(num_failed, "failures")
+    for i, failure in enumerate(merged.failures):
+        ui.info_count(i, num_failed, ui.blue, failure)
+    sys.exit(1)
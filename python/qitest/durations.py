@@ -0,0 +1,127 @@
+""" Remember how long each test took to run, so that the
+longest tests can be started first when running tests in parallel
+
+"""
+
+import json
+import os
+
+import qisys.sh
+
+
+class TestDurations(object):
+    """ The durations of the tests of a test suite, as measured during
+    the previous runs, stored in a json file ``test name -> seconds``
+
+    """
+    def __init__(self, path):
+        self.path = path
+        self.durations = dict()
+        self.read()
+
+    def read(self):
+        """ Read the durations from the json file, if it exists """
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as fp:
+                durations = json.load(fp)
+        except ValueError:
+            # corrupted file, forget about the previous runs
+            return
+        if isinstance(durations, dict):
+            self.durations = durations
+
+    def update(self, results):
+        """ Update the durations with the ``time`` attribute of
+        :py:class:`qitest.result.TestResult` objects. Results with
+        no ``time`` are ignored
+
+        :param results: a dict ``test name -> result``
+
+        """
+        for name, result in results.iteritems():
+            if result.time is None:
+                continue
+            self.durations[name] = result.time
+
+    def write(self):
+        """ Write the durations to the json file """
+        qisys.sh.write_file_atomically(json.dumps(self.durations, indent=2),
+                                       self.path)
+
+
+def schedule(tests, durations):
+    """ Sort the tests so that the longest ones are started first.
+    Tests that never ran are started before the others, in their
+    original order, because they may be long too.
+
+    :param durations: a dict ``test name -> seconds``
+
+    """
+    unknown = [x for x in tests if durations.get(x["name"]) is None]
+    known = [x for x in tests if durations.get(x["name"]) is not None]
+    known.sort(key=lambda x: durations[x["name"]], reverse=True)
+    return unknown + known
+
+def predict_time(tests, durations, num_jobs=1):
+    """ Predict how long running the tests in the given order will take,
+    with ``num_jobs`` tests running at the same time.
+
+    Tests that never ran are assumed to take the average duration
+    of the others.
+
+    :return: a duration in seconds, or None if none of the tests
+             ran before
+
+    """
+    known = [durations[x["name"]] for x in tests
+             if durations.get(x["name"]) is not None]
+    if not known:
+        return None
+    default = float(sum(known)) / len(known)
+    # time at which each worker is done with its tests:
+    workers = [0] * max(1, num_jobs)
+    for test in tests:
+        duration = durations.get(test["name"])
+        if duration is None:
+            duration = default
+        first_free = workers.index(min(workers))
+        workers[first_free] += duration
+    return max(workers)
+
+def split(tests, durations, num_shards):
+    """ Split the tests in ``num_shards`` lists taking about the same
+    time to run, using the durations of the previous runs.
+
+    The result only depends on the names of the tests and on the
+    durations, so that several machines using the same durations
+    compute the same split.
+    Tests that never ran are assumed to take the average duration
+    of the others.
+
+    :return: a list of ``num_shards`` lists of tests, in their
+             original order
+
+    """
+    known = [durations[x["name"]] for x in tests
+             if durations.get(x["name"]) is not None]
+    if known:
+        default = float(sum(known)) / len(known)
+    else:
+        default = 1
+    def get_duration(test):
+        res = durations.get(test["name"])
+        if res is None:
+            return default
+        return res
+    # longest first, the test name is used to break ties:
+    by_duration = sorted(tests, key=lambda x: (-get_duration(x), x["name"]))
+    shard_times = [0] * num_shards
+    shard_of_test = dict()
+    for test in by_duration:
+        lightest = shard_times.index(min(shard_times))
+        shard_times[lightest] += get_duration(test)
+        shard_of_test[test["name"]] = lightest
+    return [[x for x in tests if shard_of_test[x["name"]] == i]
+            for i in range(num_shards)]
@@ -0,0 +1,83 @@
+""" Helpers to read and merge the JUnit-like XML files
+written in the test-results directories
+
+"""
+
+import os
+
+from qisys.qixml import etree
+import qisys.qixml
+import qisys.sh
+
+
+class MergedResults(object):
+    """ The results of several JUnit XML files, merged in one
+    ``<testsuites>`` element
+
+    """
+    def __init__(self):
+        self.root = etree.Element("testsuites")
+        self.root.set("name", "All")
+        self.num_tests = 0
+        self.num_errors = 0
+        self.num_disabled = 0
+        self.time = 0.0
+        # names of the failing test cases
+        self.failures = list()
+        # test name (from the file name) -> time
+        self.durations = dict()
+
+    def add_xml(self, xml_path):
+        """ Add the test suites found in an XML file """
+        root = qisys.qixml.read(xml_path).getroot()
+        test_name = os.path.splitext(os.path.basename(xml_path))[0]
+        if root.tag == "testsuite":
+            test_suites = [root]
+        else:
+            test_suites = root.findall("testsuite")
+        time = root.get("time")
+        if time is None:
+            time = sum(_float_attr(x, "time") for x in test_suites)
+        self.durations[test_name] = float(time)
+        for test_suite in test_suites:
+            self.root.append(test_suite)
+            self.num_tests += int(_float_attr(test_suite, "tests"))
+            self.num_errors += int(_float_attr(test_suite, "errors"))
+            self.num_disabled += int(_float_attr(test_suite, "disabled"))
+            self.time += _float_attr(test_suite, "time")
+            for test_case in test_suite.findall("testcase"):
+                if test_case.find("failure") is not None or \
+                   test_case.find("error") is not None:
+                    self.failures.append(test_case.get("name"))
+
+    def write(self, output):
+        """ Write the merged results to an XML file """
+        self.root.set("tests", str(self.num_tests))
+        self.root.set("failures", str(len(self.failures)))
+        self.root.set("errors", str(self.num_errors))
+        self.root.set("disabled", str(self.num_disabled))
+        self.root.set("time", str(self.time))
+        parent = os.path.dirname(os.path.abspath(output))
+        qisys.sh.mkdir(parent, recursive=True)
+        qisys.qixml.write(self.root, output)
+
+
+def find_xml_files(paths):
+    """ Get the XML files from a list of files and
+    directories, sorted by name within each directory
+
+    """
+    res = list()
+    for path in paths:
+        if os.path.isdir(path):
+            res.extend(os.path.join(path, x) for x in sorted(os.listdir(path))
+                       if x.endswith(".xml"))
+        else:
+            res.append(path)
+    return res
+
+def _float_attr(elem, name):
+    try:
+        return float(elem.get(name, 0))
+    except ValueError:
+        return 0.0
@@ -5,6 +5,7 @@
 """ Collection of parser fonctions for qitests actions
 """
 
+import argparse
 import copy
 import os
 
@@ -32,12 +33,40 @@ def test_parser(parser, with_num_jobs=True):
                         help="set number of CPU each test is allowed to use (linux)")
     group.add_argument("--nightly", action="store_true", dest="nightly")
     group.add_argument("--qitest-json", dest="qitest_jsons", action="append")
+    group.add_argument("--shard", type=parse_shard,
+                        help="only run a part of the tests, for instance "
+                             "--shard 2/3 runs the second third of the tests")
+    group.add_argument("--durations", dest="shard_durations_path",
+                        help="json file containing the durations of the "
+                             "tests, used to split the tests when using "
+                             "--shard. Every shard should use the same file")
+    group.add_argument("--gtest-split", dest="gtest_split", type=int,
+                        help="split each gtest binary in at most GTEST_SPLIT "
+                             "jobs, each of them running a part of its "
+                             "test cases")
+    group.add_argument("--output-tail", dest="output_tail", type=int,
+                        help="only keep the last OUTPUT_TAIL bytes of the output "
+                             "of each test (default: 16384)")
+    group.add_argument("--log-output", dest="log_output", action="store_true",
+                        help="write the whole output of each test "
+                             "in test-results/<name>.log")
     parser.set_defaults(nightly=False)
     if with_num_jobs:
         group.add_argument("-j", dest="num_jobs", default=1, type=int,
                             help="Number of tests to run in parallel")
     return group
 
+def parse_shard(value):
+    """ Parse the value of ``--shard``: 'K/N' -> (K, N) """
+    try:
+        (index, count) = [int(x) for x in value.split("/")]
+    except ValueError:
+        raise argparse.ArgumentTypeError("should be K/N, got '%s'" % value)
+    if not 1 <= index <= count:
+        mess = "K should be between 1 and N in K/N, got '%s'" % value
+        raise argparse.ArgumentTypeError(mess)
+    return (index, count)
+
 def get_test_runner(args, project_name=None, qitest_json=None):
     project_names = args.projects or list()
     if project_name:
@@ -87,6 +116,14 @@ def get_test_runner(args, project_name=None, qitest_json=None):
     test_runner.num_jobs = args.num_jobs
     test_runner.nightly = args.nightly
     test_runner.nightmare = args.nightmare
+    if args.output_tail is not None:
+        test_runner.output_tail = args.output_tail
+    test_runner.log_output = bool(args.log_output)
+    test_runner.shard = args.shard
+    if args.gtest_split:
+        test_runner.gtest_split = args.gtest_split
+    if args.shard_durations_path:
+        test_runner.shard_durations_path = args.shard_durations_path
 
     return test_runner
 
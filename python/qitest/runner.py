@@ -2,6 +2,8 @@ import abc
 import re
 import os
 
+from qisys import ui
+import qitest.durations
 import qitest.test_queue
 
 class TestSuiteRunner(object):
@@ -18,6 +20,12 @@ class TestSuiteRunner(object):
         self.nightly = False
         self.coverage = False
         self.nightmare = False
+        # (index, count), starting at 1, when running only
+        # a part of the tests
+        self.shard = None
+        # durations used to split the tests between shards. Only read,
+        # so that every shard computes the same split
+        self.shard_durations_path = None
         self._tests = project.tests
 
     @abc.abstractproperty
@@ -32,11 +40,44 @@ class TestSuiteRunner(object):
         Return True if and only if the whole suite passed.
 
         """
-        test_queue = qitest.test_queue.TestQueue(self.tests)
+        durations = qitest.durations.TestDurations(self.durations_path)
+        tests = self.get_jobs(self.tests)
+        test_queue = qitest.test_queue.TestQueue(tests,
+                                                 durations=durations.durations)
         test_queue.launcher = self.launcher
+        test_queue.on_jobs_done = self.on_jobs_done
         ok = test_queue.run(num_jobs=self.num_jobs)
+        if test_queue.results:
+            durations.update(test_queue.results)
+            try:
+                durations.write()
+            except (IOError, OSError) as e:
+                ui.warning("Could not save test durations:", e)
         return ok
 
+    def get_jobs(self, tests):
+        """ Get the list of tests to give to the test queue.
+        Can be re-implemented to split tests in several jobs
+
+        """
+        return tests
+
+    def on_jobs_done(self, jobs, results):
+        """ Called after the jobs returned by :py:meth:`get_jobs`
+        have run, before the summary is displayed and the durations
+        are saved
+
+        :param results: a dict ``job name -> TestResult``
+        :returns: a dict ``test name -> TestResult``
+
+        """
+        return results
+
+    @property
+    def durations_path(self):
+        """ Where to store the durations of the tests """
+        return os.path.join(self.project.sdk_directory, "qitest-durations.json")
+
     @property
     def patterns(self):
         return self._patterns
@@ -55,6 +96,16 @@ class TestSuiteRunner(object):
         # But nightly tests are run along with the normal tests
         if not self.nightly:
             res = [x for x in res if x.get("nightly", False) is False]
+        if self.shard:
+            (index, count) = self.shard
+            # Only use durations given explicitly: each machine has its
+            # own history, and every shard must compute the same split
+            durations = dict()
+            if self.shard_durations_path:
+                test_durations = qitest.durations.TestDurations(
+                    self.shard_durations_path)
+                durations = test_durations.durations
+            res = qitest.durations.split(res, durations, count)[index - 1]
         return res
 
 
@@ -22,3 +22,7 @@ def compiled_tests(build_worktree):
         tests.append(test)
     return tests
 
+
+@pytest.fixture
+def qitest_action(cd_to_tmpdir):
+    return TestAction("qitest.actions")
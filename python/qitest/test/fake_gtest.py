@@ -0,0 +1,38 @@
+""" Behaves like a gtest binary with two test suites """
+
+import sys
+
+CASES = ["Foo.one", "Foo.two", "Bar.one", "Bar.fails"]
+
+def main():
+    args = sys.argv[1:]
+    if "--gtest_list_tests" in args:
+        print "Foo.\n  one\n  two\nBar.\n  one\n  fails  # always fails"
+        return 0
+    to_run = CASES
+    output = None
+    for arg in args:
+        if arg.startswith("--gtest_filter="):
+            patterns = arg[len("--gtest_filter="):].split(":")
+            to_run = [x for x in CASES if x in patterns or
+                      x.split(".")[0] + ".*" in patterns]
+        if arg.startswith("--gtest_output=xml:"):
+            output = arg[len("--gtest_output=xml:"):]
+    failures = [x for x in to_run if x.endswith("fails")]
+    if output:
+        with open(output, "w") as fp:
+            fp.write('<testsuites tests="%i" failures="%i" time="0.1">\n' %
+                     (len(to_run), len(failures)))
+            for name in to_run:
+                fp.write('<testsuite name="%s" tests="1" failures="%i" time="0.1">\n'
+                         % (name.split(".")[0], name in failures))
+                fp.write('<testcase name="%s">' % name.split(".")[1])
+                if name in failures:
+                    fp.write('<failure message="failed"/>')
+                fp.write('</testcase></testsuite>\n')
+            fp.write('</testsuites>\n')
+    print "ran", " ".join(to_run)
+    return len(failures)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import qitest.durations
+import qitest.result
+
+def test_schedule():
+    tests = [{"name" : x} for x in ["short", "new", "long", "other_new", "medium"]]
+    durations = {"short" : 1, "long" : 10, "medium" : 5}
+    res = qitest.durations.schedule(tests, durations)
+    assert [x["name"] for x in res] == \
+        ["new", "other_new", "long", "medium", "short"]
+
+def test_predict_time():
+    tests = [{"name" : x} for x in ["long", "medium", "short", "new"]]
+    durations = {"long" : 10, "medium" : 6, "short" : 2}
+    assert qitest.durations.predict_time(tests, durations, num_jobs=1) == 24
+    # new takes the average (6), and runs after short on the second worker
+    assert qitest.durations.predict_time(tests, durations, num_jobs=2) == 14
+    assert qitest.durations.predict_time(tests, dict(), num_jobs=2) is None
+
+def test_read_write(tmpdir):
+    durations_json = tmpdir.join("durations.json")
+    durations = qitest.durations.TestDurations(durations_json.strpath)
+    assert durations.durations == dict()
+    result = qitest.result.TestResult({"name" : "foo"})
+    result.time = 4.2
+    durations.update({"foo" : result})
+    durations.write()
+    durations = qitest.durations.TestDurations(durations_json.strpath)
+    assert durations.durations == {"foo" : 4.2}
+
+def test_corrupted_file(tmpdir):
+    durations_json = tmpdir.join("durations.json")
+    durations_json.write("{ not json")
+    durations = qitest.durations.TestDurations(durations_json.strpath)
+    assert durations.durations == dict()
+
+def test_split():
+    tests = [{"name" : x} for x in ["a", "b", "c", "d", "e"]]
+    durations = {"a" : 1, "b" : 8, "c" : 3, "d" : 4}
+    shards = qitest.durations.split(tests, durations, 2)
+    # b (8) and d (4) go first, then e (4, the average) joins d,
+    # c (3) joins b, and a (1) joins d and e
+    assert [[x["name"] for x in shard] for shard in shards] == \
+        [["b", "c"], ["a", "d", "e"]]
+    # every test is in exactly one shard
+    for num_shards in range(1, 7):
+        shards = qitest.durations.split(tests, durations, num_shards)
+        assert sorted(sum(shards, list())) == sorted(tests)
+
+def test_split_does_not_depend_on_order():
+    tests = [{"name" : x} for x in ["a", "b", "c", "d", "e"]]
+    shards = qitest.durations.split(tests, dict(), 2)
+    reversed_shards = qitest.durations.split(list(reversed(tests)), dict(), 2)
+    for shard, reversed_shard in zip(shards, reversed_shards):
+        assert sorted(shard) == sorted(reversed_shard)
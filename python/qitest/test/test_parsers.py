@@ -1,5 +1,10 @@
+import argparse
+import json
 import os
 
+import pytest
+
+import qitest.conf
 import qitest.parsers
 
 def test_nothing_specified_json_in_cwd(args, tmpdir, monkeypatch):
@@ -53,3 +58,44 @@ def test_qitest_json_from_worktree(args, build_worktree, monkeypatch):
     args.qitest_jsons = [qitest_json]
     test_runner = qitest.parsers.get_test_runner(args)
     assert test_runner.cwd == testme_proj.sdk_directory
+
+def test_shard(args, tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    tests = [{"name" : x, "cmd" : ["true"]} for x in ["a", "b", "c", "d", "e"]]
+    qitest.conf.write_tests(tests, tmpdir.join("qitest.json").strpath)
+    args.perf = False
+    names = set()
+    for i in range(1, 4):
+        args.shard = qitest.parsers.parse_shard("%i/3" % i)
+        test_runner = qitest.parsers.get_test_runner(args)
+        names.update(x["name"] for x in test_runner.tests)
+        assert 1 <= len(test_runner.tests) <= 2
+    assert names == set(["a", "b", "c", "d", "e"])
+
+def test_shard_durations_are_read_only(args, tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    tests = [{"name" : x, "cmd" : ["true"]} for x in ["a", "b", "c", "d", "e"]]
+    qitest.conf.write_tests(tests, tmpdir.join("qitest.json").strpath)
+    durations_json = tmpdir.join("durations.json")
+    durations_json.write(json.dumps({"a" : 10, "b" : 1, "c" : 1, "d" : 1}))
+    args.perf = False
+    args.shard_durations_path = durations_json.strpath
+    args.num_jobs = 1
+    ran = list()
+    for i in range(1, 3):
+        args.shard = qitest.parsers.parse_shard("%i/2" % i)
+        test_runner = qitest.parsers.get_test_runner(args)
+        test_runner.run()
+        ran.extend(x["name"] for x in test_runner.tests)
+    assert sorted(ran) == ["a", "b", "c", "d", "e"]
+    assert json.loads(durations_json.read()) == \
+        {"a" : 10, "b" : 1, "c" : 1, "d" : 1}
+    # local history is still recorded:
+    assert os.path.exists(test_runner.durations_path)
+    assert test_runner.durations_path != durations_json.strpath
+
+def test_parse_shard():
+    assert qitest.parsers.parse_shard("2/3") == (2, 3)
+    for invalid in ["0/3", "4/3", "foo", "1/2/3"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            qitest.parsers.parse_shard(invalid)
@@ -0,0 +1,46 @@
+import qitest.actions.merge_results
+import qisys.qixml
+import qitest.durations
+
+def write_result(path, name, ok=True, time=1.0):
+    failure = "" if ok else '<failure message="[FAIL]">oops</failure>'
+    path.write("""\
+<testsuites tests="1" failures="{num_failures}" disabled="0" errors="0" time="{time}" name="All">
+  <testsuite name="test" tests="1" failures="{num_failures}" disabled="0" errors="0" time="{time}">
+    <testcase name="{name}" status="run">{failure}</testcase>
+  </testsuite>
+</testsuites>
+""".format(name=name, time=time, failure=failure,
+           num_failures="0" if ok else "1"))
+
+def test_merge_results(qitest_action, tmpdir, record_messages):
+    shard1 = tmpdir.mkdir("shard1")
+    shard2 = tmpdir.mkdir("shard2")
+    write_result(shard1.join("a.xml"), "a", time=2.0)
+    write_result(shard1.join("b.xml"), "b", time=3.0)
+    write_result(shard2.join("c.xml"), "c", time=4.0)
+    output = tmpdir.join("results.xml")
+    durations_json = tmpdir.join("durations.json")
+    qitest_action("merge-results", shard1.strpath, shard2.strpath,
+                  "-o", output.strpath, "--durations", durations_json.strpath)
+    assert record_messages.find("Ran 3 tests in 9s")
+    assert record_messages.find("All pass")
+    root = qisys.qixml.read(output.strpath).getroot()
+    assert root.get("tests") == "3"
+    assert root.get("failures") == "0"
+    names = [x.get("name") for x in root.findall("testsuite/testcase")]
+    assert names == ["a", "b", "c"]
+    durations = qitest.durations.TestDurations(durations_json.strpath)
+    assert durations.durations == {"a" : 2.0, "b" : 3.0, "c" : 4.0}
+
+def test_merge_results_with_failures(qitest_action, tmpdir, record_messages):
+    write_result(tmpdir.join("a.xml"), "a")
+    write_result(tmpdir.join("b.xml"), "b", ok=False)
+    output = tmpdir.join("out", "results.xml")
+    rc = qitest_action("merge-results", tmpdir.join("a.xml").strpath,
+                       tmpdir.join("b.xml").strpath, "-o", output.strpath,
+                       retcode=True)
+    assert rc == 1
+    assert record_messages.find("1 failures")
+    root = qisys.qixml.read(output.strpath).getroot()
+    assert root.get("failures") == "1"
@@ -0,0 +1,34 @@
+import json
+import os
+import sys
+
+import qisys.qixml
+import qitest.actions.run
+import qitest.conf
+
+def test_gtest_split(qitest_action, tmpdir, record_messages):
+    fake_gtest = os.path.join(os.path.dirname(__file__), "fake_gtest.py")
+    test = {
+        "name" : "fake_gtest",
+        "cmd" : [sys.executable, fake_gtest],
+        "gtest" : True,
+        "timeout" : 20,
+    }
+    qitest_json = tmpdir.join("qitest.json")
+    qitest.conf.write_tests([test], qitest_json.strpath)
+    rc = qitest_action("run", "--qitest-json", qitest_json.strpath,
+                       "--gtest-split", "2", "-j", "2", retcode=True)
+    assert rc == 1
+    # the parts are merged back before the summary:
+    assert record_messages.find("Ran 1 tests")
+    assert record_messages.find("1 failures")
+    assert record_messages.find(r"fake_gtest\s+\n  fake_gtest#2: \[FAIL\]")
+    durations = json.loads(tmpdir.join("qitest-durations.json").read())
+    assert durations.keys() == ["fake_gtest"]
+    # output of the failing part:
+    assert record_messages.find("ran Bar.one Bar.fails")
+    results_dir = tmpdir.join("test-results")
+    assert sorted(os.listdir(results_dir.strpath)) == ["fake_gtest.xml"]
+    root = qisys.qixml.read(results_dir.join("fake_gtest.xml").strpath).getroot()
+    assert root.get("tests") == "4"
+    assert root.get("failures") == "1"
@@ -82,3 +82,32 @@ def test_no_tests():
     test_queue.launcher = dummy_launcher
     test_queue.run(num_jobs=1)
     assert not test_queue.ok
+
+class RecordingLauncher(DummyLauncher):
+    def __init__(self):
+        DummyLauncher.__init__(self)
+        self.started = list()
+
+    def launch(self, test):
+        self.started.append(test["name"])
+        return DummyLauncher.launch(self, test)
+
+def test_longest_tests_first():
+    tests = [
+     {"name" : "short"},
+     {"name" : "medium"},
+     {"name" : "new"},
+     {"name" : "long"},
+    ]
+    durations = {"short" : 1, "medium" : 5, "long" : 10}
+    test_queue = qitest.test_queue.TestQueue(tests, durations=durations)
+    launcher = RecordingLauncher()
+    launcher.results = dict((x["name"], {"sleep_time" : 0.05}) for x in tests)
+    test_queue.launcher = launcher
+    test_queue.run(num_jobs=2)
+    assert test_queue.ok
+    # new (5.33) and long (10) start first, then medium after new,
+    # then short
+    assert test_queue.predicted_time == 11
+    assert set(launcher.started[:2]) == set(["new", "long"])
+    assert launcher.started[2:] == ["medium", "short"]
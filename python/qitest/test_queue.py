@@ -11,21 +11,34 @@ from Queue import Queue
 
 from qisys import ui
 import qisys.command
+import qitest.durations
 import qitest.result
 
 
 class TestQueue():
-    """ A class able to run tests in parallel """
-    def __init__(self, tests):
+    """ A class able to run tests in parallel
+
+    :param durations: a dict ``test name -> seconds``, used to start the
+                      longest tests first when running several tests
+                      at once
+
+    """
+    def __init__(self, tests, durations=None):
         self.tests = tests
+        if durations is None:
+            durations = dict()
+        self.durations = durations
         self.test_logger = TestLogger(tests)
         self.task_queue = Queue()
         self.launcher = None
+        # called with the tests and the results once every test has run,
+        # before the summary. Returns the results to display
+        self.on_jobs_done = None
         self.results = collections.OrderedDict()
         self.ok = False
         self._interrupted = False
         self.elapsed_time = 0
-
+        self.predicted_time = None
 
     def run(self, num_jobs=1):
         """ Run all the tests """
@@ -33,6 +46,8 @@ class TestQueue():
         start = datetime.datetime.now()
         self._run(num_jobs=num_jobs)
         signal.signal(signal.SIGINT, signal.default_int_handler)
+        if self.on_jobs_done:
+            self.results = self.on_jobs_done(self.tests, self.results)
         end = datetime.datetime.now()
         delta = end - start
         self.elapsed_time = float(delta.microseconds) / 10**6 + delta.seconds
@@ -44,7 +59,13 @@ class TestQueue():
         if not self.launcher:
             ui.error("test launcher not set, cannot run tests")
             return
-        for i, test in enumerate(self.tests):
+        tests = self.tests
+        if num_jobs > 1:
+            tests = qitest.durations.schedule(tests, self.durations)
+        self.predicted_time = qitest.durations.predict_time(tests,
+                                                            self.durations,
+                                                            num_jobs=num_jobs)
+        for i, test in enumerate(tests):
             self.task_queue.put((test, i))
 
         if num_jobs == 1:
@@ -85,6 +106,8 @@ class TestQueue():
         failures = [x for x in self.results.values() if x.ok is False]
         num_failed = len(failures)
         message = "Ran %i tests in %is" % (num_tests, self.elapsed_time)
+        if self.predicted_time is not None:
+            message += " (expected: %is)" % self.predicted_time
         ui.info(message)
         self.ok = (not failures) and not self._interrupted
         if self.ok:
@@ -6,6 +6,7 @@
 
 """
 
+import multiprocessing
 import os
 
 from qisys import ui
@@ -54,7 +55,8 @@ Importing '{1}' in the toolchain {0} ...
     qisys.sh.rm(package_dest)
     with qisys.sh.TempDir() as tmp:
         extracted = qisys.archive.extract(converted_package_path, tmp, quiet=True)
-        qisys.sh.install(extracted, package_dest, quiet=True)
+        qisys.sh.install(extracted, package_dest, quiet=True,
+                         num_jobs=multiprocessing.cpu_count())
     qibuild_package = qitoolchain.Package(name, package_dest)
     toolchain.add_package(qibuild_package)
     ui.info("done")
@@ -21,6 +21,10 @@ def configure_parser(parser):
     parser.add_argument("feed", metavar="TOOLCHAIN_FEED",
         help="Use this feed location to update the toolchain.\n",
         nargs="?")
+    parser.add_argument("-j", "--jobs", dest="num_jobs", type=int,
+        help="Number of packages to download at the same time "
+             "(default: 4)")
+    parser.set_defaults(num_jobs=4)
 
 def do(args):
     """Main entry point
@@ -38,7 +42,7 @@ def do(args):
                         "specifiy a feed on the command line\n"
                 raise Exception(mess)
         ui.info(ui.green, "Updating toolchain", tc_name, "with", feed)
-        toolchain.update(feed)
+        toolchain.update(feed, num_jobs=args.num_jobs)
     else:
         tc_names = qitoolchain.get_tc_names()
         for i, tc_name in enumerate(tc_names, start=1):
@@ -50,4 +54,4 @@ def do(args):
             ui.info(ui.green, "*", ui.reset, "(%i/%i)" % (i, len(tc_names)),
                     ui.green, "Updating", ui.blue, tc_name)
             ui.info(ui.green, "Reading", tc_feed)
-            toolchain.update(tc_feed)
+            toolchain.update(tc_feed, num_jobs=args.num_jobs)
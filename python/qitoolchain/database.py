@@ -1,8 +1,15 @@
+import hashlib
+import multiprocessing
 import os
+import re
+import tempfile
+import threading
 
 from qisys import ui
 from qisys.qixml import etree
+import qisys.parallel
 import qisys.qixml
+import qisys.remote
 import qitoolchain.feed
 import qitoolchain.qipackage
 import qitoolchain.svn_package
@@ -18,6 +25,9 @@ class DataBase(object):
                                                   self.name)
         self.packages_path = qisys.sh.get_share_path("qi", "toolchains",
                                                      self.name)
+        # archives with a known digest, shared by every toolchain:
+        self.archives_path = qisys.sh.get_cache_path("qi", "toolchains",
+                                                     ".archives")
 
     def load(self):
         """ Load the packages from the xml file """
@@ -48,6 +58,10 @@ class DataBase(object):
                 element.set("sysroot", package.sysroot)
             if package.cross_gdb:
                 element.set("cross_gdb", package.cross_gdb)
+            if package.digest:
+                element.set("digest", package.digest)
+            if package.size is not None:
+                element.set("size", str(package.size))
 
             root.append(element)
         qisys.qixml.write(tree, self.db_path)
@@ -104,8 +118,14 @@ class DataBase(object):
                 res.append(self.packages[name])
         return res
 
-    def update(self, feed):
-        """ Update a toolchain given a feed """
+    def update(self, feed, num_jobs=1):
+        """ Update a toolchain given a feed
+
+        :param num_jobs: when greater than one, download up to
+                         ``num_jobs`` packages at the same time, and
+                         extract them as soon as they are downloaded
+
+        """
         feed_parser = qitoolchain.feed.ToolchainFeedParser()
         feed_parser.parse(feed)
         remote_packages = feed_parser.get_packages()
@@ -124,7 +144,10 @@ class DataBase(object):
             self.packages[svn_package.name] = svn_package
 
         for remote_package in other_packages:
-            if remote_package in local_packages:
+            local_package = self.packages.get(remote_package.name)
+            if local_package is not None and \
+               local_package == remote_package and \
+               _same_contents(local_package, remote_package):
                 continue
             to_add.append(remote_package)
 
@@ -140,15 +163,27 @@ class DataBase(object):
 
         if to_add:
             ui.info(ui.green, "Adding packages")
+        to_download = [x for x in to_add if x.url]
+        errors = list()
+        if num_jobs > 1 and to_download:
+            errors = self.download_packages(to_download, num_jobs)
+        failed_names = set(x[0].name for x in errors)
+        to_add = [x for x in to_add if x.name not in failed_names]
         for i, package in enumerate(to_add):
             ui.info_count(i, len(to_add), ui.blue, package.name)
-            self.handle_package(package, feed)
+            self.handle_package(package, feed, download=(num_jobs <= 1))
             self.packages[package.name] = package
 
+        # save the packages that were added, even if some failed
         self.save()
+        if errors:
+            mess = "Could not add the following packages:\n"
+            for (package, error) in errors:
+                mess += " * %s: %s\n" % (package.name, error)
+            raise Exception(mess)
 
-    def handle_package(self, package, feed):
-        if package.url:
+    def handle_package(self, package, feed, download=True):
+        if package.url and download:
             self.download_package(package)
         if package.directory:
             self.handle_local_package(package, feed)
@@ -186,12 +221,193 @@ class DataBase(object):
             package.cross_gdb = os.path.join(package.path, package.cross_gdb)
 
     def download_package(self, package):
-        archive = qisys.remote.download(package.url, self.cache_path,
-                                        message = (ui.green, "Downloading",
-                                                   ui.reset, ui.blue, package.url))
-        dest = os.path.join(self.packages_path, package.name)
+        archive = self._download_archive(package)
         ui.info(ui.green, "Extracting",
                 ui.reset, ui.blue, package.name, package.version)
-        qitoolchain.qipackage.extract(archive, dest)
-        qisys.sh.rm(archive)
+        self._extract_archive(package, archive)
+
+    def download_packages(self, packages, num_jobs):
+        """ Download and extract the packages, with up to ``num_jobs``
+        downloads running at the same time.
+
+        Extraction is done by an other pool of threads, so that a package
+        is extracted while the next ones are being downloaded.
+        Packages that could not be downloaded or extracted are left
+        untouched.
+
+        :returns: a list of ``(package, error)`` tuples for the packages
+                  that could not be downloaded or extracted
+
+        """
+        downloaded = dict((x.name, threading.Event()) for x in packages)
+        archives = dict()
+        num_done = [0]
+        lock = threading.Lock()
+
+        def download(package):
+            try:
+                archives[package.name] = self._download_archive(package,
+                                                                callback=None)
+            finally:
+                downloaded[package.name].set()
+
+        def extract(package):
+            downloaded[package.name].wait()
+            archive = archives.get(package.name)
+            if archive is None:
+                # the download failed, the error is reported by the
+                # download queue
+                return
+            self._extract_archive(package, archive)
+            with lock:
+                ui.info_count(num_done[0], len(packages),
+                              ui.green, "Extracted",
+                              ui.reset, ui.blue, package.name, package.version)
+                num_done[0] += 1
+
+        download_queue = qisys.parallel.JobQueue(packages,
+                                                 num_workers=num_jobs)
+        download_thread = threading.Thread(target=download_queue.run,
+                                           args=(download,),
+                                           name="DownloadQueue")
+        download_thread.daemon = True
+        download_thread.start()
+        num_extractors = min(num_jobs, multiprocessing.cpu_count())
+        extract_queue = qisys.parallel.JobQueue(packages,
+                                                num_workers=num_extractors)
+        extract_queue.run(extract)
+        download_thread.join()
+
+        return download_queue.failed + extract_queue.failed
+
+    def _download_archive(self, package, callback=qisys.remote.callback):
+        message = (ui.green, "Downloading", ui.reset, ui.blue, package.url)
+        if package.digest:
+            return self._download_archive_with_digest(package,
+                                                      callback=callback,
+                                                      message=message)
+        # several packages may use the same archive name:
+        output_name = "%s-%s" % (package.name, package.url.split("/")[-1])
+        return qisys.remote.download(package.url, self.cache_path,
+                                     output_name=output_name,
+                                     callback=callback,
+                                     message=message)
+
+    def _download_archive_with_digest(self, package, callback=None,
+                                      message=None):
+        """ Archives with a digest are stored in a cache shared by every
+        toolchain, indexed by their digest, so that they are only
+        downloaded once
+
+        """
+        archive = self.get_archive_path(package)
+        with qisys.sh.file_lock(archive):
+            if os.path.exists(archive):
+                if package.size is None or \
+                   os.path.getsize(archive) == package.size:
+                    ui.info(ui.green, "Using cached archive for",
+                            ui.reset, ui.blue, package.name, package.version)
+                    return archive
+            tmp = tempfile.mkdtemp(prefix=".download-",
+                                   dir=os.path.dirname(archive))
+            try:
+                downloaded = qisys.remote.download(package.url, tmp,
+                                                   output_name=os.path.basename(archive),
+                                                   callback=callback,
+                                                   message=message)
+                check_archive(downloaded, package)
+                os.rename(downloaded, archive)
+            finally:
+                qisys.sh.rm(tmp)
+        return archive
+
+    def get_archive_path(self, package):
+        """ Path of the archive of a package having a digest,
+        in the shared cache
+
+        """
+        (algo, hex_digest) = _parse_digest(package.digest)
+        # keep the extension, it is used to guess how to extract the archive
+        archive_name = package.url.split("/")[-1]
+        return os.path.join(self.archives_path, algo, hex_digest, archive_name)
+
+    def _extract_archive(self, package, archive):
+        """ Extract the archive in a temporary directory next to
+        the package destination, then move it in place, so that
+        the package is never left half-extracted
+
+        """
+        dest = os.path.join(self.packages_path, package.name)
+        qisys.sh.mkdir(self.packages_path, recursive=True)
+        tmp = tempfile.mkdtemp(prefix=".%s-" % package.name,
+                               dir=self.packages_path)
+        try:
+            extract_dest = os.path.join(tmp, package.name)
+            qitoolchain.qipackage.extract(archive, extract_dest)
+            qisys.sh.rm(dest)
+            os.rename(extract_dest, dest)
+        finally:
+            qisys.sh.rm(tmp)
+        if not package.digest:
+            # the archive is not in the shared cache, no need to keep it
+            qisys.sh.rm(archive)
         package.path = dest
+
+
+def check_archive(archive, package):
+    """ Raise if the size or the digest of a downloaded archive
+    do not match the ones of the package
+
+    """
+    if package.size is not None:
+        size = os.path.getsize(archive)
+        if size != package.size:
+            raise Exception("Wrong size for %s: expected %i, got %i" %
+                            (package.url, package.size, size))
+    (algo, expected) = _parse_digest(package.digest)
+    actual = _file_digest(archive, algo)
+    if actual != expected:
+        raise Exception("Wrong %s digest for %s: expected %s, got %s" %
+                        (algo, package.url, expected, actual))
+
+def _parse_digest(digest):
+    """ Split ``<algorithm>:<hex digest>``. The algorithm defaults
+    to sha256
+
+    """
+    if ":" in digest:
+        (algo, hex_digest) = digest.split(":", 1)
+    else:
+        (algo, hex_digest) = ("sha256", digest)
+    algo = algo.lower()
+    if algo not in hashlib.algorithms:
+        raise Exception("Unknown digest algorithm: %s" % algo)
+    hex_digest = hex_digest.lower()
+    # the digest is used in the path of the archive
+    expected_len = hashlib.new(algo).digest_size * 2
+    if not re.match("^[0-9a-f]+$", hex_digest) or \
+            len(hex_digest) != expected_len:
+        raise Exception("Invalid %s digest: %s" % (algo, digest))
+    return (algo, hex_digest)
+
+def _file_digest(path, algo):
+    res = hashlib.new(algo)
+    with open(path, "rb") as fp:
+        while True:
+            data = fp.read(1024 * 1024)
+            if not data:
+                break
+            res.update(data)
+    return res.hexdigest()
+
+def _same_contents(local_package, remote_package):
+    """ Packages with the same version but different digests
+    have been rebuilt, and need to be updated
+
+    """
+    if not remote_package.digest:
+        return True
+    if not local_package.digest:
+        return False
+    return _parse_digest(local_package.digest) == \
+           _parse_digest(remote_package.digest)
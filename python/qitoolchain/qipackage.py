@@ -3,6 +3,7 @@ import re
 import zipfile
 
 from qisys.qixml import etree
+import qisys.qixml
 import qisys.version
 import qibuild.deps
 
@@ -22,9 +23,15 @@ class QiPackage(object):
         self.toolchain_file = None
         self.sysroot = None
         self.cross_gdb = None
+        # checksum of the archive, as "<algorithm>:<hex digest>",
+        # and its size in bytes:
+        self.digest = None
+        self.size = None
         self.build_depends = set()
         self.run_depends = set()
         self.test_depends = set()
+        # tuple of mask lines -> compiled regex
+        self._compiled_masks = dict()
 
     def load_deps(self):
         """ Parse package.xml, set the dependencies """
@@ -33,9 +40,12 @@ class QiPackage(object):
             xml_root = qisys.qixml.read(package_xml)
             qibuild.deps.read_deps_from_xml(self, xml_root)
 
-    def install(self, destdir, components=None, release=True):
+    def install(self, destdir, components=None, release=True, **kwargs):
         """ Install the given components of the package to the given destination
 
+        Other keyword arguments (``mode``, ``check_contents``, ``stats``)
+        are passed to :py:func:`qisys.sh.install`
+
         Will read
 
         * ``install_manifest_<component>.txt`` for each component if the file exists
@@ -45,18 +55,19 @@ class QiPackage(object):
 
         """
         if not components:
-            return self._install_all(destdir)
+            return self._install_all(destdir, **kwargs)
         installed_files = list()
         for component in components:
             installed_for_component = self._install_component(component,
-                                                              destdir, release=release)
+                                                              destdir, release=release,
+                                                              **kwargs)
             installed_files.extend(installed_for_component)
         return installed_files
 
-    def _install_all(self, destdir):
-        return qisys.sh.install(self.path, destdir)
+    def _install_all(self, destdir, **kwargs):
+        return qisys.sh.install(self.path, destdir, **kwargs)
 
-    def _install_component(self, component, destdir, release=True):
+    def _install_component(self, component, destdir, release=True, **kwargs):
         installed_files = list()
         manifest_name = "install_manifest_%s.txt" % component
         if not release:
@@ -69,12 +80,13 @@ class QiPackage(object):
             if not mask and component=="runtime":
                 # retro-compat
                 return qisys.sh.install(self.path, destdir,
-                                        filter_fun=qisys.sh.is_runtime)
+                                        filter_fun=qisys.sh.is_runtime,
+                                        **kwargs)
             else:
                 # avoid install masks and package.xml
                 mask.append(".*\.mask")
                 mask.append("package\.xml")
-                return self._install_with_mask(destdir, mask)
+                return self._install_with_mask(destdir, mask, **kwargs)
         else:
             with open(manifest_path, "r") as fp:
                 lines = fp.readlines()
@@ -83,7 +95,7 @@ class QiPackage(object):
                     line = line[1:] # remove leading "/"
                     src = os.path.join(self.path, line)
                     dest = os.path.join(destdir, line)
-                    qisys.sh.install(src, dest)
+                    qisys.sh.install(src, dest, **kwargs)
                     installed_files.append(dest)
             return installed_files
 
@@ -97,17 +109,28 @@ class QiPackage(object):
             mask = [x.strip() for x in mask]
             return mask
 
-    def _install_with_mask(self, destdir, mask):
+    def _install_with_mask(self, destdir, mask, **kwargs):
+        regex = self._compile_mask(mask)
+        sep = os.path.sep
         def filter_fun(src):
-            src = qisys.sh.to_posix_path(src)
-            src = "/" + src
-            for regex in mask:
-                match = re.match(regex, src)
-                if match:
-                    return False
-            return True
+            if sep != "/":
+                src = src.replace(sep, "/")
+            return regex.match("/" + src) is None
+
+        return qisys.sh.install(self.path, destdir, filter_fun=filter_fun,
+                                **kwargs)
+
+    def _compile_mask(self, mask):
+        """ Compile the lines of an install mask into one regex,
+        matching the paths matched by any of the lines
 
-        return qisys.sh.install(self.path, destdir, filter_fun=filter_fun)
+        """
+        key = tuple(mask)
+        res = self._compiled_masks.get(key)
+        if res is None:
+            res = re.compile("|".join("(?:%s)" % x for x in mask))
+            self._compiled_masks[key] = res
+        return res
 
     def __repr__(self):
         return "<Package %s %s>" % (self.name, self.version)
@@ -149,6 +172,9 @@ def from_xml(element):
     res.toolchain_file = element.get("toolchain_file")
     res.sysroot = element.get("sysroot")
     res.cross_gdb = element.get("cross_gdb")
+    res.digest = element.get("digest")
+    if element.get("size") is not None:
+        res.size = qisys.qixml.parse_int_attr(element, "size")
     qibuild.deps.read_deps_from_xml(res, element)
     return res
 
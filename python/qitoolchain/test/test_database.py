@@ -1,6 +1,14 @@
+import hashlib
+import os
+import threading
+import urllib2
+import BaseHTTPServer
+import SimpleHTTPServer
+
 import mock
 import pytest
 
+import qisys.remote
 import qitoolchain.database
 import qitoolchain.qipackage
 import qitoolchain.feed
@@ -46,6 +54,107 @@ def test_downloads_only_once(toolchain_db, feed):
         toolchain_db.update(feed.url)
     assert mock_dl.call_count == 1
 
+def test_parallel_downloads(toolchain_db, feed, http_server):
+    names = ["boost", "qt", "gtest", "zlib"]
+    for name in names:
+        package = qitoolchain.qipackage.QiPackage(name, version="1.0")
+        feed.add_package(package, with_path=False, with_url=True)
+    toolchain_db.update(serve_feed(feed, http_server), num_jobs=3)
+    for name in names:
+        path = toolchain_db.packages[name].path
+        assert os.path.exists(os.path.join(path, "lib", "lib%s.so" % name))
+    assert sorted(http_server.requests) == \
+        sorted(["/feed.xml"] + ["/packages/%s-1.0.zip" % x for x in names])
+    # nothing left behind:
+    assert sorted(os.listdir(toolchain_db.packages_path)) == sorted(names)
+
+def test_parallel_downloads_failure(toolchain_db, feed, http_server):
+    boost_package = qitoolchain.qipackage.QiPackage("boost", version="1.42")
+    feed.add_package(boost_package, with_path=False, with_url=True)
+    qt_package = qitoolchain.qipackage.QiPackage("qt", version="4.8")
+    qt_package.url = http_server.url + "/packages/no-such-qt.zip"
+    feed.db.add_package(qt_package)
+    feed.db.save()
+    feed_url = serve_feed(feed, http_server)
+    with pytest.raises(Exception) as e:
+        toolchain_db.update(feed_url, num_jobs=2)
+    assert "qt" in str(e.value)
+    assert os.listdir(toolchain_db.packages_path) == ["boost"]
+    # boost is in the database, and is not downloaded again:
+    db = qitoolchain.database.DataBase("bar", toolchain_db.db_path)
+    assert db.packages["boost"] == boost_package
+    assert not "qt" in db.packages
+    with pytest.raises(Exception):
+        db.update(feed_url, num_jobs=2)
+    assert http_server.requests.count("/packages/boost-1.42.zip") == 1
+
+def test_archives_with_digest_are_shared(toolchain_db, feed, http_server):
+    boost_package = qitoolchain.qipackage.QiPackage("boost", version="1.42")
+    feed.add_package(boost_package, with_path=False, with_url=True)
+    set_digest(feed, boost_package)
+    feed_url = serve_feed(feed, http_server)
+    toolchain_db.update(feed_url)
+    boost_path = toolchain_db.packages["boost"].path
+    assert os.path.exists(os.path.join(boost_path, "lib", "libboost.so"))
+    assert http_server.requests.count("/packages/boost-1.42.zip") == 1
+    archive = toolchain_db.get_archive_path(boost_package)
+    assert os.path.exists(archive)
+
+    other_db_path = http_server.tmpdir.join("other.xml")
+    other_db_path.write("<toolchain />")
+    other_db = qitoolchain.database.DataBase("other", other_db_path.strpath)
+    other_db.update(feed_url, num_jobs=2)
+    assert other_db.packages["boost"].path != boost_path
+    assert os.path.exists(os.path.join(other_db.packages["boost"].path,
+                                       "lib", "libboost.so"))
+    assert http_server.requests.count("/packages/boost-1.42.zip") == 1
+
+def test_new_digest_same_version(toolchain_db, feed, http_server):
+    boost_package = qitoolchain.qipackage.QiPackage("boost", version="1.42")
+    feed.add_package(boost_package, with_path=False, with_url=True)
+    set_digest(feed, boost_package)
+    feed_url = serve_feed(feed, http_server)
+    toolchain_db.update(feed_url)
+    toolchain_db.update(feed_url)
+    assert http_server.requests.count("/packages/boost-1.42.zip") == 1
+
+    # same version, but the package has been rebuilt:
+    feed.packages_path.ensure("lib", "libboost_python.so", file=True)
+    feed.add_package(boost_package, with_path=False, with_url=True)
+    set_digest(feed, boost_package)
+    feed_url = serve_feed(feed, http_server)
+    toolchain_db.update(feed_url)
+    assert http_server.requests.count("/packages/boost-1.42.zip") == 2
+    boost_path = toolchain_db.packages["boost"].path
+    assert os.path.exists(os.path.join(boost_path, "lib", "libboost_python.so"))
+    assert toolchain_db.packages["boost"].digest == boost_package.digest
+
+def test_wrong_digest(toolchain_db, feed, http_server):
+    boost_package = qitoolchain.qipackage.QiPackage("boost", version="1.42")
+    feed.add_package(boost_package, with_path=False, with_url=True)
+    boost_package.digest = "sha256:" + "0" * 64
+    feed.db.save()
+    with pytest.raises(Exception) as e:
+        toolchain_db.update(serve_feed(feed, http_server))
+    assert "Wrong sha256 digest" in str(e.value)
+    assert not os.path.exists(toolchain_db.get_archive_path(boost_package))
+
+@pytest.mark.parametrize("digest", ["sha256:../../x",
+                                    "sha256:" + "0" * 63,
+                                    "md5:" + "0" * 64,
+                                    "sha256:" + "0" * 63 + "/"])
+def test_invalid_digest(toolchain_db, feed, http_server, digest):
+    boost_package = qitoolchain.qipackage.QiPackage("boost", version="1.42")
+    feed.add_package(boost_package, with_path=False, with_url=True)
+    boost_package.digest = digest
+    feed.db.save()
+    with pytest.raises(Exception) as e:
+        toolchain_db.update(serve_feed(feed, http_server))
+    assert "Invalid" in str(e.value)
+    assert not os.path.exists(toolchain_db.archives_path) or \
+        os.listdir(toolchain_db.archives_path) == list()
+    assert not "/packages/boost-1.42.zip" in http_server.requests
+
 def test_package_removed_from_feed(toolchain_db, feed):
     boost_package = qitoolchain.qipackage.QiPackage("boost", version="1.42")
     feed.add_package(boost_package)
@@ -83,3 +192,53 @@ def test_solve_deps(toolchain_db, tmpdir):
     toolchain_db.add_package(foo_package)
     res = toolchain_db.solve_deps([bar_package], dep_types=["build"])
     assert res == [foo_package, bar_package]
+
+def set_digest(feed, package):
+    archive = feed.packages_path.join("%s-%s.zip" % (package.name,
+                                                     package.version))
+    package.digest = "sha256:" + hashlib.sha256(archive.read("rb")).hexdigest()
+    package.size = archive.size()
+    feed.db.save()
+
+def serve_feed(feed, http_server):
+    """ Make the urls of the feed point to the http server """
+    feed_xml = feed.feed_xml.read()
+    feed.feed_xml.write(feed_xml.replace(feed.url.replace("feed.xml", ""),
+                                         http_server.url))
+    return http_server.url + "/feed.xml"
+
+
+class HTTPServer(object):
+    """ Serve a directory over http, recording the requested paths """
+    def __init__(self, root):
+        self.tmpdir = root
+        requests = self.requests = list()
+        class Handler(SimpleHTTPServer.SimpleHTTPRequestHandler):
+            def translate_path(self, path):
+                requests.append(path)
+                return root.join(path.lstrip("/")).strpath
+            def log_message(self, *args):
+                pass
+        self.server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%i" % self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+# pylint: disable-msg=E1101
+@pytest.fixture
+def http_server(request, tmpdir, monkeypatch):
+    # do not look for credentials in ~/.config/qi
+    monkeypatch.setattr(qisys.remote, "get_server_access", lambda x: None)
+    # downloads may run in several threads: the global opener
+    # must not be used
+    def install_opener(opener):
+        assert False, "urllib2.install_opener() called"
+    monkeypatch.setattr(urllib2, "install_opener", install_opener)
+    res = HTTPServer(tmpdir)
+    request.addfinalizer(res.stop)
+    return res
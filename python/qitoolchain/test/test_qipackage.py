@@ -71,6 +71,24 @@ def test_reads_release_mask(tmpdir):
     assert dest.join("bin", "QtCore4.dll").check(file=True)
     assert not dest.join("lib", "QtCored4.lib").check(file=True)
 
+def test_install_mask_is_compiled_once(tmpdir):
+    foo_path = tmpdir.mkdir("foo")
+    foo_path.ensure("include", "foo.h", file=True)
+    foo_path.ensure("lib", "libfoo.a", file=True)
+    foo_path.ensure("lib", "libfoo.so", file=True)
+    foo_path.ensure("share", "foo", "foo.txt", file=True)
+    foo_path.join("runtime.mask").write("""\
+/include/.*
+/lib/.*\.a|/share/.*
+""")
+    package = qitoolchain.qipackage.QiPackage("foo", path=foo_path.strpath)
+    dest = tmpdir.join("dest")
+    installed = package.install(dest.strpath, components=["runtime"])
+    assert installed == ["lib/libfoo.so"]
+    assert len(package._compiled_masks) == 1
+    package.install(tmpdir.join("dest2").strpath, components=["runtime"])
+    assert len(package._compiled_masks) == 1
+
 def test_debug_install(tmpdir):
     naoqi_path = tmpdir.mkdir("naoqi")
     naoqi_path.ensure("bin", "naoqi_d.exe")
@@ -45,10 +45,10 @@ class Toolchain(object):
     def unregister(self):
         qisys.sh.rm(self.config_path)
 
-    def update(self, feed_url=None):
+    def update(self, feed_url=None, num_jobs=1):
         if feed_url is None:
             feed_url = self.feed_url
-        self.db.update(feed_url)
+        self.db.update(feed_url, num_jobs=num_jobs)
         self.feed_url = feed_url
         self.save()
 